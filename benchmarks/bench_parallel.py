@@ -0,0 +1,71 @@
+"""
+Benchmark of serial vs. process-pool extraction in IfcData.load.
+
+example_file.ifc is replicated N times into one synthetic model (entity ids
+are shifted for every copy) and loaded with different worker counts.
+
+Usage:
+    python benchmarks/bench_parallel.py [--copies 1 10 50] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from ifc_data import IfcData
+
+EXAMPLE_FILE = os.path.join(ROOT, 'example_file.ifc')
+ENTITY_ID = re.compile(r'#(\d+)')
+
+def replicate_ifc(source: str, target: str, copies: int):
+    """Write `copies` copies of the DATA section of `source` into one file."""
+    with open(source, encoding='utf-8', errors='surrogateescape') as f:
+        text = f.read()
+    header, rest = text.split('DATA;', 1)
+    data, footer = rest.rsplit('ENDSEC;', 1)
+    max_id = max(int(i) for i in ENTITY_ID.findall(data))
+
+    with open(target, 'w', encoding='utf-8', errors='surrogateescape') as f:
+        f.write(header + 'DATA;')
+        for copy in range(copies):
+            offset = copy * max_id
+            f.write(ENTITY_ID.sub(lambda m: f'#{int(m.group(1)) + offset}', data) if offset else data)
+        f.write('ENDSEC;' + footer)
+
+def time_load(ifc_file: str, workers: int):
+    ifc_data = IfcData(cache=None)
+    started = time.perf_counter()
+    ifc_data.load(ifc_file, workers=workers)
+    seconds = time.perf_counter() - started
+    df = ifc_data.df.copy()
+    ifc_data.close()
+    return seconds, df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f'CPUs available: {os.cpu_count()}')
+    print(f'{"copies":>7} {"rows":>8} {"workers":>8} {"seconds":>9} {"speedup":>8} {"identical":>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in args.copies:
+            ifc_file = os.path.join(tmp, f'example_x{copies}.ifc')
+            replicate_ifc(EXAMPLE_FILE, ifc_file, copies)
+            serial_seconds, serial_df = time_load(ifc_file, 1)
+            print(f'{copies:>7} {len(serial_df):>8} {1:>8} {serial_seconds:>9.2f} {1.0:>8.2f} {"-":>10}')
+            for workers in args.workers:
+                if workers == 1:
+                    continue
+                seconds, df = time_load(ifc_file, workers)
+                print(f'{copies:>7} {len(df):>8} {workers:>8} {seconds:>9.2f} '
+                      f'{serial_seconds / seconds:>8.2f} {str(df.equals(serial_df)):>10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Startup-time benchmark of the desktop application.
+
+Imports the application layout in fresh processes with `python -X importtime`
+and reports the import time of the layout, the slowest modules by
+cumulative import time and which heavy modules were imported before the
+first frame although the application loads them lazily (ifcopenshell on the
+first file pick, matplotlib on the first matplotlib chart).
+
+    python benchmarks/bench_startup.py --runs 5 --top 15
+    python benchmarks/bench_startup.py --budget 1.5 --output startup.json
+
+With --budget the script exits with status 1 if the median import time
+exceeds the budget (in seconds) or a lazily loaded module was imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+# Module imported before the first frame; the shell in main.py only needs flet
+STARTUP_MODULE = 'app_layout'
+# Modules which must not be imported at startup
+LAZY_MODULES = ('ifcopenshell', 'matplotlib')
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse the output of -X importtime.
+
+    Returns:
+        Dictionary of module name -> (self, cumulative) import time in seconds.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+def measure_once(module: str) -> dict:
+    started = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    wall_seconds = time.perf_counter() - started
+    modules = parse_importtime(child.stderr)
+    return {
+        'wall_seconds': wall_seconds,
+        'import_seconds': modules[module][1],
+        'modules': modules,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default=STARTUP_MODULE, help=f'module to import (default: {STARTUP_MODULE})')
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh processes (default: 5)')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules to list')
+    parser.add_argument('--budget', type=float, help='maximum median import time in seconds')
+    parser.add_argument('--output', help='JSON file for the results')
+    args = parser.parse_args()
+
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    import_seconds = statistics.median(run['import_seconds'] for run in runs)
+    wall_seconds = statistics.median(run['wall_seconds'] for run in runs)
+    # Module timings of the run closest to the median
+    typical = min(runs, key=lambda run: abs(run['import_seconds'] - import_seconds))['modules']
+    slowest = sorted(typical.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    eager = [name for name in LAZY_MODULES if name in typical]
+
+    print(f'import {args.module}: {import_seconds:.3f} s median of {args.runs} '
+          f'(process wall time {wall_seconds:.3f} s)')
+    print(f'\n{"cumulative [s]":>15} {"self [s]":>9}  module')
+    for name, (self_seconds, cumulative_seconds) in slowest:
+        print(f'{cumulative_seconds:>15.3f} {self_seconds:>9.3f}  {name}')
+    if eager:
+        print(f'\nImported at startup although loaded lazily: {", ".join(eager)}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'module': args.module,
+                'runs': args.runs,
+                'import_seconds': import_seconds,
+                'wall_seconds': wall_seconds,
+                'eager_lazy_modules': eager,
+                'slowest': [
+                    {'module': name, 'self_seconds': self_seconds, 'cumulative_seconds': cumulative_seconds}
+                    for name, (self_seconds, cumulative_seconds) in slowest
+                ],
+            }, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.budget is not None and (import_seconds > args.budget or eager):
+        print(f'\nStartup budget of {args.budget:.3f} s exceeded or lazy modules imported', file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Benchmark suite for model loading and costing.
+
+For every model size a synthetic IFC model is generated (see
+synthetic_model.py) and the following phases are timed in a fresh process,
+recording the peak resident memory after each phase:
+
+    load                IfcData.load (takeoff cache disabled)
+    material_costs      IfcData.get_material_costs (first read)
+    element_costs       IfcData.get_element_costs (first read)
+    price_update        IfcData.update_material_price for every material
+    price_catalogue     IfcData.update_material_prices with all materials
+    table_material      Table_prim("material") row construction
+    table_element       Table_prim("element") row construction
+
+Results are written as JSON so runs on different commits can be compared:
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 --output before.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 --output after.json --compare before.json
+
+With --takeoff-only the models are loaded with the takeoff-only reader
+(IfcData.takeoff_only), so its time and memory can be compared with a run
+without the option.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_model import generate_model
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# Share of walls, slabs and beams in the generated models
+MIX = (0.4, 0.2, 0.4)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def model_path(workdir: str, size: int, materials: int) -> str:
+    path = os.path.join(workdir, f'synthetic_{size}_{materials}.ifc')
+    if not os.path.exists(path):
+        walls, slabs = int(size * MIX[0]), int(size * MIX[1])
+        generate_model(path, walls=walls, slabs=slabs, beams=size - walls - slabs, materials=materials)
+    return path
+
+def run_phases(ifc_file: str, takeoff_only: bool = False) -> list:
+    """Time all phases on one model. Runs in a separate process per size."""
+    from ifc_data import IfcData
+    from shared_resources import SharedResources
+    from table import Table_prim
+
+    ifc_data = IfcData(cache=None, takeoff_only=takeoff_only)
+    resources = SharedResources(ifc_data)
+    # Table_prim reports the total cost to a Text control which is not on a page here
+    resources.set_total_cost_text(SimpleNamespace(value='', update=lambda: None))
+    results = []
+
+    def phase(name, function):
+        started = time.perf_counter()
+        function()
+        results.append({
+            'phase': name,
+            'seconds': time.perf_counter() - started,
+            'peak_rss_mb': peak_rss_mb(),
+        })
+
+    phase('load', lambda: ifc_data.load(ifc_file))
+    phase('material_costs', ifc_data.get_material_costs)
+    phase('element_costs', ifc_data.get_element_costs)
+    materials = list(ifc_data.material_prices)
+
+    def update_prices():
+        for i, material in enumerate(materials):
+            ifc_data.update_material_price(material, float(i))
+    phase('price_update', update_prices)
+    phase('price_catalogue', lambda: ifc_data.update_material_prices({m: 1.0 for m in materials}))
+    phase('table_material', lambda: Table_prim(resources, 'material'))
+    phase('table_element', lambda: Table_prim(resources, 'element'))
+
+    for result in results:
+        result['rows'] = len(ifc_data.df)
+        result['materials'] = len(materials)
+    return results
+
+def compare(results: list, baseline_file: str):
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {(r['size'], r['phase']): r for r in json.load(f)['results']}
+    print(f'\nComparison with {baseline_file}:')
+    print(f'{"size":>9} {"phase":<16} {"before [s]":>11} {"after [s]":>11} {"ratio":>7}')
+    for result in results:
+        before = baseline.get((result['size'], result['phase']))
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] > 0 else float('nan')
+        flag = '  <-- slower' if ratio > 1.2 else ''
+        print(f'{result["size"]:>9} {result["phase"]:<16} {before["seconds"]:>11.4f} '
+              f'{result["seconds"]:>11.4f} {ratio:>7.2f}{flag}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of elements')
+    parser.add_argument('--materials', type=int, default=50, help='number of distinct materials')
+    parser.add_argument('--workdir', help='directory for generated models (kept between runs)')
+    parser.add_argument('--output', help='JSON file for the results')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--takeoff-only', action='store_true', help='load with the takeoff-only reader')
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # Child process: benchmark one model and print the results as JSON
+        print(json.dumps(run_phases(args.single, args.takeoff_only)))
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='kosztorys_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    print(f'{"size":>9} {"phase":<16} {"seconds":>10} {"peak RSS [MB]":>14}')
+    for size in args.sizes:
+        started = time.perf_counter()
+        ifc_file = model_path(workdir, size, args.materials)
+        generation_seconds = time.perf_counter() - started
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--single', ifc_file]
+            + (['--takeoff-only'] if args.takeoff_only else []),
+            capture_output=True, text=True, check=True
+        )
+        for result in json.loads(child.stdout.splitlines()[-1]):
+            result['size'] = size
+            result['generation_seconds'] = generation_seconds
+            results.append(result)
+            rss = f'{result["peak_rss_mb"]:.1f}' if result['peak_rss_mb'] is not None else '-'
+            print(f'{size:>9} {result["phase"]:<16} {result["seconds"]:>10.4f} {rss:>14}')
+
+    report = {
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'materials': args.materials,
+        'takeoff_only': args.takeoff_only,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nResults written to {args.output}')
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
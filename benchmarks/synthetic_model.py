@@ -0,0 +1,167 @@
+"""
+Generator of synthetic IFC models for benchmarks.
+
+The model contains only what the takeoff extraction reads: building
+elements, materials (single materials and layer set usages), type objects,
+quantity sets and property sets. No geometry is written.
+
+Usage:
+    python benchmarks/synthetic_model.py out.ifc --walls 4000 --slabs 2000 --beams 4000 --materials 50
+"""
+import argparse
+import random
+
+import ifcopenshell
+import ifcopenshell.guid
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def generate_model(
+    path: str,
+    walls: int = 400,
+    slabs: int = 200,
+    beams: int = 400,
+    materials: int = 20,
+    layer_sets: bool = True,
+    quantity_sets: bool = True,
+    typed_fraction: float = 0.1,
+    untyped_fraction: float = 0.02,
+    seed: int = 0,
+) -> dict:
+    """
+    Write a synthetic IFC4 model.
+
+    Args:
+        path: Output file.
+        walls, slabs, beams: Number of IfcWall, IfcSlab and IfcBeam elements.
+        materials: Number of distinct materials.
+        layer_sets: Associate walls with IfcMaterialLayerSetUsage instead of
+            plain IfcMaterial.
+        quantity_sets: Write volumes as IfcElementQuantity NetVolume; if
+            False they are written as 'Volume' in an IfcPropertySet.
+        typed_fraction: Share of beams which get their material only through
+            their IfcBeamType (IfcRelDefinesByType).
+        untyped_fraction: Share of beams without any material (default
+            material fallback).
+        seed: Random seed for volumes and material assignment.
+
+    Returns:
+        Dictionary with the number of elements and entities written.
+    """
+    rng = random.Random(seed)
+    f = ifcopenshell.file(schema='IFC4')
+    new_guid = ifcopenshell.guid.new
+
+    f.create_entity('IfcProject', GlobalId=new_guid(), Name='Synthetic model')
+
+    material_entities = [f.create_entity('IfcMaterial', Name=f'Material {i:04d}') for i in range(max(materials, 1))]
+    layer_set_usages = []
+    if layer_sets:
+        for material in material_entities:
+            layer = f.create_entity('IfcMaterialLayer', Material=material, LayerThickness=200.0)
+            layer_set = f.create_entity(
+                'IfcMaterialLayerSet', MaterialLayers=[layer], LayerSetName=f'{material.Name} - 200 mm'
+            )
+            layer_set_usages.append(f.create_entity(
+                'IfcMaterialLayerSetUsage', ForLayerSet=layer_set, LayerSetDirection='AXIS2',
+                DirectionSense='POSITIVE', OffsetFromReferenceLine=0.0
+            ))
+
+    common_psets = {
+        'IfcWall': f.create_entity('IfcPropertySet', GlobalId=new_guid(), Name='Pset_WallCommon', HasProperties=[
+            f.create_entity('IfcPropertySingleValue', Name='IsExternal', NominalValue=f.create_entity('IfcBoolean', True)),
+        ]),
+        'IfcSlab': f.create_entity('IfcPropertySet', GlobalId=new_guid(), Name='Pset_SlabCommon', HasProperties=[
+            f.create_entity('IfcPropertySingleValue', Name='LoadBearing', NominalValue=f.create_entity('IfcBoolean', True)),
+        ]),
+        'IfcBeam': f.create_entity('IfcPropertySet', GlobalId=new_guid(), Name='Pset_BeamCommon', HasProperties=[
+            f.create_entity('IfcPropertySingleValue', Name='Span', NominalValue=f.create_entity('IfcPositiveLengthMeasure', 6000.0)),
+        ]),
+    }
+
+    # material relating entity -> related elements
+    associations = {}
+    typed_beams = {}
+    elements_by_class = {}
+
+    def add_volume(element, volume):
+        if quantity_sets:
+            definition = f.create_entity(
+                'IfcElementQuantity', GlobalId=new_guid(), Name=f'Qto_{element.is_a()[3:]}BaseQuantities',
+                Quantities=[f.create_entity('IfcQuantityVolume', Name='NetVolume', VolumeValue=volume)]
+            )
+        else:
+            definition = f.create_entity(
+                'IfcPropertySet', GlobalId=new_guid(), Name='Pset_Synthetic',
+                HasProperties=[f.create_entity(
+                    'IfcPropertySingleValue', Name='Volume',
+                    NominalValue=f.create_entity('IfcVolumeMeasure', volume)
+                )]
+            )
+        f.create_entity('IfcRelDefinesByProperties', GlobalId=new_guid(), RelatedObjects=[element],
+                        RelatingPropertyDefinition=definition)
+
+    for element_class, count in (('IfcWall', walls), ('IfcSlab', slabs), ('IfcBeam', beams)):
+        elements = elements_by_class.setdefault(element_class, [])
+        for i in range(count):
+            element = f.create_entity(element_class, GlobalId=new_guid(), Name=f'{element_class[3:]} {i}')
+            elements.append(element)
+            add_volume(element, round(rng.uniform(0.01, 20.0), 6))
+
+            material_number = rng.randrange(len(material_entities))
+            if element_class == 'IfcWall' and layer_set_usages:
+                relating = layer_set_usages[material_number]
+            else:
+                relating = material_entities[material_number]
+
+            if element_class == 'IfcBeam':
+                draw = rng.random()
+                if draw < untyped_fraction:
+                    continue
+                if draw < untyped_fraction + typed_fraction:
+                    typed_beams.setdefault(material_number, []).append(element)
+                    continue
+            associations.setdefault(relating, []).append(element)
+
+    for beam_type_number, (material_number, beams_of_type) in enumerate(sorted(typed_beams.items())):
+        beam_type = f.create_entity('IfcBeamType', GlobalId=new_guid(), Name=f'Beam type {beam_type_number}',
+                                    PredefinedType='BEAM')
+        associations.setdefault(material_entities[material_number], []).append(beam_type)
+        f.create_entity('IfcRelDefinesByType', GlobalId=new_guid(), RelatedObjects=beams_of_type,
+                        RelatingType=beam_type)
+
+    for relating, related in associations.items():
+        # Split very large relationships like authoring tools usually do
+        for chunk in _chunks(related, 10000):
+            f.create_entity('IfcRelAssociatesMaterial', GlobalId=new_guid(), RelatedObjects=chunk,
+                            RelatingMaterial=relating)
+
+    for element_class, elements in elements_by_class.items():
+        for chunk in _chunks(elements, 10000):
+            f.create_entity('IfcRelDefinesByProperties', GlobalId=new_guid(), RelatedObjects=chunk,
+                            RelatingPropertyDefinition=common_psets[element_class])
+
+    f.write(path)
+    return {'elements': walls + slabs + beams, 'entities': len(f.by_type('IfcRoot'))}
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic IFC model.')
+    parser.add_argument('path')
+    parser.add_argument('--walls', type=int, default=400)
+    parser.add_argument('--slabs', type=int, default=200)
+    parser.add_argument('--beams', type=int, default=400)
+    parser.add_argument('--materials', type=int, default=20)
+    parser.add_argument('--no-layer-sets', action='store_true')
+    parser.add_argument('--no-quantity-sets', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    info = generate_model(
+        args.path, walls=args.walls, slabs=args.slabs, beams=args.beams, materials=args.materials,
+        layer_sets=not args.no_layer_sets, quantity_sets=not args.no_quantity_sets, seed=args.seed,
+    )
+    print(f"Wrote {info['elements']} elements to {args.path}")
+
+if __name__ == '__main__':
+    main()
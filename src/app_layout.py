@@ -77,11 +77,17 @@ class AppLayout:
 
         self.page.appbar = app_bar
         self.body = Body()
-        SharedResources.set_body(self.body)
+        # every session has its own data, see SharedResources
+        self.resources = SharedResources()
+        self.resources.set_body(self.body)
+        self.controls_column = ControlsColumn(
+            self.page, self.body, self.resources, width=self.page.width * self.NAV_BAR_PROPORTION
+        )
+        self.page.on_close = lambda e: self.close()
         
         main_row = Row(
             [
-                ControlsColumn(self.page, self.body, width=self.page.width * self.NAV_BAR_PROPORTION),
+                self.controls_column,
                 Container(width=1, bgcolor=Colors.SURFACE_TINT),
                 self.body
             ],
@@ -91,4 +97,9 @@ class AppLayout:
         
         self.page.add(main_row)        
         
-        self.page.update()
\ No newline at end of file
+        self.page.update()
+        
+    def close(self):
+        """Called when the session ends; releases the session's model."""
+        self.controls_column.close()
+        self.resources.close()
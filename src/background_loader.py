@@ -0,0 +1,75 @@
+import threading
+
+from ifc_data import IfcData, LoadCancelled
+
+class BackgroundLoader:
+    """
+    Loads IFC files into a session's IfcData on a background thread.
+
+    The previously loaded model stays usable while the new one is being
+    extracted; IfcData swaps the new takeoff in only once it is complete.
+    All callbacks are called from the loading thread.
+
+    Cancelling takes effect at the next check in IfcData.load_models, i.e. between
+    loading stages and every IfcData.PROGRESS_INTERVAL extracted rows; a
+    running ifcopenshell parse is finished first and its result discarded.
+    """
+
+    def __init__(self, ifc_data: IfcData, on_progress=None, on_loaded=None, on_error=None, on_cancelled=None):
+        """
+        Args:
+            ifc_data: IfcData the files are loaded into.
+            on_progress: Called with (stage, done, total), see IfcData.load.
+            on_loaded: Called with the file path(s) once the models are loaded.
+            on_error: Called with the exception if loading fails.
+            on_cancelled: Called with the file path(s) if the load was cancelled.
+        """
+        self.ifc_data = ifc_data
+        self.on_progress = on_progress
+        self.on_loaded = on_loaded
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self.__cancel = threading.Event()
+        self.__thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self, ifc_files, replace: bool = True):
+        """
+        Start loading files; a load still in progress is cancelled.
+
+        Args:
+            ifc_files: Path to an IFC file, or a list of paths to load
+                together with IfcData.load_models.
+            replace: Unload the models which are not loaded now; otherwise
+                the files are added to the loaded models.
+        """
+        self.cancel()
+        # Every load gets its own event so cancelling it cannot stop a later one
+        self.__cancel = threading.Event()
+        self.__thread = threading.Thread(
+            target=self.__run, args=(ifc_files, replace, self.__cancel), name='BackgroundLoader', daemon=True
+        )
+        self.__thread.start()
+
+    def cancel(self):
+        self.__cancel.set()
+
+    def __run(self, ifc_files, replace: bool, cancel: threading.Event):
+        try:
+            self.ifc_data.load_models(
+                [ifc_files] if isinstance(ifc_files, str) else ifc_files,
+                progress=self.on_progress, cancelled=cancel.is_set, replace=replace
+            )
+        except LoadCancelled:
+            if self.on_cancelled:
+                self.on_cancelled(ifc_files)
+            return
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            return
+        if self.on_loaded:
+            self.on_loaded(ifc_files)
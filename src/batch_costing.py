@@ -0,0 +1,284 @@
+"""
+Headless batch costing of many IFC files.
+
+Every file is loaded with IfcData in a pool of worker processes, priced
+with a material price catalogue and reported per file and combined.
+
+Usage:
+    python src/batch_costing.py models/*.ifc --prices prices.csv --output reports
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from ifc_data import IfcData
+
+FORMATS = ('csv', 'parquet')
+
+# Columns of the per-file cost frames, also when a file has no takeoff rows
+MATERIAL_COLUMNS = {'material': 'str', 'volume': 'float64', 'price': 'float64', 'cost': 'float64'}
+ELEMENT_COLUMNS = {'element': 'str', 'cost': 'float64', 'volume': 'float64'}
+
+def read_price_catalogue(path: str) -> dict:
+    """
+    Read a price catalogue with 'material' and 'price' columns (CSV, or
+    Parquet for .parquet files).
+
+    Returns:
+        Mapping of material name -> unit price.
+    """
+    if path.lower().endswith('.parquet'):
+        catalogue = pd.read_parquet(path)
+    else:
+        catalogue = pd.read_csv(path)
+    missing = {'material', 'price'} - set(catalogue.columns)
+    if missing:
+        raise ValueError(f'Price catalogue {path} is missing columns: {sorted(missing)}')
+    prices = catalogue['price'].astype(float)
+    invalid = catalogue.loc[~np.isfinite(prices), 'material'].astype(str).tolist()
+    if invalid:
+        raise ValueError(f'Price catalogue {path} has no valid price for: {invalid}')
+    return dict(zip(catalogue['material'].astype(str), prices))
+
+def _init_worker(prices: dict, use_cache: bool, takeoff_only: bool = False, geometry_volumes: bool = False):
+    if not use_cache:
+        IfcData.cache = None
+    IfcData.takeoff_only = takeoff_only
+    IfcData.geometry_volumes = geometry_volumes
+    # Files are already costed in parallel, one meshing thread per file
+    IfcData.geometry_threads = 1
+    global _prices
+    _prices = prices
+
+# Price catalogue of the worker process, set by _init_worker
+_prices = {}
+
+def _empty_costs(columns: dict) -> pd.DataFrame:
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in columns.items()})
+
+def cost_file(ifc_file: str) -> dict:
+    """
+    Load one IFC file and compute its costs. Runs in a worker process.
+
+    Returns:
+        Dictionary with the file, status ('ok' or 'error'), the error message,
+        the material and element cost frames, row count and timing.
+    """
+    started = time.perf_counter()
+    ifc_data = IfcData()
+    ifc_data.update_material_prices(_prices)
+    try:
+        ifc_data.load(ifc_file)
+        # IfcData returns frames without columns for an empty takeoff
+        empty = ifc_data.df.empty
+        return {
+            'file': ifc_file,
+            'status': 'ok',
+            'error': '',
+            'materials': _empty_costs(MATERIAL_COLUMNS) if empty else ifc_data.get_material_costs().copy(),
+            'elements': _empty_costs(ELEMENT_COLUMNS) if empty else ifc_data.get_element_costs().copy(),
+            'rows': len(ifc_data.df),
+            'total_cost': ifc_data.get_total_cost(),
+            'cached': ifc_data.load_stats.get('cached', False),
+            'seconds': time.perf_counter() - started,
+        }
+    except Exception as e:
+        return _error_result(ifc_file, e, time.perf_counter() - started)
+    finally:
+        # The worker costs many files, do not keep the takeoff alive
+        ifc_data.close()
+
+def _error_result(ifc_file: str, error: BaseException, seconds: float = 0.0) -> dict:
+    """cost_file result of a file that could not be costed."""
+    return {
+        'file': ifc_file,
+        'status': 'error',
+        'error': f'{type(error).__name__}: {error}',
+        'materials': _empty_costs(MATERIAL_COLUMNS),
+        'elements': _empty_costs(ELEMENT_COLUMNS),
+        'rows': 0,
+        'total_cost': 0.0,
+        'cached': False,
+        'seconds': seconds,
+    }
+
+def _cost_files(files, workers: int, initargs: tuple):
+    """
+    Cost files in worker processes, yielding (position, result) tuples in
+    completion order.
+
+    A worker process that dies (e.g. crashes in ifcopenshell or is killed
+    for lack of memory) breaks its pool and fails every file in flight. At
+    most `workers` files are submitted at a time, so only these are in
+    flight; the remaining files go to a fresh pool and the files in flight
+    are costed again one per pool, which records only the file breaking
+    the pool as failed.
+    """
+    workers = workers or os.cpu_count() or 1
+    queue = deque(enumerate(files))
+    suspects = deque()
+    while queue or suspects:
+        alone = not queue
+        batch = deque([suspects.popleft()]) if alone else queue
+        broken = False
+        with ProcessPoolExecutor(max_workers=1 if alone else workers, initializer=_init_worker,
+                                 initargs=initargs) as executor:
+            running = {}
+            while running or (batch and not broken):
+                while batch and not broken and len(running) < workers:
+                    position, ifc_file = batch.popleft()
+                    try:
+                        running[executor.submit(cost_file, ifc_file)] = position, ifc_file
+                    except BrokenProcessPool:
+                        batch.appendleft((position, ifc_file))
+                        broken = True
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position, ifc_file = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if not alone:
+                            suspects.append((position, ifc_file))
+                            continue
+                        result = _error_result(ifc_file, e)
+                    except Exception as e:
+                        result = _error_result(ifc_file, e)
+                    yield position, result
+
+def write_report(df: pd.DataFrame, output_dir: str, name: str, formats):
+    for fmt in formats:
+        path = os.path.join(output_dir, f'{name}.{fmt}')
+        if fmt == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+
+def _report_names(files):
+    """Map every file to a unique report name based on its file name."""
+    names = {}
+    used = set()
+    for ifc_file in files:
+        stem = os.path.splitext(os.path.basename(ifc_file))[0]
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f'{stem}_{n}'
+        used.add(name)
+        names[ifc_file] = name
+    return names
+
+def _check_formats(formats):
+    if 'parquet' in formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit('Parquet output requires pyarrow: pip install pyarrow')
+
+def run_batch(files, prices: dict, output_dir: str, workers: int = None, formats=('csv',), use_cache: bool = True,
+              takeoff_only: bool = False, geometry_volumes: bool = False) -> dict:
+    """
+    Cost many IFC files concurrently and write the reports.
+
+    A failing file, including one whose worker process dies, is recorded in
+    the summary and does not abort the batch.
+
+    Returns:
+        Dictionary with the per-file 'summary' frame, the number of
+        'failed' files and the throughput figures.
+    """
+    files = list(files)
+    os.makedirs(output_dir, exist_ok=True)
+    names = _report_names(files)
+    started = time.perf_counter()
+    results = []
+    for position, result in _cost_files(files, workers, (prices, use_cache, takeoff_only, geometry_volumes)):
+        result['position'] = position
+        results.append(result)
+        if result['status'] == 'ok':
+            name = names[result['file']]
+            write_report(result['materials'], output_dir, f'{name}_materials', formats)
+            write_report(result['elements'], output_dir, f'{name}_elements', formats)
+            print(f"[ok]    {result['file']}: {result['rows']} elements, cost {result['total_cost']:.2f} "
+                  f"({result['seconds']:.2f} s)")
+        else:
+            print(f"[error] {result['file']}: {result['error']}", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    # Keep the order of the input files in the combined reports
+    results.sort(key=lambda result: result['position'])
+    succeeded = [result for result in results if result['status'] == 'ok']
+
+    if succeeded:
+        materials = pd.concat(
+            [result['materials'].assign(file=result['file']) for result in succeeded], ignore_index=True
+        )
+        elements = pd.concat(
+            [result['elements'].assign(file=result['file']) for result in succeeded], ignore_index=True
+        )
+        write_report(materials, output_dir, 'combined_materials_by_file', formats)
+        write_report(elements, output_dir, 'combined_elements_by_file', formats)
+        write_report(
+            materials.groupby('material', as_index=False).agg({'volume': 'sum', 'price': 'first', 'cost': 'sum'}),
+            output_dir, 'combined_materials', formats
+        )
+        write_report(
+            elements.groupby('element', as_index=False).agg({'cost': 'sum', 'volume': 'sum'}),
+            output_dir, 'combined_elements', formats
+        )
+
+    summary = pd.DataFrame([
+        {key: result[key] for key in ('file', 'status', 'error', 'rows', 'total_cost', 'cached', 'seconds')}
+        for result in results
+    ])
+    write_report(summary, output_dir, 'summary', formats)
+
+    total_rows = sum(result['rows'] for result in succeeded)
+    return {
+        'summary': summary,
+        'failed': len(results) - len(succeeded),
+        'files': len(results),
+        'seconds': elapsed,
+        'files_per_minute': len(results) / elapsed * 60 if elapsed > 0 else 0.0,
+        'elements_per_second': total_rows / elapsed if elapsed > 0 else 0.0,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Cost many IFC files without the GUI.')
+    parser.add_argument('files', nargs='+', help='IFC files to cost')
+    parser.add_argument('--prices', help='price catalogue (CSV or Parquet) with material and price columns')
+    parser.add_argument('--output', default='reports', help='directory for the reports (default: reports)')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--format', dest='formats', nargs='+', choices=FORMATS, default=['csv'],
+                        help='report formats (default: csv)')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the takeoff cache')
+    parser.add_argument('--takeoff-only', action='store_true',
+                        help='read only the entities the takeoff needs instead of the full model (less memory)')
+    parser.add_argument('--geometry-volumes', action='store_true',
+                        help='compute volumes of elements without volume quantities from their geometry')
+    args = parser.parse_args(argv)
+
+    _check_formats(args.formats)
+    prices = read_price_catalogue(args.prices) if args.prices else {}
+    result = run_batch(
+        args.files, prices, args.output,
+        workers=args.workers, formats=args.formats, use_cache=not args.no_cache,
+        takeoff_only=args.takeoff_only, geometry_volumes=args.geometry_volumes
+    )
+    print(f"\n{result['files']} files in {result['seconds']:.1f} s: "
+          f"{result['files_per_minute']:.1f} files/min, {result['elements_per_second']:.0f} elements/s, "
+          f"{result['failed']} failed")
+    return 1 if result['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import threading
+
+from pie_chart import NativePieChart, PieChart
+
+class ChartScheduler:
+    """
+    Coalesces chart refreshes requested while prices are being edited.
+
+    Every request restarts a timer; the chart shown in the body is updated
+    only once no request came for DELAY seconds. The chart is rendered on
+    the timer thread, so typing in the table is not blocked by it. Native
+    charts update their wedges in place, matplotlib charts are rebuilt.
+    Each session has its own scheduler, see SharedResources.
+    """
+    DELAY = 0.3
+
+    def __init__(self, resources):
+        """
+        Args:
+            resources: SharedResources of the session.
+        """
+        self.resources = resources
+        self.__timer = None
+        self.__lock = threading.Lock()
+
+    def schedule(self, delay: float = None):
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+            self.__timer = threading.Timer(self.DELAY if delay is None else delay, self.__refresh)
+            self.__timer.daemon = True
+            self.__timer.start()
+
+    def cancel(self):
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+    def __refresh(self):
+        body = self.resources.get_body()
+        chart = body.get_control('right')
+        if isinstance(chart, NativePieChart):
+            try:
+                chart.refresh()
+            except ValueError:
+                # e.g. all prices are 0, keep the last chart
+                pass
+            return
+        if not isinstance(chart, PieChart):
+            return
+        try:
+            new_chart = PieChart(chart.ifc_data, chart.type, chart.type_attr)
+        except ValueError:
+            # e.g. all prices are 0, keep the last chart
+            return
+        # The chart may have been replaced or hidden while rendering
+        if body.get_control('right') is chart:
+            body.add_content(new_chart, side='right')
@@ -11,56 +11,98 @@ from flet import (
     Text,
     TextButton,
     Dropdown,
-    dropdown
+    dropdown,
+    Checkbox,
+    SnackBar,
+    ProgressBar
 )
 from table import Table
 from body import Body
-from ifc_data import IfcData
-from pie_chart import PieChart
+from pie_chart import PieChart, create_pie_chart
 from shared_resources import SharedResources
+from model_watcher import ModelWatcher
+from background_loader import BackgroundLoader
+from diagnostics_panel import DiagnosticsDialog
 
 class ControlsColumn(Container):
-    def __init__(self, page: Page, body: Body, width: int = None):
+    LOAD_STAGE_LABELS = {
+        'cache': "Sprawdzanie pamięci podręcznej",
+        'parse': "Parsowanie pliku IFC",
+        'extract': "Wyodrębnianie elementów",
+        'models': "Wczytywanie modeli",
+    }
+    # model dropdown option showing all loaded models
+    ALL_MODELS = "all"
+    
+    def __init__(self, page: Page, body: Body, resources: SharedResources, width: int = None):
         self.page = page
         super().__init__()
         
         self.width = width
         self.body = body
+        # session state: IfcData, total cost text and chart scheduler
+        self.resources = resources
+        self.ifc_data = resources.ifc_data
         
         self.data_loaded = False    
         self.added_pieChart = False
         self.added_table = False
         
         self.total_cost_text = Text("Suma kosztów: 0.00")
-        SharedResources.set_total_cost_text(self.total_cost_text)
+        resources.set_total_cost_text(self.total_cost_text)
         
-        # file picker for IFC file
+        # file picker for IFC files, the models are loaded in the background;
+        # picked files replace the loaded models or are added to them
+        self.replace_models = True
         def pick_file_result(e: FilePickerResultEvent):
             if e.files:
-                try:
-                    IfcData.load(e.files[0].path)
-                    self.data_loaded = True
-                    self.body.add_content(Table())
-                    self.added_table = True
-                    self.__refresh_toggle_button_label(True)
-                    # Set "No chart" option in Dropdown
-                    self.show_pie_chart_dropdown.value = "none"
-                    self.show_pie_chart_dropdown.update()
-                    self.__show_pie_chart(None)
-                except Exception as e:
-                    self.__display_alert("Błąd wczytywania pliku", str(e))
-                    self.data_loaded = False
-                    self.body.delete_content('left')
+                self.__set_loading(True)
+                self.loader.start([file.path for file in e.files], replace=self.replace_models)
                 
+        self.loader = BackgroundLoader(
+            self.ifc_data,
+            on_progress=self.__on_load_progress,
+            on_loaded=self.__on_model_loaded,
+            on_error=self.__on_load_error,
+            on_cancelled=lambda ifc_files: self.__set_loading(False),
+        )
                 
         self.file_picker = FilePicker(on_result=pick_file_result)
         page.overlay.append(self.file_picker)
         
         self.load_ifc_data_button = ElevatedButton(
-            "Wczytaj model IFC", on_click=self.__on_click_load_ifc_data,
+            "Wczytaj modele IFC", on_click=self.__on_click_load_ifc_data,
             icon='upload'
         )
         
+        # federated models, e.g. architecture, structure and MEP of one project
+        self.add_model_button = ElevatedButton(
+            "Dodaj model IFC", on_click=self.__on_click_add_model,
+            icon='add'
+        )
+        self.model_dropdown = Dropdown(
+            label="Model",
+            options=[dropdown.Option(self.ALL_MODELS, "Wszystkie modele")],
+            value=self.ALL_MODELS,
+            on_change=self.__on_model_selected
+        )
+        self.unload_model_button = ElevatedButton(
+            "Usuń model", on_click=self.__on_click_unload_model,
+            icon='delete', disabled=True
+        )
+        
+        self.load_progress_bar = ProgressBar(value=None)
+        self.load_status_text = Text("")
+        self.cancel_load_button = ElevatedButton(
+            "Anuluj wczytywanie", on_click=lambda e: self.loader.cancel(),
+            icon='cancel'
+        )
+        self.load_progress_column = Column(
+            [self.load_status_text, self.load_progress_bar, self.cancel_load_button],
+            horizontal_alignment="center",
+            visible=False
+        )
+        
         self.toggle_table_button = ElevatedButton(
             "Pokaż tabelę", on_click=self.__toggle_table_visibility,
             icon='table_chart'
@@ -77,17 +119,76 @@ class ControlsColumn(Container):
                 dropdown.Option("material_cost", "Wykres kosztów materiałów"),
                 dropdown.Option("element_cost", "Wykres kosztów elementów"),
                 dropdown.Option("material_volume", "Wykres objętości materiałów"),
-                dropdown.Option("element_volume", "Wykres objętości elementów")
+                dropdown.Option("element_volume", "Wykres objętości elementów"),
+                dropdown.Option("model_cost", "Wykres kosztów modeli"),
+                dropdown.Option("model_volume", "Wykres objętości modeli")
             ],
             value="none",
             on_change=self.__show_pie_chart
         )
         
+        self.chart_backend_dropdown = Dropdown(
+            label="Rysowanie wykresu",
+            options=[
+                dropdown.Option("native", "Natywny (Flet)"),
+                dropdown.Option("matplotlib", "Matplotlib (SVG)"),
+            ],
+            value="native",
+            on_change=self.__show_pie_chart
+        )
+        
+        # the chart is exported with matplotlib whichever backend shows it
+        self.export_chart_picker = FilePicker(on_result=self.__on_export_chart_result)
+        page.overlay.append(self.export_chart_picker)
+        self.export_chart_button = ElevatedButton(
+            "Eksportuj wykres", on_click=self.__on_click_export_chart,
+            icon='image'
+        )
+        
+        # reload a model automatically when its IFC file changes on disk
+        self.watcher = ModelWatcher(
+            self.ifc_data,
+            on_reload=self.__on_model_reloaded,
+            on_error=lambda e: self.__display_alert("Błąd przeładowania pliku", str(e))
+        )
+        self.watch_file_checkbox = Checkbox(
+            label="Obserwuj zmiany plików", value=False,
+            on_change=self.__toggle_file_watch
+        )
+        
+        # read only the entities the takeoff needs, for large models
+        self.takeoff_only_checkbox = Checkbox(
+            label="Oszczędzaj pamięć (tylko zestawienie)", value=self.ifc_data.takeoff_only,
+            on_change=self.__toggle_takeoff_only
+        )
+        
+        # compute missing volumes from the element geometry
+        self.geometry_volumes_checkbox = Checkbox(
+            label="Objętość z geometrii, gdy brak ilości", value=self.ifc_data.geometry_volumes,
+            on_change=self.__toggle_geometry_volumes
+        )
+        
+        self.diagnostics_dialog = DiagnosticsDialog(page, self.ifc_data)
+        self.diagnostics_button = ElevatedButton(
+            "Diagnostyka", on_click=self.__show_diagnostics,
+            icon='insights'
+        )
+        
         controls = [
             self.load_ifc_data_button,
+            self.add_model_button,
+            self.load_progress_column,
+            self.model_dropdown,
+            self.unload_model_button,
             self.toggle_table_button,
             self.change_table_type_button,
             self.show_pie_chart_dropdown,
+            self.chart_backend_dropdown,
+            self.export_chart_button,
+            self.watch_file_checkbox,
+            self.takeoff_only_checkbox,
+            self.geometry_volumes_checkbox,
+            self.diagnostics_button,
             self.total_cost_text,
         ]
         
@@ -106,12 +207,111 @@ class ControlsColumn(Container):
         )
         
         
+    def close(self):
+        # stop background work of the session, see AppLayout.close
+        self.watcher.stop()
+        self.loader.cancel()
+        
     def __on_click_load_ifc_data(self, e):
+        self.replace_models = True
         self.file_picker.pick_files(
-            allow_multiple=False,
+            allow_multiple=True,
             allowed_extensions=['ifc'],
-            dialog_title='Wybierz plik IFC'
+            dialog_title='Wybierz pliki IFC'
         )
+        
+    def __on_click_add_model(self, e):
+        # a file named like a loaded model replaces only that model
+        self.replace_models = False
+        self.file_picker.pick_files(
+            allow_multiple=True,
+            allowed_extensions=['ifc'],
+            dialog_title='Wybierz pliki IFC do dodania'
+        )
+            
+    def __set_loading(self, loading: bool):
+        self.load_ifc_data_button.disabled = loading
+        self.add_model_button.disabled = loading
+        self.unload_model_button.disabled = loading or self.__selected_model() is None
+        self.load_progress_column.visible = loading
+        self.load_progress_bar.value = None
+        self.load_status_text.value = ""
+        self.load_ifc_data_button.update()
+        self.add_model_button.update()
+        self.unload_model_button.update()
+        self.load_progress_column.update()
+        
+    def __selected_model(self):
+        # None shows all loaded models
+        value = self.model_dropdown.value
+        return None if value == self.ALL_MODELS else value
+        
+    def __table(self, type: str = "material") -> Table:
+        return Table(self.resources, type, self.__selected_model())
+        
+    def __refresh_model_dropdown(self):
+        names = list(self.ifc_data.model_files)
+        self.model_dropdown.options = [dropdown.Option(self.ALL_MODELS, "Wszystkie modele")] + [
+            dropdown.Option(name) for name in names
+        ]
+        if self.model_dropdown.value not in names:
+            self.model_dropdown.value = self.ALL_MODELS
+        self.unload_model_button.disabled = self.__selected_model() is None
+        self.model_dropdown.update()
+        self.unload_model_button.update()
+        
+    def __on_model_selected(self, e):
+        self.unload_model_button.disabled = self.__selected_model() is None
+        self.unload_model_button.update()
+        self.__refresh_table()
+        
+    def __refresh_table(self):
+        if self.added_table:
+            current_table = self.body.get_control('left')
+            table_type = current_table.table.type if isinstance(current_table, Table) else "material"
+            self.body.add_content(self.__table(table_type))
+        else:
+            self.resources.update_total_cost()
+        
+    def __on_click_unload_model(self, e):
+        name = self.__selected_model()
+        if name is None or name not in self.ifc_data.model_files:
+            return
+        self.ifc_data.unload_model(name)
+        self.data_loaded = bool(self.ifc_data.model_files)
+        self.__refresh_model_dropdown()
+        self.__refresh_table()
+        if self.added_pieChart:
+            self.__show_pie_chart(None)
+        
+    def __on_load_progress(self, stage: str, done: int, total: int):
+        # called from the loader thread
+        label = self.LOAD_STAGE_LABELS.get(stage, stage)
+        if total:
+            self.load_progress_bar.value = min(done / total, 1.0)
+            self.load_status_text.value = f"{label}: {done} / {total}"
+        else:
+            self.load_progress_bar.value = None
+            self.load_status_text.value = f"{label}..."
+        self.load_progress_column.update()
+        
+    def __on_model_loaded(self, ifc_files):
+        # called from the loader thread once IfcData holds the new models
+        self.__refresh_model_dropdown()
+        self.__set_loading(False)
+        self.data_loaded = True
+        self.body.add_content(self.__table())
+        self.added_table = True
+        self.__refresh_toggle_button_label(True)
+        # Set "No chart" option in Dropdown
+        self.show_pie_chart_dropdown.value = "none"
+        self.show_pie_chart_dropdown.update()
+        self.__show_pie_chart(None)
+        
+    def __on_load_error(self, e: Exception):
+        # the previously loaded model is kept by IfcData
+        self.__set_loading(False)
+        self.__display_alert("Błąd wczytywania pliku", str(e))
             
     def __display_alert(self, title: str, message: str):
         dlg = AlertDialog(
@@ -144,10 +344,10 @@ class ControlsColumn(Container):
             self.added_table = False
             self.__refresh_toggle_button_label(False)
         else:
-            self.body.add_content(Table())
+            self.body.add_content(self.__table())
             self.added_table = True
             self.__refresh_toggle_button_label(True)
-            SharedResources.update_total_cost(IfcData.get_total_cost())
+            self.resources.update_total_cost()
             
     def __change_table_type(self, e):
         if not self.added_table:
@@ -157,11 +357,59 @@ class ControlsColumn(Container):
         if isinstance(current_table, Table):
             new_type = "element" if current_table.table.type == "material" else "material"
             self.body.delete_content('left', auto_update=False)
-            self.body.add_content(Table(new_type), auto_update=False)
+            self.body.add_content(self.__table(new_type), auto_update=False)
             self.body.update()
             self.change_table_type_button.text = "Pokaż tabelę materiałów" if new_type == "element" else "Pokaż tabelę elementów"
             self.change_table_type_button.update()
             
+    def __show_diagnostics(self, e):
+        self.diagnostics_dialog.refresh(auto_update=False)
+        self.page.open(self.diagnostics_dialog)
+            
+    def __toggle_file_watch(self, e):
+        if self.watch_file_checkbox.value:
+            self.watcher.start()
+        else:
+            self.watcher.stop()
+            
+    def __toggle_takeoff_only(self, e):
+        # applies to the next load
+        self.ifc_data.takeoff_only = self.takeoff_only_checkbox.value
+            
+    def __toggle_geometry_volumes(self, e):
+        # applies to the next load
+        self.ifc_data.geometry_volumes = self.geometry_volumes_checkbox.value
+            
+    def __on_model_reloaded(self, changes: dict):
+        # called from the watcher thread after IfcData.reload
+        self.__refresh_table()
+        if self.added_pieChart:
+            self.__show_pie_chart(None)
+        message = (
+            f"Model zaktualizowany: dodano {changes['added']}, usunięto {changes['removed']}, "
+            f"zmieniono {changes['changed']} elementów, zmiana kosztu: {changes['cost_delta']:+.2f}"
+        )
+        self.page.open(SnackBar(Text(message)))
+            
+    def __on_click_export_chart(self, e):
+        if not self.added_pieChart:
+            self.__display_alert("Brak wykresu", "Wybierz wykres przed eksportem.")
+            return
+        self.export_chart_picker.save_file(
+            dialog_title="Eksportuj wykres",
+            file_name="wykres.png",
+            allowed_extensions=['png', 'svg', 'pdf'],
+        )
+        
+    def __on_export_chart_result(self, e: FilePickerResultEvent):
+        if not e.path:
+            return
+        type, type_attr = self.show_pie_chart_dropdown.value.split('_')
+        try:
+            PieChart.export(self.ifc_data, e.path, type, type_attr)
+        except (OSError, ValueError) as error:
+            self.__display_alert("Błąd eksportu wykresu", str(error))
+            
     def __show_pie_chart(self, e):
         selected_option = self.show_pie_chart_dropdown.value
         if selected_option == "none":
@@ -169,11 +417,12 @@ class ControlsColumn(Container):
             self.added_pieChart = False
         else:
             type, type_attr = selected_option.split('_')
-            if IfcData.can_create_pie_chart(type, type_attr):
-                self.body.add_content(PieChart(type, type_attr), side='right')
+            if self.ifc_data.can_create_pie_chart(type, type_attr):
+                chart = create_pie_chart(self.ifc_data, type, type_attr, self.chart_backend_dropdown.value)
+                self.body.add_content(chart, side='right')
                 self.added_pieChart = True
             else:
-                info = IfcData.get_pie_chart_error_message(type, type_attr)
+                info = self.ifc_data.get_pie_chart_error_message(type, type_attr)
                 self.__display_alert("Błąd wykresu", info)
                 self.show_pie_chart_dropdown.value = "none"
                 self.show_pie_chart_dropdown.update()
@@ -0,0 +1,108 @@
+from flet import (
+    AlertDialog,
+    Column,
+    DataCell,
+    DataColumn,
+    DataRow,
+    DataTable,
+    FilePicker,
+    FilePickerResultEvent,
+    Page,
+    Switch,
+    Text,
+    TextButton,
+)
+from ifc_data import IfcData
+from instrumentation import Instrumentation
+
+class DiagnosticsDialog(AlertDialog):
+    def __init__(self, page: Page, ifc_data: IfcData):
+        super().__init__()
+        self.page = page
+        self.ifc_data = ifc_data
+        self.title = Text("Diagnostyka")
+
+        self.enabled_switch = Switch(
+            label="Pomiary włączone", value=Instrumentation.enabled,
+            on_change=self.__on_toggle_enabled
+        )
+        self.spans_table = DataTable(
+            columns=[
+                DataColumn(Text("Etap")),
+                DataColumn(Text("Wywołania"), numeric=True),
+                DataColumn(Text("Ostatnio [ms]"), numeric=True),
+                DataColumn(Text("Łącznie [ms]"), numeric=True),
+            ]
+        )
+        self.counters_table = DataTable(
+            columns=[
+                DataColumn(Text("Licznik")),
+                DataColumn(Text("Wartość"), numeric=True),
+            ]
+        )
+        self.summary_text = Text()
+
+        self.export_picker = FilePicker(on_result=self.__on_export_result)
+        page.overlay.append(self.export_picker)
+
+        self.content = Column(
+            [self.enabled_switch, self.summary_text, self.spans_table, self.counters_table],
+            scroll="auto",
+            width=700,
+        )
+        self.actions = [
+            TextButton("Odśwież", on_click=lambda e: self.refresh()),
+            TextButton("Wyczyść", on_click=self.__on_reset),
+            TextButton("Eksportuj JSON", on_click=self.__on_export),
+            TextButton("Zamknij", on_click=lambda e: self.page.close(self)),
+        ]
+        self.refresh(auto_update=False)
+
+    def refresh(self, auto_update=True):
+        data = Instrumentation.to_dict()
+        self.spans_table.rows = [
+            DataRow(cells=[
+                DataCell(Text(path)),
+                DataCell(Text(str(record['calls']))),
+                DataCell(Text(f"{record['last_seconds'] * 1000:.1f}")),
+                DataCell(Text(f"{record['total_seconds'] * 1000:.1f}")),
+            ])
+            for path, record in data['spans'].items()
+        ]
+        self.counters_table.rows = [
+            DataRow(cells=[DataCell(Text(name)), DataCell(Text(str(value)))])
+            for name, value in data['counters'].items()
+        ]
+        report = self.ifc_data.memory_report()
+        shared = IfcData.takeoffs.stats()
+        parser = (
+            f", proces parsera: {report['parser_bytes'] / 1024 / 1024:.1f} MB"
+            if report['parser_bytes'] is not None else ""
+        )
+        self.summary_text.value = (
+            f"Elementy w zestawieniu: {len(self.ifc_data.df)}, "
+            f"pamięć zestawienia: {report['takeoff'] / 1024 / 1024:.2f} MB, "
+            f"modele IFC w pamięci: {report['models']} ({report['model_bytes'] / 1024 / 1024:.1f} MB, "
+            f"wszystkie sesje: {report['all_model_bytes'] / 1024 / 1024:.1f} MB){parser}, "
+            f"wspólne zestawienia: {shared['takeoffs']} (sesje: {shared['references']})"
+        )
+        if auto_update:
+            self.update()
+
+    def __on_toggle_enabled(self, e):
+        Instrumentation.set_enabled(self.enabled_switch.value)
+
+    def __on_reset(self, e):
+        Instrumentation.reset()
+        self.refresh()
+
+    def __on_export(self, e):
+        self.export_picker.save_file(
+            dialog_title="Zapisz pomiary",
+            file_name="diagnostyka.json",
+            allowed_extensions=['json'],
+        )
+
+    def __on_export_result(self, e: FilePickerResultEvent):
+        if e.path:
+            Instrumentation.export_json(e.path)
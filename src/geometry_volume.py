@@ -0,0 +1,268 @@
+import os
+import tempfile
+import uuid
+import zipfile
+
+import numpy as np
+
+from instrumentation import Instrumentation
+from takeoff_cache import TakeoffCache, default_cache_dir
+
+def _is_unscaled(operator) -> bool:
+    scales = [operator.Scale]
+    if operator.is_a('IfcCartesianTransformationOperator3DnonUniform'):
+        scales += [operator.Scale2, operator.Scale3]
+    return all(scale is None or scale == 1.0 for scale in scales)
+
+def geometry_key(element):
+    """
+    Key of the body geometry of an element: elements with the same key have
+    the same volume, so only one of them has to be meshed.
+
+    Bodies consisting only of unscaled IfcMappedItems are keyed by their
+    IfcRepresentationMaps, since the placement does not change the volume.
+    Other bodies are keyed by the shape representation, which may be
+    shared by several elements as well. Openings cut into an element are
+    part of its key, since elements sharing a body but not their openings
+    have different volumes.
+
+    Returns:
+        Hashable key, or None if the element has no body representation
+        (e.g. type objects, which get materials associated as well).
+    """
+    if not element.is_a('IfcProduct') or element.Representation is None:
+        return None
+    openings = ()
+    if element.is_a('IfcElement') and element.HasOpenings:
+        openings = tuple(sorted(rel.RelatedOpeningElement.id() for rel in element.HasOpenings))
+    shape = element.Representation
+    for representation in shape.Representations:
+        if representation.RepresentationIdentifier != 'Body':
+            continue
+        items = representation.Items
+        if items and all(item.is_a('IfcMappedItem') and _is_unscaled(item.MappingTarget) for item in items):
+            return ('maps', tuple(sorted(item.MappingSource.id() for item in items)), openings)
+        return ('representation', representation.id(), openings)
+    return None
+
+def compute_volumes(model, elements, threads: int = None) -> dict:
+    """
+    Compute volumes of elements from their geometry.
+
+    Elements are grouped by geometry_key and one element of each group is
+    meshed by the ifcopenshell.geom iterator, using `threads` threads (CPU
+    count by default). Volumes are in cubic metres, the iterator converts
+    lengths to metres.
+
+    Returns:
+        Dictionary of element id -> volume; elements whose geometry could
+        not be meshed or is not a closed solid are missing.
+    """
+    # Imported on first use, like ifcopenshell in IfcData
+    import ifcopenshell.geom
+    import ifcopenshell.util.shape
+
+    groups = {}
+    for element in elements:
+        key = geometry_key(element)
+        if key is not None:
+            groups.setdefault(key, []).append(element.id())
+    if not groups:
+        return {}
+    representatives = {ids[0]: ids for ids in groups.values()}
+    Instrumentation.count('geometry_meshed', len(representatives))
+
+    iterator = ifcopenshell.geom.iterator(
+        ifcopenshell.geom.settings(), model, threads or os.cpu_count() or 1,
+        include=[model.by_id(element_id) for element_id in representatives]
+    )
+    volumes = {}
+    if not iterator.initialize():
+        return volumes
+    while True:
+        shape = iterator.get()
+        volume = abs(ifcopenshell.util.shape.get_volume(shape.geometry))
+        if volume > 0:
+            for element_id in representatives.get(shape.id, ()):
+                volumes[element_id] = volume
+        if not iterator.next():
+            break
+    return volumes
+
+
+class VolumeStore:
+    """
+    On-disk store of volumes computed from geometry.
+
+    NumPy .npz files named after the IFC content hash map element GlobalIds
+    to volumes, so volumes are not computed again when the model is loaded
+    again, e.g. after the takeoff cache was cleared or with it disabled.
+
+    Every put writes a file of its own, so extraction workers storing
+    volumes of the same file at once do not overwrite each other's. Like
+    TakeoffCache, the store removes the least recently used files when it
+    grows beyond max_bytes.
+    """
+    DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+    SUFFIX = '.npz'
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(default_cache_dir(), 'volumes')
+        self.max_bytes = max_bytes
+
+    def __paths(self, file_hash: str) -> list:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name) for name in names
+            if name.startswith(file_hash) and name.endswith(self.SUFFIX)
+        ]
+
+    @staticmethod
+    def __read(path: str) -> dict:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return dict(zip(data['global_id'].tolist(), data['volume'].tolist()))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return {}
+
+    def get(self, file_hash: str) -> dict:
+        """Return the stored GlobalId -> volume mapping of a file, empty if none."""
+        volumes = {}
+        for path in self.__paths(file_hash):
+            volumes.update(self.__read(path))
+            try:
+                # Mark the file as recently used
+                os.utime(path)
+            except OSError:
+                pass
+        return volumes
+
+    def put(self, file_hash: str, volumes: dict):
+        """Add volumes of a file to the store."""
+        # The stored volumes are merged into the new file and their files
+        # removed afterwards. A concurrent put does the same with its own
+        # file, so no volume is lost, at worst some are stored twice.
+        paths = self.__paths(file_hash)
+        for path in paths:
+            volumes = {**self.__read(path), **volumes}
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    global_id=np.array(list(volumes.keys()), dtype=str),
+                    volume=np.array(list(volumes.values()), dtype=np.float64),
+                )
+            os.replace(tmp_path, os.path.join(self.directory, f'{file_hash}.{uuid.uuid4().hex}{self.SUFFIX}'))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                # Already merged and removed by a concurrent put
+                pass
+        self.evict()
+
+    def __entries(self) -> list:
+        """(modification time, size, path) of the stored files, oldest first."""
+        entries = []
+        for path in self.__paths(''):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed by a concurrent put or evict
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """Remove least recently used files until the store fits max_bytes."""
+        entries = self.__entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def invalidate(self, file_hash: str = None) -> int:
+        """
+        Remove stored volumes.
+
+        Args:
+            file_hash: Remove only the volumes of the file with this content
+                hash; if None the whole store is cleared.
+
+        Returns:
+            Number of removed files.
+        """
+        removed = 0
+        for path in self.__paths(file_hash or ''):
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def count(self) -> int:
+        return len(self.__entries())
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.__entries())
+
+
+class GeometryVolumeFallback:
+    """
+    Volume source for elements without volume quantities, see
+    IfcData.geometry_volumes.
+
+    Called by IfcData.iter_takeoff with the elements lacking a volume;
+    stored volumes of the file are used first, the rest is computed with
+    compute_volumes and added to the store.
+    """
+
+    def __init__(self, ifc_file: str, threads: int = None, store: VolumeStore = None):
+        self.ifc_file = ifc_file
+        self.threads = threads
+        self.store = store if store is not None else VolumeStore()
+
+    def __call__(self, model, elements) -> dict:
+        """Return a dictionary of element id -> volume for the elements."""
+        if not elements:
+            return {}
+        try:
+            file_hash = TakeoffCache.hash_file(self.ifc_file)
+        except OSError:
+            file_hash = None
+        stored = self.store.get(file_hash) if file_hash else {}
+
+        volumes = {}
+        missing = []
+        for element in elements:
+            volume = stored.get(element.GlobalId)
+            if volume is None:
+                missing.append(element)
+            else:
+                volumes[element.id()] = volume
+        Instrumentation.count('geometry_volumes_stored', len(volumes))
+        if missing:
+            computed = compute_volumes(model, missing, self.threads)
+            volumes.update(computed)
+            if computed and file_hash:
+                try:
+                    self.store.put(file_hash, {model.by_id(element_id).GlobalId: volume
+                                               for element_id, volume in computed.items()})
+                except OSError:
+                    # A store that cannot be written must not break loading
+                    pass
+        return volumes
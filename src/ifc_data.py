@@ -1,72 +1,666 @@
-import ifcopenshell
-import ifcopenshell.util.element as util_element
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from geometry_volume import GeometryVolumeFallback, VolumeStore
+from instrumentation import Instrumentation
+from memory_budget import model_bytes, resident_bytes
+from model_index import MaterialIndex, QuantityIndex, index_types
+from parallel_extraction import extract_file, extract_parallel
+from step_scanner import ScannedModel
+from takeoff_builder import TakeoffBuilder
+from takeoff_cache import TakeoffCache
+from takeoff_registry import SharedTakeoff, TakeoffRegistry
+
+class LoadCancelled(Exception):
+    """Raised by IfcData.load and load_models when the load was cancelled; the loaded data is unchanged."""
 
 class IfcData:
-    df = pd.DataFrame({
-        'element': pd.Series(dtype='str'),
-        'material': pd.Series(dtype='str'),
-        'volume': pd.Series(dtype='float'),
-    })
-    material_prices = pd.DataFrame({
-        'material': pd.Series(dtype='str'),
-        'price': pd.Series(dtype='float'),
-    })
-    ifc_file = None
-    model = None
+    """
+    Takeoff and price book of one session.
 
-    @classmethod
-    def load(cls, ifc_file):
-        cls.ifc_file = ifc_file
-        cls.model = ifcopenshell.open(ifc_file)
-        cls.__clear_df()
-        cls.__update_df()
+    Every session of the application (e.g. every browser session of the
+    web deployment) has its own instance, so its loaded model and material
+    prices are independent of the others. Extracted takeoffs are shared
+    through IfcData.takeoffs: sessions opening the same file content share
+    one parse and one takeoff DataFrame, which is therefore read-only.
 
-    @classmethod
-    def __clear_df(cls):
-        cls.df = pd.DataFrame({
-            'element': pd.Series(dtype='str'),
-            'material': pd.Series(dtype='str'),
-            'volume': pd.Series(dtype='float'),
-        })
+    The class attributes below are process-wide defaults; the extraction
+    settings (SETTINGS) can be overridden per instance.
+    """
+    # Number of worker processes used for extraction; 1 keeps the serial path
+    workers = 1
+    # Bump when the extraction logic changes so cached takeoffs are not reused
+    EXTRACTOR_VERSION = 1
+    # On-disk takeoff cache; set to None to always parse the IFC file
+    cache = TakeoffCache()
+    # Read only what the takeoff needs with ScannedModel instead of building
+    # the complete model with ifcopenshell, which is then not retained
+    takeoff_only = False
+    # Compute volumes of elements without volume quantities from their
+    # geometry (GeometryVolumeFallback); not available with takeoff_only
+    geometry_volumes = False
+    # Threads meshing the geometry, None uses all CPUs
+    geometry_threads = None
+    # Settings which can be passed to the constructor
+    SETTINGS = ('cache', 'takeoff_only', 'geometry_volumes', 'geometry_threads')
+    # Parser process (ParserService) used by load; None parses in this process
+    parser = None
+    # Takeoffs held by the instances of this process
+    takeoffs = TakeoffRegistry()
+    # Rows extracted between progress reports and cancellation checks
+    PROGRESS_INTERVAL = 1000
+    # Source of data versions, unique across instances
+    __versions = itertools.count(1)
+
+    def __init__(self, **settings):
+        """
+        Args:
+            settings: Overrides of the extraction settings, see SETTINGS.
+        """
+        for name, value in settings.items():
+            if name not in self.SETTINGS:
+                raise TypeError(f'Unknown IfcData setting: {name}')
+            setattr(self, name, value)
+        self.df = self.__combine({})
+        # Price book: material name -> unit price, in order of discovery
+        self.material_prices = {}
+        # Loaded models in load order: model name -> path of its IFC file
+        self.model_files = {}
+        # Path of the first loaded model, None if no model is loaded
+        self.ifc_file = None
+        self.load_stats = {}
+        self.last_changes = {}
+        # Changed whenever df or material_prices change; cached aggregates
+        # are only valid for the version they were computed at. Versions are
+        # unique across instances, so they can key caches shared by sessions
+        self.data_version = next(IfcData.__versions)
+        self.__aggregates = {}
+        # Held while the loaded models, prices or totals change, so that loads,
+        # reloads (e.g. by ModelWatcher) and price edits from different threads
+        # apply one after another; extraction itself runs outside of it
+        self.__lock = threading.RLock()
+        # Model name -> SharedTakeoff of the loaded models, released when the
+        # model is unloaded or replaced
+        self.__takeoffs = {}
+        # Materialized volume totals kept in sync with df and material prices:
+        # rows of the matrix are materials, columns are element classes. The
+        # model volumes split the matrix by model (model x material x class)
+        self.__materials = np.array([], dtype=object)
+        self.__element_classes = np.array([], dtype=object)
+        self.__models = np.array([], dtype=object)
+        self.__material_rows = {}
+        self.__model_volumes = np.zeros((0, 0, 0))
+        # Row counts per model and material / element class, so that
+        # per-model aggregates only list what occurs in the model
+        self.__model_material_rows = np.zeros((0, 0), dtype=np.int64)
+        self.__model_element_rows = np.zeros((0, 0), dtype=np.int64)
+        self.__volume_matrix = np.zeros((0, 0))
+        self.__material_volumes = np.zeros(0)
+        self.__prices = np.zeros(0)
+        self.__material_cost_values = np.zeros(0)
+        self.__element_cost_values = np.zeros(0)
+        self.__total_cost = 0.0
+
+    def settings(self) -> dict:
+        """Extraction settings of this instance, see SETTINGS."""
+        return {name: getattr(self, name) for name in self.SETTINGS}
+
+    def __extractor_version(self) -> str:
+        # Takeoffs with computed volumes are cached separately; ScannedModel
+        # does not read geometry
+        if self.geometry_volumes and not self.takeoff_only:
+            return f'{self.EXTRACTOR_VERSION}-geometry'
+        return str(self.EXTRACTOR_VERSION)
+
+    def load(self, ifc_file, workers: int = None, progress=None, cancelled=None):
+        """
+        Load an IFC file as the only model and extract its takeoff.
+        
+        If another session holds the takeoff of the same file content, it is
+        shared and nothing is extracted; if another session is extracting it,
+        its result is waited for. If the same file content was extracted
+        before, the takeoff is read from the cache and ifcopenshell is not
+        used at all. When IfcData.parser is set, the model is parsed in the
+        parser process. A model parsed here is released after extraction
+        unless the model budget retains it, see get_model.
+        
+        The previously loaded takeoff stays in place while the new one is
+        extracted and is replaced at once when extraction is complete, so it
+        can be used from other threads meanwhile and is kept if loading
+        fails or is cancelled.
+        
+        Args:
+            ifc_file: Path to the IFC file.
+            workers: Number of extraction processes, defaults to IfcData.workers.
+                With more than one worker the elements are partitioned by
+                GlobalId across a process pool; the result is identical
+                to the serial path.
+            progress: Optional callable progress(stage, done, total), where
+                stage is 'cache', 'parse' or 'extract' and total is None
+                when not known.
+            cancelled: Optional callable returning True when the load should
+                be abandoned. Checked between stages and every
+                PROGRESS_INTERVAL extracted rows.
+                
+        Raises:
+            LoadCancelled: If the load was cancelled.
+        """
+        self.load_models([ifc_file], workers, progress, cancelled, replace=True)
+
+    def load_models(self, ifc_files, workers: int = None, progress=None, cancelled=None, replace: bool = False):
+        """
+        Load several IFC files, e.g. the discipline models of one project,
+        into one takeoff.
+        
+        The rows of df are tagged with their source model in the 'model'
+        column; costs can be aggregated across all models or per model (see
+        get_model_costs and the model argument of get_material_costs). The
+        model name is the file name without extension (model_name); a file
+        which is already loaded keeps its name. Loading a file whose model
+        is already loaded replaces that model, e.g. a new revision of the
+        structural model, while the other models are kept without
+        extracting them again.
+        
+        Takeoffs are shared with other sessions and cached like in load.
+        Several files are extracted concurrently, one worker process per file
+        up to the number of CPUs; workers is then not used. All files are
+        swapped in at once when all of them are extracted, so the loaded
+        models are kept if loading fails or is cancelled.
+        
+        Args:
+            ifc_files: Paths to the IFC files.
+            workers: Number of extraction processes for a single file, see load.
+            progress: Optional callable progress(stage, done, total), see
+                load; with several files stage is 'models' and done counts
+                the extracted files.
+            cancelled: Optional callable returning True when the load should
+                be abandoned.
+            replace: Unload all models which are not in ifc_files.
+                
+        Raises:
+            LoadCancelled: If the load was cancelled.
+        """
+        with Instrumentation.span('load'):
+            loaded = self.__acquire_models(ifc_files, workers, progress, cancelled)
+            self.__set_takeoffs(loaded, replace)
+
+    def __acquire_models(self, ifc_files, workers: int = None, progress=None, cancelled=None) -> dict:
+        """
+        Acquire the takeoffs of IFC files from the registry, extracting them
+        if needed, without changing the loaded models.
+
+        Returns:
+            File path -> SharedTakeoff, to be passed to __set_takeoffs.
+        """
+        ifc_files = list(dict.fromkeys(ifc_files))
+        report = progress or (lambda stage, done, total: None)
+        
+        def check_cancelled():
+            if cancelled is not None and cancelled():
+                raise LoadCancelled(*ifc_files)
+        
+        report('cache', 0, None)
+        file_hashes = {}
+        with Instrumentation.span('hash_file'):
+            for ifc_file in ifc_files:
+                file_hashes[ifc_file] = TakeoffCache.hash_file(ifc_file)
+                check_cancelled()
+        
+        if len(ifc_files) == 1:
+            ifc_file = ifc_files[0]
+            
+            # Model parsed by the extraction and its size
+            parsed = []
+            
+            def extract():
+                if self.parser is not None:
+                    builder, cached = self.parser.extract(
+                        ifc_file, workers, progress, cancelled, self.settings(), file_hashes[ifc_file]
+                    )
+                else:
+                    resident_before = resident_bytes()
+                    builder, model, cached = self.extract(
+                        ifc_file, workers, progress, cancelled, file_hashes[ifc_file]
+                    )
+                    if model is not None:
+                        parsed.append((model, model_bytes(ifc_file, resident_before)))
+                return self.__shared_takeoff(file_hashes[ifc_file], builder, cached)
+            
+            takeoff = self.takeoffs.acquire(self.__key(file_hashes[ifc_file]), extract, check_cancelled)
+            if parsed:
+                # Dropped here unless it fits the model budget
+                self.takeoffs.retain_model(takeoff, *parsed.pop())
+            loaded = {ifc_file: takeoff}
+        else:
+            loaded = self.__acquire_concurrently(file_hashes, report, check_cancelled) if ifc_files else {}
+        return loaded
+
+    def __key(self, file_hash: str) -> str:
+        return f'{file_hash}-v{self.__extractor_version()}'
+
+    def __shared_takeoff(self, file_hash: str, builder: TakeoffBuilder, cached: bool) -> SharedTakeoff:
+        with Instrumentation.span('build_dataframe'):
+            df = builder.build()
+        return SharedTakeoff(
+            self.__key(file_hash), df, builder.materials, {**builder.get_stats(), 'cached': cached}
+        )
+
+    def __acquire_concurrently(self, file_hashes: dict, report, check_cancelled) -> dict:
+        """
+        Acquire the takeoffs of several files, extracting the ones no session
+        holds in a process pool, one file per worker.
+        
+        The workers are spawned rather than forked, like the ParserService
+        process: the calling process runs UI threads, and with a spawned
+        pool ifcopenshell is never loaded into it, also without a parser.
+        
+        Returns:
+            Dictionary of file path -> SharedTakeoff, in the order of file_hashes.
+        """
+        settings = self.settings()
+        lock = threading.Lock()
+        done = 0
+        # Workers are only started for files that are actually extracted
+        pool = ProcessPoolExecutor(
+            max_workers=min(len(file_hashes), os.cpu_count() or 1), mp_context=multiprocessing.get_context('spawn')
+        )
+        
+        def acquire(ifc_file: str) -> SharedTakeoff:
+            nonlocal done
+            file_hash = file_hashes[ifc_file]
+            
+            def extract():
+                started = time.perf_counter()
+                future = pool.submit(extract_file, ifc_file, settings, file_hash)
+                while True:
+                    try:
+                        codes, cached = future.result(timeout=self.takeoffs.POLL_INTERVAL)
+                        break
+                    except FutureTimeoutError:
+                        check_cancelled()
+                builder = TakeoffBuilder.from_codes(codes, started=started)
+                return self.__shared_takeoff(file_hash, builder, cached)
+            
+            takeoff = self.takeoffs.acquire(self.__key(file_hash), extract, check_cancelled)
+            with lock:
+                done += 1
+                report('models', done, len(file_hashes))
+            return takeoff
+        
+        report('models', 0, len(file_hashes))
+        loaded = {}
+        error = None
+        try:
+            with ThreadPoolExecutor(max_workers=len(file_hashes)) as threads:
+                futures = {ifc_file: threads.submit(acquire, ifc_file) for ifc_file in file_hashes}
+                for ifc_file, future in futures.items():
+                    try:
+                        loaded[ifc_file] = future.result()
+                    except Exception as e:
+                        error = error or e
+        finally:
+            # A cancelled load does not wait for the running extractions
+            pool.shutdown(wait=False, cancel_futures=True)
+        if error is not None:
+            for takeoff in loaded.values():
+                self.takeoffs.release(takeoff)
+            raise error
+        return loaded
+
+    @staticmethod
+    def model_name(ifc_file) -> str:
+        """Name of the model of an IFC file: the file name without extension."""
+        return os.path.splitext(os.path.basename(ifc_file))[0]
+
+    @property
+    def model(self):
+        """
+        Parsed model of the only loaded model if it is retained in memory,
+        otherwise None; see get_model.
+        """
+        if len(self.__takeoffs) != 1:
+            return None
+        return self.takeoffs.model(next(iter(self.__takeoffs.values())))
+
+    def get_model(self, name: str = None):
+        """
+        Return the parsed ifcopenshell model of a loaded model, for features
+        which need entity access; costs, tables and charts only use df.
+        
+        Parsed models are released after extraction and retained only
+        within TakeoffRegistry.model_budget (none by default), so a released
+        model is parsed again from its file here. Callers should keep the
+        returned model while they use it instead of calling this repeatedly.
+        
+        Args:
+            name: Model name, may be omitted when one model is loaded.
+            
+        Raises:
+            KeyError: If no model of that name is loaded.
+            ValueError: If several models are loaded and name is omitted, or
+                the file changed since the model was loaded.
+        """
+        if name is None:
+            if len(self.model_files) != 1:
+                raise ValueError('Model name required, several or no models are loaded')
+            name = next(iter(self.model_files))
+        takeoff = self.__takeoffs[name]
+        model = self.takeoffs.model(takeoff)
+        if model is not None:
+            return model
+        
+        ifc_file = self.model_files[name]
+        if not takeoff.key.startswith(f'{TakeoffCache.hash_file(ifc_file)}-'):
+            raise ValueError(f'{ifc_file} changed since it was loaded, reload it first')
+        # Imported on first use, the application starts faster without it
+        import ifcopenshell
+        resident_before = resident_bytes()
+        with Instrumentation.span('reopen_model'):
+            model = ifcopenshell.open(ifc_file)
+        Instrumentation.count('models_reopened')
+        self.takeoffs.retain_model(takeoff, model, model_bytes(ifc_file, resident_before))
+        return model
+
+    def unload_model(self, name: str):
+        """
+        Remove one loaded model; the other models are kept as they are.
+        
+        Raises:
+            KeyError: If no model of that name is loaded.
+        """
+        with self.__lock:
+            takeoffs = dict(self.__takeoffs)
+            model_files = dict(self.model_files)
+            released = takeoffs.pop(name)
+            del model_files[name]
+            self.__swap_takeoffs(takeoffs, model_files, [released])
+
+    def close(self):
+        """Release the loaded takeoffs, e.g. when the session ends; the price book is kept."""
+        with self.__lock:
+            self.__swap_takeoffs({}, {}, list(self.__takeoffs.values()))
+
+    def extract(self, ifc_file, workers: int = None, progress=None, cancelled=None, file_hash: str = None):
+        """
+        Extract the takeoff of an IFC file without changing the loaded data.
+        
+        Runs in the calling process with the settings of this instance; see
+        load for the arguments. file_hash is the content hash of the file if
+        it is already known.
+        
+        Returns:
+            Tuple of (TakeoffBuilder, parsed model or None, whether the
+            takeoff came from the cache).
+        """
+        started = time.perf_counter()
+        workers = workers or self.workers
+        report = progress or (lambda stage, done, total: None)
+        
+        def check_cancelled():
+            if cancelled is not None and cancelled():
+                raise LoadCancelled(ifc_file)
+
+        # ScannedModel does not read geometry
+        geometry_volumes = self.geometry_volumes and not self.takeoff_only
+
+        report('cache', 0, None)
+        with Instrumentation.span('cache_lookup'):
+            cache_key = self.cache.key(ifc_file, self.__extractor_version(), file_hash) if self.cache else None
+            builder = self.cache.get(cache_key, started=started) if cache_key else None
+        check_cancelled()
+        if builder is not None:
+            return builder, None, True
+
+        model = None
+        if workers > 1:
+            # Each worker opens the IFC file itself, so the model is not
+            # parsed in this process
+            report('extract', 0, None)
+            with Instrumentation.span('parallel_extract'):
+                builder = extract_parallel(
+                    ifc_file, workers, self.takeoff_only, geometry_volumes, self.geometry_threads
+                )
+        else:
+            report('parse', 0, None)
+            with Instrumentation.span('parse'):
+                if self.takeoff_only:
+                    model = ScannedModel(ifc_file)
+                else:
+                    # Imported on first use, the application starts faster without it
+                    import ifcopenshell
+                    model = ifcopenshell.open(ifc_file)
+            try:
+                check_cancelled()
+                with Instrumentation.span('extract'):
+                    volume_fallback = GeometryVolumeFallback(ifc_file, self.geometry_threads) if geometry_volumes else None
+                    builder = self.__extract_rows(model, report, check_cancelled, volume_fallback)
+            finally:
+                if isinstance(model, ScannedModel):
+                    # A partial model is not kept, release the mapped file
+                    model.close()
+                    model = None
+        check_cancelled()
+        if cache_key:
+            try:
+                with Instrumentation.span('cache_store'):
+                    self.cache.put(cache_key, builder)
+            except OSError:
+                # A cache that cannot be written must not break loading
+                pass
+        return builder, model, False
+
+    def invalidate_cache(self, ifc_file: str = None) -> int:
+        """
+        Remove cached takeoffs and stored geometry volumes of one IFC file,
+        or all of them. Stored volumes are removed also when the takeoff
+        cache is disabled, since they are used without it.
+        
+        Returns:
+            Number of removed cache entries.
+        """
+        removed = self.cache.invalidate(ifc_file) if self.cache is not None else 0
+        file_hash = TakeoffCache.hash_file(ifc_file) if ifc_file else None
+        return removed + VolumeStore().invalidate(file_hash)
+
+    def reload(self, ifc_file: str = None, workers: int = None) -> dict:
+        """
+        Reload a new revision of a model and report what changed.
+        
+        The revision replaces the loaded model of the same name (see
+        load_models); the other loaded models are kept as they are.
+        Elements are matched with the previously loaded takeoff by GlobalId
+        and compared by their fingerprint (element class, material, volume).
+        Entered material prices are kept; materials appearing for the first
+        time get a price of 0. May run on another thread than loads and
+        price edits, e.g. in ModelWatcher: the revision is swapped in under
+        the lock they share, and a model unloaded or replaced meanwhile is
+        not brought back.
+        
+        Args:
+            ifc_file: Path to the new revision, defaults to the files of all
+                loaded models.
+            workers: Number of extraction processes, see load.
+            
+        Returns:
+            Dictionary with 'added', 'removed', 'changed' and 'unchanged'
+            element counts and the 'cost_delta' of the total cost.
+        """
+        ifc_files = [ifc_file] if ifc_file else list(self.model_files.values())
+        assert ifc_files, 'IFC file not loaded'
+        was_loaded = {os.path.abspath(loaded_file) for loaded_file in self.model_files.values()}
+        with Instrumentation.span('load'):
+            loaded = self.__acquire_models(ifc_files, workers)
+            with self.__lock:
+                # A model unloaded or replaced by another load meanwhile is
+                # not brought back
+                now_loaded = {os.path.abspath(loaded_file) for loaded_file in self.model_files.values()}
+                for reloaded_file in list(loaded):
+                    path = os.path.abspath(reloaded_file)
+                    if path in was_loaded and path not in now_loaded:
+                        self.takeoffs.release(loaded.pop(reloaded_file))
+                
+                # Compared with the takeoff the revision replaces, not the
+                # one loaded when the reload started
+                old_df = self.df
+                old_total = self.get_total_cost() if not old_df.empty else 0.0
+                self.__set_takeoffs(loaded, replace=False)
+                
+                changes = self.__compare_takeoffs(old_df, self.df)
+                new_total = self.get_total_cost() if not self.df.empty else 0.0
+                changes['cost_delta'] = float(new_total - old_total)
+                self.last_changes = changes
+        return changes
+
+    @staticmethod
+    def __compare_takeoffs(old_df: pd.DataFrame, new_df: pd.DataFrame) -> dict:
+        def keyed(df):
+            df = df[['global_id', 'element', 'material', 'volume']].astype({'element': 'str', 'material': 'str'})
+            # Number repeated GlobalIds so that every row has a unique key
+            df['occurrence'] = df.groupby('global_id').cumcount()
+            return df.set_index(['global_id', 'occurrence'])
+        
+        old_rows = keyed(old_df)
+        new_rows = keyed(new_df)
+        common = old_rows.index.intersection(new_rows.index)
+        old_common = old_rows.loc[common]
+        new_common = new_rows.loc[common]
+        changed = (
+            (old_common['element'] != new_common['element'])
+            | (old_common['material'] != new_common['material'])
+            | ~np.isclose(old_common['volume'], new_common['volume'], rtol=1e-9, atol=0.0)
+        )
+        return {
+            'added': len(new_rows.index.difference(old_rows.index)),
+            'removed': len(old_rows.index.difference(new_rows.index)),
+            'changed': int(changed.sum()),
+            'unchanged': int((~changed).sum()),
+        }
+
+    def __rebuild_totals(self, df: pd.DataFrame = None):
+        """
+        Recompute the model x material x element class volume array and the
+        cost totals derived from it. Called whenever df is replaced.
+        
+        Args:
+            df: Takeoff to compute the totals of, defaults to IfcData.df.
+                The totals are assigned only after everything is computed.
+        """
+        df = self.df if df is None else df
+        # df stores element classes, materials and models as categoricals, so
+        # grouping works directly on their integer codes
+        material_codes = df['material'].cat.codes.to_numpy(dtype=np.int64)
+        element_codes = df['element'].cat.codes.to_numpy(dtype=np.int64)
+        model_codes = df['model'].cat.codes.to_numpy(dtype=np.int64)
+        materials = np.asarray(df['material'].cat.categories, dtype=object)
+        element_classes = np.asarray(df['element'].cat.categories, dtype=object)
+        models = np.asarray(df['model'].cat.categories, dtype=object)
+        n_models, n_materials, n_classes = len(models), len(materials), len(element_classes)
+        model_volumes = np.bincount(
+            (model_codes * n_materials + material_codes) * n_classes + element_codes,
+            weights=df['volume'].to_numpy(dtype=np.float64),
+            minlength=n_models * n_materials * n_classes,
+        ).reshape(n_models, n_materials, n_classes)
+        model_material_rows = np.bincount(
+            model_codes * n_materials + material_codes, minlength=n_models * n_materials
+        ).reshape(n_models, n_materials)
+        model_element_rows = np.bincount(
+            model_codes * n_classes + element_codes, minlength=n_models * n_classes
+        ).reshape(n_models, n_classes)
+        volume_matrix = model_volumes.sum(axis=0)
+        material_volumes = volume_matrix.sum(axis=1)
+        
+        prices = np.array(
+            # Materials without a price, e.g. after clear_material_prices, cost nothing
+            [self.material_prices.get(material, 0.0) for material in materials],
+            dtype=np.float64,
+        )
+        material_cost_values = prices * material_volumes
+        
+        self.__materials = materials
+        self.__element_classes = element_classes
+        self.__models = models
+        self.__model_volumes = model_volumes
+        self.__model_material_rows = model_material_rows
+        self.__model_element_rows = model_element_rows
+        self.__volume_matrix = volume_matrix
+        self.__material_rows = {material: row for row, material in enumerate(materials)}
+        self.__material_volumes = material_volumes
+        self.__prices = prices
+        self.__material_cost_values = material_cost_values
+        self.__element_cost_values = prices @ volume_matrix
+        self.__total_cost = float(material_cost_values.sum())
+
+    def __update_totals(self, prices: dict):
+        """
+        Apply price changes to the cost totals without grouping df again.
+        
+        Each changed price adds (new - old) times the volumes of its material
+        row to the element class costs and the total, so an edit costs
+        O(element classes) instead of recomputing prices @ volume_matrix.
+        Rounding errors of the deltas are dropped whenever __rebuild_totals
+        recomputes everything, i.e. on every load.
+        """
+        for material, price in prices.items():
+            row = self.__material_rows.get(material)
+            if row is None:
+                # Material not used by any element, costs do not change
+                continue
+            delta = price - self.__prices[row]
+            if delta == 0.0:
+                continue
+            self.__prices[row] = price
+            self.__material_cost_values[row] = price * self.__material_volumes[row]
+            # The aggregates copy these arrays, so updating in place is safe
+            self.__element_cost_values += delta * self.__volume_matrix[row]
+            self.__total_cost += float(delta * self.__material_volumes[row])
+
+    def __bump_version(self):
+        self.data_version = next(IfcData.__versions)
+        self.__aggregates = {}
+
+    def __get_aggregate(self, type: str, compute, model: str = None):
+        """
+        Return the aggregate of the given type (of one model, or of all
+        models if model is None) for the current data version, computing it
+        only on the first read after a change.
+        
+        The returned frame is shared between callers and must not be modified.
+        """
+        with self.__lock:
+            key = (type, model, self.data_version)
+            if key not in self.__aggregates:
+                with Instrumentation.span(f'{type}_costs'):
+                    self.__aggregates[key] = compute() if model is None else compute(model)
+            return self.__aggregates[key]
 
     @classmethod
-    def __get_net_volume_from_element(cls, element):
+    def __get_net_volume_from_element(cls, element, quantity_index: QuantityIndex, fallback_volumes: dict = None):
         """
         Extract volume information from IFC element using different strategies.
         
         Args:
             element: IFC element from which to extract volume.
+            quantity_index: QuantityIndex of the model the element belongs to.
+            fallback_volumes: Optional element id -> volume used when the
+                element has no volume quantity, e.g. computed from geometry.
             
         Returns:
             Float value of volume if found, None otherwise.
         """
-        # First check using the original simple method for backward compatibility
-        psets = util_element.get_psets(element)
-        for pset_name, pset in psets.items():
-            if 'NetVolume' in pset:
-                return pset['NetVolume']
-        
-        # Continue with additional checks if the simple method didn't find a volume
-        for pset_name, pset in psets.items():
-            # Look for different volume representation names in psets
-            if 'Volume' in pset:
-                return pset['Volume']
-            if 'GrossVolume' in pset:
-                return pset['GrossVolume']
-            if 'TotalVolume' in pset:
-                return pset['TotalVolume']
-                
-        # Check quantities for volume information
-        quantities = util_element.get_quantities(element)
-        for quantity_name, quantity in quantities.items():
-            # Look for different volume representation names in quantities
-            if 'NetVolume' in quantity:
-                return quantity['NetVolume']
-            if 'Volume' in quantity:
-                return quantity['Volume']
-            if 'GrossVolume' in quantity:
-                return quantity['GrossVolume']
+        # NetVolume/Volume/GrossVolume/TotalVolume from property and quantity sets
+        volume = quantity_index.get(element.id())
+        if volume is not None:
+            return volume
             
         # Try direct attribute access as a last resort
         try:
@@ -75,197 +669,444 @@ class IfcData:
         except:
             pass
             
+        if fallback_volumes:
+            return fallback_volumes.get(element.id())
         return None
 
-    @classmethod
-    def __get_material_name(cls, material):
+    def __add_materials(self, materials):
+        new_materials = [material for material in materials if material not in self.material_prices]
+        if new_materials:
+            for material in new_materials:
+                self.material_prices[material] = 0.0
+            self.__bump_version()
+
+    def update_material_price(self, material: str, price: float):
+        self.update_material_prices({material: price})
+
+    def update_material_prices(self, prices: dict):
         """
-        Extract material name from various types of IFC material objects.
+        Set the unit prices of many materials at once, e.g. from a price
+        catalogue. Materials not present in the model are kept in the price
+        book for later loads.
         
         Args:
-            material: IFC material object
-            
-        Returns:
-            String representing the material name.
+            prices: Mapping of material name -> unit price.
             
         Raises:
-            AttributeError: If material name cannot be extracted.
+            ValueError: If a price is not a finite number; no price is set then.
         """
-        # Handle direct material with Name attribute
-        if material.is_a('IfcMaterial'):
-            return material.Name
-            
-        # Handle IfcMaterialLayerSet
-        elif material.is_a('IfcMaterialLayerSet'):
-            if hasattr(material, 'LayerSetName') and material.LayerSetName:
-                return material.LayerSetName
-            # Fallback to first layer's material name
-            elif hasattr(material, 'MaterialLayers') and material.MaterialLayers:
-                layers = list(material.MaterialLayers)
-                if layers and hasattr(layers[0], 'Material') and layers[0].Material:
-                    return layers[0].Material.Name
-            raise AttributeError(f"Cannot extract name from {material.is_a()}")
-                
-        # Handle IfcMaterialLayerSetUsage
-        elif material.is_a('IfcMaterialLayerSetUsage'):
-            if hasattr(material, 'ForLayerSet') and material.ForLayerSet:
-                return cls.__get_material_name(material.ForLayerSet)
-            raise AttributeError(f"Cannot extract name from {material.is_a()}")
-                
-        # Handle IfcMaterialList
-        elif material.is_a('IfcMaterialList'):
-            if hasattr(material, 'Materials') and material.Materials:
-                materials = list(material.Materials)
-                if materials and hasattr(materials[0], 'Name'):
-                    return materials[0].Name
-            raise AttributeError(f"Cannot extract name from {material.is_a()}")
-                
-        # Handle IfcMaterialConstituentSet
-        elif material.is_a('IfcMaterialConstituentSet'):
-            if hasattr(material, 'Name') and material.Name:
-                return material.Name
-            elif hasattr(material, 'MaterialConstituents') and material.MaterialConstituents:
-                constituents = list(material.MaterialConstituents)
-                if constituents and hasattr(constituents[0], 'Material') and constituents[0].Material:
-                    return constituents[0].Material.Name
-            raise AttributeError(f"Cannot extract name from {material.is_a()}")
-                
-        # Fallback for any other material type
-        elif hasattr(material, 'Name'):
-            return material.Name
-            
-        # If no name could be found, throw an error
-        raise AttributeError(f"Material of type {material.is_a()} has no extractable name")
+        prices = {material: float(price) for material, price in prices.items()}
+        for material, price in prices.items():
+            if not math.isfinite(price):
+                raise ValueError(f'Price of {material} must be a finite number, got {price}')
+        with self.__lock:
+            self.material_prices.update(prices)
+            self.__update_totals(prices)
+            self.__bump_version()
 
-    @classmethod
-    def __update_material_prices(cls, material: str):
-        if material not in list(cls.material_prices['material']):
-            cls.material_prices = pd.concat([
-                cls.material_prices,
-                pd.DataFrame([{'material': material, 'price': 0}])
-            ], ignore_index=True)
+    def get_material_prices(self) -> pd.DataFrame:
+        """Return the price book as a DataFrame with 'material' and 'price' columns."""
+        return pd.DataFrame({
+            'material': pd.Series(list(self.material_prices.keys()), dtype='str'),
+            'price': pd.Series(list(self.material_prices.values()), dtype='float'),
+        })
+
+    def clear_material_prices(self):
+        with self.__lock:
+            self.material_prices = {}
+            self.__rebuild_totals()
+            self.__bump_version()
 
     @classmethod
-    def update_material_price(cls, material: str, price: float):
-        cls.__update_material_prices(material)
-        cls.material_prices.loc[cls.material_prices['material'] == material, 'price'] = price
+    def iter_takeoff(cls, model, volume_fallback=None):
+        """
+        Iterate over the takeoff rows of an IFC model.
+        
+        This method processes all material associations in the IFC model and
+        then structural elements that were not associated with a material.
+        Materials and volumes are resolved through a MaterialIndex and a
+        QuantityIndex built once per model, which both passes share.
+        
+        Args:
+            model: ifcopenshell file.
+            volume_fallback: Optional callable(model, elements) returning a
+                dictionary of element id -> volume for elements without volume
+                quantities, e.g. GeometryVolumeFallback. Without it such
+                elements are skipped.
+            
+        Yields:
+            (element, material name, volume) tuples, always in the same order
+            for the same model.
+        """
+        for _, element, material_name, volume in cls.iter_ordered_takeoff(model, volume_fallback):
+            yield element, material_name, volume
 
     @classmethod
-    def __update_df(cls):
+    def iter_ordered_takeoff(cls, model, volume_fallback=None, element_filter=None):
         """
-        Update dataframe with elements, materials and volumes from the IFC model.
+        Iterate over the takeoff rows of an IFC model with their order keys.
         
-        This method processes all material associations in the IFC model,
-        extracts material names and element volumes, and updates the dataframe.
+        Like iter_takeoff, but only elements accepted by element_filter are
+        resolved, and every row comes with a key of its position in the
+        takeoff of the whole model. The key depends only on the model, so
+        rows of disjoint filters, e.g. the partitions of a parallel
+        extraction, can be merged back into the order of iter_takeoff
+        without resolving the other elements.
         
-        Raises:
-            AssertionError: If IFC file is not loaded.
+        Args:
+            model: ifcopenshell file.
+            volume_fallback: See iter_takeoff; called only with elements
+                accepted by element_filter.
+            element_filter: Optional callable(element) -> bool.
+            
+        Yields:
+            (order key, element, material name, volume) tuples with
+            increasing integer keys.
         """
-        assert cls.model is not None, 'IFC file not loaded'
+        structural_types = ['IfcBeam', 'IfcColumn', 'IfcSlab', 'IfcWall', 'IfcStairFlight']
         processed_elements = set()  # Track processed elements to avoid duplicates
+        with Instrumentation.span('index_types'):
+            types = index_types(model)
+        with Instrumentation.span('material_index'):
+            material_index = MaterialIndex(model, types)
+        with Instrumentation.span('quantity_index'):
+            quantity_index = QuantityIndex(model, types, element_filter)
+        fallback_volumes = None
+        if volume_fallback is not None:
+            with Instrumentation.span('fallback_volumes'):
+                fallback_volumes = volume_fallback(
+                    model, cls.__elements_without_volume(
+                        model, material_index, quantity_index, structural_types, element_filter
+                    )
+                )
+            Instrumentation.count('elements_fallback_volume', len(fallback_volumes))
+        # Counted locally and reported once per pass to keep the loops cheap
+        scanned = skipped = defaulted = 0
+        # Keys count every candidate element, whether it is resolved or not
+        order = 0
         
         # Process material associations
-        for associates_material in cls.model.by_type('IfcRelAssociatesMaterial'):
-            material = associates_material.RelatingMaterial
-            
-            try:
-                # Extract material name using robust helper method
-                material_name = cls.__get_material_name(material)
-                
-                for element in associates_material.RelatedObjects:
-                    element_id = element.id()
-                    if element_id in processed_elements:
-                        continue
-                        
-                    volume = cls.__get_net_volume_from_element(element)
-                    if volume is None:
-                        continue
-                        
-                    cls.df = pd.concat([
-                        cls.df,
-                        pd.DataFrame([{
-                            'element': element.is_a(),
-                            'material': material_name,
-                            'volume': volume
-                        }])
-                    ], ignore_index=True)
-                    cls.__update_material_prices(material_name)
-                    processed_elements.add(element_id)
-                    
-            except AttributeError:
-                # Skip this material association if name cannot be extracted
+        pass_started = time.perf_counter()
+        for element, material_name in material_index.direct_items():
+            order += 1
+            if element_filter is not None and not element_filter(element):
+                continue
+            scanned += 1
+            volume = cls.__get_net_volume_from_element(element, quantity_index, fallback_volumes)
+            if volume is None:
+                skipped += 1
                 continue
+                
+            yield order, element, material_name, volume
+            processed_elements.add(element.id())
+        Instrumentation.record('association_pass', time.perf_counter() - pass_started)
         
         # Special handling for structural elements (IfcBeam, IfcColumn) that might have been skipped
-        for element_type in ['IfcBeam', 'IfcColumn', 'IfcSlab', 'IfcWall', 'IfcStairFlight']:
-            for element in cls.model.by_type(element_type):
+        pass_started = time.perf_counter()
+        for element_type in structural_types:
+            for element in model.by_type(element_type):
+                order += 1
+                if element_filter is not None and not element_filter(element):
+                    continue
                 element_id = element.id()
                 if element_id in processed_elements:
                     continue
+                scanned += 1
                     
                 # Check if element has an assigned volume
-                volume = cls.__get_net_volume_from_element(element)
+                volume = cls.__get_net_volume_from_element(element, quantity_index, fallback_volumes)
                 if volume is None:
+                    skipped += 1
                     continue
                 
-                # Check if material can be found for the element
-                material_name = None
-                
-                # Try to find material in relationships
-                for rel in cls.model.by_type('IfcRelAssociatesMaterial'):
-                    if element.id() in [obj.id() for obj in rel.RelatedObjects]:
-                        try:
-                            material_name = cls.__get_material_name(rel.RelatingMaterial)
-                            break
-                        except AttributeError:
-                            continue
+                # Material found directly or through the element's type
+                material_name = material_index.get(element_id)
                 
                 # If no material was found, use default for structural element
                 if material_name is None:
+                    defaulted += 1
                     if element_type in ['IfcBeam', 'IfcColumn']:
                         material_name = 'Structural steel - S235'  # Default material for beams and columns
                     else:
                         material_name = f'Default material for {element_type}'
                 
-                cls.df = pd.concat([
-                    cls.df,
-                    pd.DataFrame([{
-                        'element': element.is_a(),
-                        'material': material_name,
-                        'volume': volume
-                    }])
-                ], ignore_index=True)
-                cls.__update_material_prices(material_name)
+                yield order, element, material_name, volume
                 processed_elements.add(element_id)
+        Instrumentation.record('fallback_pass', time.perf_counter() - pass_started)
+        
+        Instrumentation.count('elements_scanned', scanned)
+        Instrumentation.count('elements_skipped_no_volume', skipped)
+        Instrumentation.count('materials_resolved', len(processed_elements) - defaulted)
+        Instrumentation.count('materials_defaulted', defaulted)
 
     @classmethod
-    def get_material_costs(cls):
-        if cls.df.empty:
+    def __elements_without_volume(cls, model, material_index: MaterialIndex, quantity_index: QuantityIndex,
+                                  structural_types: list, element_filter=None) -> list:
+        """Elements iter_takeoff would skip for lack of a volume quantity."""
+        elements = {}
+        candidates = [element for element, _ in material_index.direct_items()]
+        for element_type in structural_types:
+            candidates.extend(model.by_type(element_type))
+        if element_filter is not None:
+            candidates = [element for element in candidates if element_filter(element)]
+        for element in candidates:
+            if element.id() not in elements and cls.__get_net_volume_from_element(element, quantity_index) is None:
+                elements[element.id()] = element
+        return list(elements.values())
+
+    @classmethod
+    def __extract_rows(cls, model, report, check_cancelled, volume_fallback=None) -> TakeoffBuilder:
+        """
+        Collect the takeoff rows of a parsed IFC model.
+        
+        Rows from iter_takeoff are collected by a TakeoffBuilder; the
+        dataframe is built from it once the whole model was processed.
+        
+        Args:
+            model: ifcopenshell file.
+            report: Progress callable, see load.
+            check_cancelled: Raises LoadCancelled if the load was cancelled.
+            volume_fallback: See iter_takeoff.
+            
+        Returns:
+            TakeoffBuilder holding the extracted rows.
+        """
+        total = len(model.by_type('IfcElement'))
+        builder = TakeoffBuilder(capacity=total)
+        report('extract', 0, total)
+        for rows, (element, material_name, volume) in enumerate(cls.iter_takeoff(model, volume_fallback), 1):
+            builder.add(element.is_a(), material_name, volume, element.GlobalId)
+            if rows % cls.PROGRESS_INTERVAL == 0:
+                check_cancelled()
+                report('extract', rows, total)
+        report('extract', len(builder), total)
+        return builder
+
+    def __set_takeoffs(self, loaded: dict, replace: bool):
+        """
+        Swap completely extracted takeoffs in as loaded models.
+        
+        Args:
+            loaded: File path -> SharedTakeoff.
+            replace: Unload the models not in loaded.
+        """
+        with self.__lock:
+            takeoffs = {} if replace else dict(self.__takeoffs)
+            model_files = {} if replace else dict(self.model_files)
+            released = list(self.__takeoffs.values()) if replace else []
+            # A file which is loaded already keeps its model name, e.g. "m (2)"
+            # when it is reloaded
+            loaded_names = {} if replace else {
+                os.path.abspath(ifc_file): name for name, ifc_file in self.model_files.items()
+            }
+            names = {}
+            for ifc_file in loaded:
+                name = loaded_names.get(os.path.abspath(ifc_file))
+                if name is not None:
+                    names[ifc_file] = name
+            for ifc_file in loaded:
+                if ifc_file in names:
+                    continue
+                name = base_name = self.model_name(ifc_file)
+                # Different files with the same name loaded together are numbered
+                number = 2
+                while name in names.values():
+                    name = f'{base_name} ({number})'
+                    number += 1
+                names[ifc_file] = name
+            for ifc_file, takeoff in loaded.items():
+                name = names[ifc_file]
+                if name in takeoffs:
+                    released.append(takeoffs[name])
+                takeoffs[name] = takeoff
+                model_files[name] = ifc_file
+        
+            for takeoff in loaded.values():
+                self.__add_materials(takeoff.materials)
+            self.__swap_takeoffs(takeoffs, model_files, released)
+        
+            stats = [takeoff.stats for takeoff in loaded.values()]
+            if len(stats) == 1:
+                self.load_stats = dict(stats[0])
+            elif stats:
+                # The files were extracted concurrently
+                rows = sum(stat['rows'] for stat in stats)
+                seconds = max(stat['seconds'] for stat in stats)
+                self.load_stats = {
+                    'rows': rows,
+                    'materials': len({material for takeoff in loaded.values() for material in takeoff.materials}),
+                    'seconds': seconds,
+                    'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+                    'cached': all(stat['cached'] for stat in stats),
+                }
+            else:
+                self.load_stats = {}
+            self.load_stats['models'] = len(takeoffs)
+
+    def __swap_takeoffs(self, takeoffs: dict, model_files: dict, released: list):
+        """Make takeoffs the loaded models and release the replaced takeoffs."""
+        df = self.__combine(takeoffs)
+        with Instrumentation.span('rebuild_totals'):
+            self.__takeoffs = takeoffs
+            self.model_files = model_files
+            self.ifc_file = next(iter(model_files.values()), None)
+            self.df = df
+            self.__rebuild_totals(df)
+        self.__bump_version()
+        for takeoff in released:
+            self.takeoffs.release(takeoff)
+
+    @staticmethod
+    def __combine(takeoffs: dict) -> pd.DataFrame:
+        """
+        Concatenate the takeoffs of the loaded models, adding the categorical
+        'model' column with the model names in load order.
+        """
+        frames = [takeoff.df for takeoff in takeoffs.values()]
+        model = pd.Categorical.from_codes(
+            np.repeat(np.arange(len(frames)), [len(frame) for frame in frames]),
+            categories=pd.Index(list(takeoffs), dtype='str'),
+        )
+        if len(frames) == 1:
+            # Copy-on-write: the columns of the shared takeoff are not copied
+            return frames[0].assign(model=model)
+        if not frames:
+            return TakeoffBuilder().build().assign(model=model)
+        with Instrumentation.span('combine_models'):
+            return pd.DataFrame({
+                # Sorted categories, like the takeoff of a single model
+                'element': union_categoricals([frame['element'] for frame in frames], sort_categories=True),
+                'material': union_categoricals([frame['material'] for frame in frames], sort_categories=True),
+                'volume': np.concatenate([frame['volume'].to_numpy(dtype=np.float64) for frame in frames]),
+                'global_id': pd.concat([frame['global_id'] for frame in frames], ignore_index=True),
+                'model': model,
+            })
+
+    def get_material_costs(self, model: str = None):
+        """
+        Return volume, price and cost per material, of all loaded models or
+        only of the named one.
+        """
+        return self.__get_aggregate('material', self.__compute_material_costs, model)
+
+    def __model_index(self, model: str) -> int:
+        index = np.flatnonzero(self.__models == model)
+        if len(index) == 0:
+            raise KeyError(model)
+        return int(index[0])
+
+    def __compute_material_costs(self, model: str = None):
+        if self.df.empty:
             return pd.DataFrame()
+        if model is not None:
+            index = self.__model_index(model)
+            used = self.__model_material_rows[index] > 0
+            volumes = self.__model_volumes[index].sum(axis=1)[used]
+            prices = self.__prices[used]
+            return pd.DataFrame({
+                'material': pd.Series(self.__materials[used], dtype='str'),
+                'volume': volumes,
+                'price': prices,
+                'cost': prices * volumes,
+            })
         
-        grouped_df = cls.df.groupby('material', as_index=False).agg({'volume': 'sum'})
-        grouped_df = grouped_df.merge(cls.material_prices, on='material', how='left')
-        grouped_df['cost'] = grouped_df['price'] * grouped_df['volume']
-        return grouped_df
+        return pd.DataFrame({
+            'material': pd.Series(self.__materials, dtype='str'),
+            'volume': self.__material_volumes,
+            'price': self.__prices.copy(),
+            'cost': self.__material_cost_values.copy(),
+        })
 
-    @classmethod
-    def get_element_costs(cls):
-        if cls.df.empty:
+    def get_element_costs(self, model: str = None):
+        """
+        Return cost and volume per element class, of all loaded models or
+        only of the named one.
+        """
+        return self.__get_aggregate('element', self.__compute_element_costs, model)
+
+    def __compute_element_costs(self, model: str = None):
+        if self.df.empty:
             return pd.DataFrame()
+        if model is not None:
+            index = self.__model_index(model)
+            used = self.__model_element_rows[index] > 0
+            volume_matrix = self.__model_volumes[index][:, used]
+            return pd.DataFrame({
+                'element': pd.Series(self.__element_classes[used], dtype='str'),
+                'cost': self.__prices @ volume_matrix,
+                'volume': volume_matrix.sum(axis=0),
+            })
         
-        merged_df = cls.df.merge(cls.material_prices, on='material', how='left')
-        merged_df['cost'] = merged_df['price'] * merged_df['volume']
-        grouped_df = merged_df.groupby('element', as_index=False).agg({'cost': 'sum', 'volume': 'sum'})
-        return grouped_df
+        return pd.DataFrame({
+            'element': pd.Series(self.__element_classes, dtype='str'),
+            'cost': self.__element_cost_values.copy(),
+            'volume': self.__volume_matrix.sum(axis=0),
+        })
 
-    @classmethod
-    def get_data(cls, type: str, type_attr: str):
+    def get_model_costs(self):
+        """Return volume and cost per loaded model, in load order."""
+        return self.__get_aggregate('model', self.__compute_model_costs)
+
+    def __compute_model_costs(self):
+        if self.df.empty:
+            return pd.DataFrame()
+        
+        material_volumes = self.__model_volumes.sum(axis=2)
+        return pd.DataFrame({
+            'model': pd.Series(self.__models, dtype='str'),
+            'volume': material_volumes.sum(axis=1),
+            'cost': material_volumes @ self.__prices,
+        })
+
+    def memory_usage(self) -> dict:
+        """
+        Report the memory used by the takeoff DataFrame.
+        
+        Returns:
+            Dictionary of bytes per column, for the index and in total, plus
+            the number of rows.
+        """
+        usage = self.df.memory_usage(index=True, deep=True)
+        report = {column: int(usage[column]) for column in self.df.columns}
+        report['index'] = int(usage['Index'])
+        report['total'] = int(usage.sum())
+        report['rows'] = len(self.df)
+        return report
+
+    def memory_report(self) -> dict:
+        """
+        Compare the memory of the takeoff with that of parsed IFC models.
+        
+        Returns:
+            Dictionary with the bytes of the takeoff DataFrame ('takeoff'),
+            the number and bytes of this session's parsed models retained in
+            memory ('models', 'model_bytes'), of those retained by all
+            sessions ('all_models', 'all_model_bytes'), and the resident
+            bytes of the parser process after its last extraction
+            ('parser_bytes', None without a parser process). Model sizes are
+            the growth of resident memory while parsing, or an estimate from
+            the file size.
+        """
+        retained = [takeoff for takeoff in self.__takeoffs.values() if takeoff.model is not None]
+        shared = self.takeoffs.stats()
+        return {
+            'takeoff': self.memory_usage()['total'],
+            'models': len(retained),
+            'model_bytes': sum(takeoff.model_bytes for takeoff in retained),
+            'all_models': shared['models'],
+            'all_model_bytes': shared['model_bytes'],
+            'parser_bytes': self.parser.resident_bytes if self.parser is not None else None,
+        }
+
+    def get_data(self, type: str, type_attr: str):
         if type == "material":
-            data = cls.get_material_costs()
+            data = self.get_material_costs()
         elif type == "element":
-            data = cls.get_element_costs()
+            data = self.get_element_costs()
+        elif type == "model":
+            data = self.get_model_costs()
         else:
-            raise ValueError('Invalid type. Must be "material" or "element".')
+            raise ValueError('Invalid type. Must be "material", "element" or "model".')
 
         if type_attr not in data.columns:
             raise ValueError(f'Invalid type attribute. Must be one of {list(data.columns)}.')
@@ -276,26 +1117,26 @@ class IfcData:
         if type_attr == 'price':
             type_attr = 'cost'
 
-        return data[['material' if type == 'material' else 'element', type_attr]]
+        return data[[type, type_attr]]
 
-    @classmethod
-    def can_create_pie_chart(cls, type: str, type_attr: str):
+    def can_create_pie_chart(self, type: str, type_attr: str):
         try:
-            data = cls.get_data(type, type_attr)
+            data = self.get_data(type, type_attr)
             if not data.empty and data.iloc[:, 1].sum() > 0:
                 return True
         except ValueError:
             return False
         return False
 
-    @classmethod
-    def get_pie_chart_error_message(cls, type: str, type_attr: str):
+    def get_pie_chart_error_message(self, type: str, type_attr: str):
         if type == "material":
-            data = cls.get_material_costs()
+            data = self.get_material_costs()
         elif type == "element":
-            data = cls.get_element_costs()
+            data = self.get_element_costs()
+        elif type == "model":
+            data = self.get_model_costs()
         else:
-            return 'Nieprawidłowy typ. Musi być "material" lub "element".'
+            return 'Nieprawidłowy typ. Musi być "material", "element" lub "model".'
 
         if data.empty:
             return "Nie ma danych"
@@ -308,10 +1149,8 @@ class IfcData:
 
         return ""
 
-    @classmethod
-    def get_total_cost(cls):
-        material_costs = cls.get_material_costs()
-        return material_costs['cost'].sum()
+    def get_total_cost(self):
+        return self.__total_cost
 
 if __name__ == '__main__':
     print('=== IFC DATA PROCESSING TEST ===')
@@ -344,6 +1183,7 @@ if __name__ == '__main__':
         
         print(f"Success! Processed example_file.ifc")
         print(f"Found {len(material_costs)} materials and {len(element_costs)} element types")
+        print(f"Extracted {ifc_data.load_stats['rows']} rows at {ifc_data.load_stats['rows_per_second']:.0f} rows/s")
         
         if not material_costs.empty:
             print(f"Sample materials: {material_costs['material'].head(3).tolist()}")
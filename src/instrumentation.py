@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+class Instrumentation:
+    """
+    Lightweight, switchable timing spans and counters.
+
+    Spans are aggregated by their path (nested spans are joined with '/'),
+    e.g. 'load/parse'. When instrumentation is disabled, span() returns a
+    shared no-op context manager and count() returns immediately, so the
+    instrumented code pays almost nothing.
+
+    Enabled by setting the KOSZTORYS_PROFILE environment variable or with
+    Instrumentation.set_enabled(True), e.g. from the diagnostics panel.
+    """
+    enabled = bool(os.environ.get('KOSZTORYS_PROFILE'))
+    spans = {}
+    counters = {}
+    __lock = threading.Lock()
+    __local = threading.local()
+    __noop = nullcontext()
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        cls.enabled = enabled
+
+    @classmethod
+    def reset(cls):
+        with cls.__lock:
+            cls.spans = {}
+            cls.counters = {}
+
+    @classmethod
+    def span(cls, name: str):
+        """
+        Time the enclosed block.
+
+        Usage:
+            with Instrumentation.span('parse'):
+                ...
+        """
+        if not cls.enabled:
+            return cls.__noop
+        return cls.__span(name)
+
+    @classmethod
+    @contextmanager
+    def __span(cls, name: str):
+        stack = getattr(cls.__local, 'stack', None)
+        if stack is None:
+            stack = cls.__local.stack = []
+        stack.append(name)
+        path = '/'.join(stack)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            cls.__add(path, seconds)
+
+    @classmethod
+    def record(cls, name: str, seconds: float):
+        """Record a duration measured by the caller as a span nested in the current one."""
+        if not cls.enabled:
+            return
+        stack = getattr(cls.__local, 'stack', None) or []
+        cls.__add('/'.join(stack + [name]), seconds)
+
+    @classmethod
+    def __add(cls, path: str, seconds: float):
+        with cls.__lock:
+            record = cls.spans.setdefault(path, {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            record['calls'] += 1
+            record['total_seconds'] += seconds
+            record['max_seconds'] = max(record['max_seconds'], seconds)
+            record['last_seconds'] = seconds
+
+    @classmethod
+    def count(cls, name: str, n: int = 1):
+        if not cls.enabled:
+            return
+        with cls.__lock:
+            cls.counters[name] = cls.counters.get(name, 0) + n
+
+    @classmethod
+    def to_dict(cls) -> dict:
+        with cls.__lock:
+            return {
+                'enabled': cls.enabled,
+                'spans': {path: dict(record) for path, record in cls.spans.items()},
+                'counters': dict(cls.counters),
+            }
+
+    @classmethod
+    def export_json(cls, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cls.to_dict(), f, indent=2)
@@ -1,5 +1,15 @@
+import threading
+
 import flet as ft
-from app_layout import AppLayout
+
+def warm_up():
+    """Prepare what the first file pick needs while the window is already shown."""
+    from ifc_data import IfcData
+    if IfcData.parser is not None:
+        # The parser process imports ifcopenshell itself
+        IfcData.parser.start()
+    else:
+        import ifcopenshell  # noqa: F401
 
 def main(page: ft.Page):
     page.title = "Kosztorysowanie na podstawie danych IFC"
@@ -7,6 +17,21 @@ def main(page: ft.Page):
     page.window.min_width = 1000
     page.window.min_height = 600
     
+    # Draw a placeholder before the application modules (pandas, numpy) are
+    # imported; ifcopenshell and matplotlib are imported on first use
+    page.add(ft.Row([ft.ProgressRing(), ft.Text("Uruchamianie aplikacji...")], alignment="center"))
+    
+    from app_layout import AppLayout
+    from ifc_data import IfcData
+    from parser_service import ParserService
+    
+    if IfcData.parser is None:
+        # Parse IFC files in a separate process so the UI stays responsive
+        IfcData.parser = ParserService()
+    page.clean()
     AppLayout(page)
+    threading.Thread(target=warm_up, name='WarmUp', daemon=True).start()
 
-ft.app(main)
\ No newline at end of file
+# The parser process imports this module again, it must not start the app
+if __name__ == '__main__':
+    ft.app(main)
\ No newline at end of file
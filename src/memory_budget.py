@@ -0,0 +1,57 @@
+import os
+
+# Resident size of a parsed ifcopenshell model relative to the size of its
+# IFC file, measured with ifcopenshell 0.9 (4-7x); used where the resident
+# memory of the process cannot be read
+MODEL_BYTES_PER_FILE_BYTE = 6
+
+def resident_bytes():
+    """
+    Resident memory of this process in bytes.
+
+    Returns:
+        Number of bytes, or None where it cannot be read (only /proc on
+        Linux is supported).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def model_bytes(ifc_file: str, resident_before=None) -> int:
+    """
+    Size of a model parsed from an IFC file.
+
+    Args:
+        ifc_file: Path to the IFC file.
+        resident_before: resident_bytes() before the model was parsed; the
+            growth of the resident memory since then is the size. Without
+            it, or if the memory did not grow (freed memory was reused), the
+            size is estimated from the file size.
+    """
+    resident = resident_bytes()
+    if resident_before is not None and resident is not None and resident > resident_before:
+        return resident - resident_before
+    try:
+        return os.path.getsize(ifc_file) * MODEL_BYTES_PER_FILE_BYTE
+    except OSError:
+        return 0
+
+def budget_from_env(name: str, default_mb=None):
+    """
+    Memory budget in bytes from an environment variable given in megabytes.
+
+    Returns:
+        Bytes of the variable, or of default_mb if it is not set or not a
+        number; 'none' (or a default_mb of None) means no limit and returns
+        None.
+    """
+    value = os.environ.get(name, '').strip()
+    if value.lower() == 'none':
+        return None
+    try:
+        megabytes = float(value) if value else default_mb
+    except ValueError:
+        megabytes = default_mb
+    return None if megabytes is None else int(megabytes * 1024 * 1024)
@@ -0,0 +1,259 @@
+VOLUME_QUANTITY_NAMES = ('NetVolume', 'Volume', 'GrossVolume', 'TotalVolume')
+# Name of materials whose optional name attribute is not set
+UNNAMED_MATERIAL = 'Unnamed material'
+
+
+def index_types(model) -> dict:
+    """
+    Map the id of every typed element to the id of its type object.
+
+    Args:
+        model: ifcopenshell file.
+
+    Returns:
+        Dictionary of element id -> type object id (first IfcRelDefinesByType wins).
+    """
+    types = {}
+    for defines_by_type in model.by_type('IfcRelDefinesByType'):
+        type_id = defines_by_type.RelatingType.id()
+        for element in defines_by_type.RelatedObjects:
+            types.setdefault(element.id(), type_id)
+    return types
+
+
+class MaterialIndex:
+    """
+    Inverse element -> material name index of an IFC model.
+
+    The index is built in one pass over IfcRelAssociatesMaterial and
+    IfcRelDefinesByType, so resolving the material of an element is a
+    dictionary lookup instead of a scan over all material relationships.
+    """
+
+    def __init__(self, model, types: dict = None):
+        # element id -> (element, material name), in association order
+        self.__direct = {}
+        # element id -> id of its type object
+        self.__types = types if types is not None else index_types(model)
+        self.__build(model)
+
+    def __build(self, model):
+        for associates_material in model.by_type('IfcRelAssociatesMaterial'):
+            try:
+                material_name = self.get_material_name(associates_material.RelatingMaterial)
+            except AttributeError:
+                # Skip this material association if name cannot be extracted
+                continue
+            for element in associates_material.RelatedObjects:
+                self.__direct.setdefault(element.id(), (element, material_name))
+
+    def direct_items(self):
+        """
+        Iterate over elements with a directly associated material.
+
+        Yields:
+            (element, material name) tuples in the order of the material
+            associations in the model.
+        """
+        return self.__direct.values()
+
+    def get(self, element_id: int):
+        """
+        Resolve the material name of an element.
+
+        The directly associated material wins; otherwise the material of
+        the element's type object is used.
+
+        Args:
+            element_id: STEP id of the element.
+
+        Returns:
+            Material name, or None if the element has no resolvable material.
+        """
+        entry = self.__direct.get(element_id)
+        if entry is None:
+            type_id = self.__types.get(element_id)
+            if type_id is not None:
+                entry = self.__direct.get(type_id)
+        return entry[1] if entry is not None else None
+
+    @classmethod
+    def get_material_name(cls, material):
+        """
+        Extract material name from various types of IFC material objects.
+
+        Args:
+            material: IFC material object
+
+        Returns:
+            String representing the material name; UNNAMED_MATERIAL if the
+            material has no name (the optional Name attribute is unset).
+
+        Raises:
+            AttributeError: If material name cannot be extracted.
+        """
+        name = cls.__resolve_name(material)
+        return UNNAMED_MATERIAL if name is None else name
+
+    @classmethod
+    def __resolve_name(cls, material):
+        # Handle direct material with Name attribute
+        if material.is_a('IfcMaterial'):
+            return material.Name
+
+        # Handle IfcMaterialLayerSet
+        elif material.is_a('IfcMaterialLayerSet'):
+            if hasattr(material, 'LayerSetName') and material.LayerSetName:
+                return material.LayerSetName
+            # Fallback to first layer's material name
+            elif hasattr(material, 'MaterialLayers') and material.MaterialLayers:
+                layers = list(material.MaterialLayers)
+                if layers and hasattr(layers[0], 'Material') and layers[0].Material:
+                    return layers[0].Material.Name
+            raise AttributeError(f"Cannot extract name from {material.is_a()}")
+
+        # Handle IfcMaterialLayerSetUsage
+        elif material.is_a('IfcMaterialLayerSetUsage'):
+            if hasattr(material, 'ForLayerSet') and material.ForLayerSet:
+                return cls.__resolve_name(material.ForLayerSet)
+            raise AttributeError(f"Cannot extract name from {material.is_a()}")
+
+        # Handle IfcMaterialList
+        elif material.is_a('IfcMaterialList'):
+            if hasattr(material, 'Materials') and material.Materials:
+                materials = list(material.Materials)
+                if materials and hasattr(materials[0], 'Name'):
+                    return materials[0].Name
+            raise AttributeError(f"Cannot extract name from {material.is_a()}")
+
+        # Handle IfcMaterialConstituentSet
+        elif material.is_a('IfcMaterialConstituentSet'):
+            if hasattr(material, 'Name') and material.Name:
+                return material.Name
+            elif hasattr(material, 'MaterialConstituents') and material.MaterialConstituents:
+                constituents = list(material.MaterialConstituents)
+                if constituents and hasattr(constituents[0], 'Material') and constituents[0].Material:
+                    return constituents[0].Material.Name
+            raise AttributeError(f"Cannot extract name from {material.is_a()}")
+
+        # Fallback for any other material type
+        elif hasattr(material, 'Name'):
+            return material.Name
+
+        # If no name could be found, throw an error
+        raise AttributeError(f"Material of type {material.is_a()} has no extractable name")
+
+
+class QuantityIndex:
+    """
+    Element id -> volume quantities index of an IFC model.
+
+    Built in one sweep over IfcRelDefinesByProperties and the property sets
+    of type objects. Only volume-like properties (see VOLUME_QUANTITY_NAMES)
+    are recorded, so looking up a volume does not build full property set
+    dictionaries for every element.
+    Lookups follow the priority of ifcopenshell.util.element.get_psets:
+    type property sets first, overridden by same-named occurrence sets.
+    """
+
+    def __init__(self, model, types: dict = None, element_filter=None):
+        """
+        Args:
+            model: ifcopenshell file.
+            types: Result of index_types, built here if not given.
+            element_filter: Optional callable(element) -> bool; property
+                sets of elements it rejects are not read, so their volumes
+                cannot be looked up.
+        """
+        # object id -> [(property set name, {volume name: value} or None), ...]
+        self.__occurrence_psets = {}
+        self.__type_psets = {}
+        self.__types = types if types is not None else index_types(model)
+        self.__build(model, element_filter)
+
+    @staticmethod
+    def __read_volumes(definition):
+        """Return the volume-like values of a property definition, or None."""
+        volumes = None
+        if definition.is_a('IfcElementQuantity'):
+            for quantity in definition.Quantities or []:
+                if quantity.Name in VOLUME_QUANTITY_NAMES and quantity.is_a('IfcPhysicalSimpleQuantity'):
+                    if volumes is None:
+                        volumes = {}
+                    volumes[quantity.Name] = quantity[3]
+        elif definition.is_a('IfcPropertySet'):
+            for prop in definition.HasProperties or []:
+                if prop.Name in VOLUME_QUANTITY_NAMES and prop.is_a('IfcPropertySingleValue'):
+                    if volumes is None:
+                        volumes = {}
+                    value = prop.NominalValue
+                    volumes[prop.Name] = value.wrappedValue if value else None
+        return volumes
+
+    @staticmethod
+    def __unpack(definition):
+        # IfcPropertySetDefinitionSet wraps a list of property set definitions
+        if definition.is_a('IfcPropertySetDefinitionSet'):
+            return definition.wrappedValue
+        return (definition,)
+
+    def __build(self, model, element_filter=None):
+        for defines_by_properties in model.by_type('IfcRelDefinesByProperties'):
+            elements = defines_by_properties.RelatedObjects
+            if element_filter is not None:
+                elements = [element for element in elements if element_filter(element)]
+                if not elements:
+                    continue
+            entries = [
+                (definition.Name, self.__read_volumes(definition))
+                for definition in self.__unpack(defines_by_properties.RelatingPropertyDefinition)
+            ]
+            for element in elements:
+                self.__occurrence_psets.setdefault(element.id(), []).extend(entries)
+
+        for type_object in model.by_type('IfcTypeObject'):
+            if type_object.HasPropertySets:
+                self.__type_psets[type_object.id()] = [
+                    (definition.Name, self.__read_volumes(definition))
+                    for definition in type_object.HasPropertySets
+                ]
+
+    def get(self, element_id: int):
+        """
+        Look up the volume of an element.
+
+        A 'NetVolume' in any property set wins; otherwise the first property
+        set holding 'Volume', 'GrossVolume' or 'TotalVolume' is used.
+
+        Args:
+            element_id: STEP id of the element.
+
+        Returns:
+            Volume value, or None if the element has no volume quantity.
+        """
+        if element_id in self.__type_psets:
+            entries = self.__type_psets[element_id]
+        else:
+            entries = self.__occurrence_psets.get(element_id, ())
+            type_id = self.__types.get(element_id)
+            if type_id in self.__type_psets:
+                entries = self.__type_psets[type_id] + list(entries)
+
+        # Merge same-named property sets, keeping the position of the first one
+        psets = {}
+        for name, volumes in entries:
+            merged = psets.get(name)
+            if volumes:
+                psets[name] = {**merged, **volumes} if merged else volumes
+            elif name not in psets:
+                psets[name] = None
+
+        for volumes in psets.values():
+            if volumes and 'NetVolume' in volumes:
+                return volumes['NetVolume']
+        for volumes in psets.values():
+            if volumes:
+                for name in VOLUME_QUANTITY_NAMES[1:]:
+                    if name in volumes:
+                        return volumes[name]
+        return None
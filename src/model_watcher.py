@@ -0,0 +1,93 @@
+import os
+import threading
+
+from ifc_data import IfcData
+
+class ModelWatcher:
+    """
+    Watches the IFC files of the loaded models and reloads a model when its
+    file changes on disk.
+
+    The file is polled for modification time and size; a change is acted on
+    only once the file has stayed the same for one more poll, so a file that
+    is still being written by the exporter is not read half-way.
+    """
+
+    def __init__(self, ifc_data: IfcData, on_reload=None, on_error=None, interval: float = 2.0):
+        """
+        Args:
+            ifc_data: IfcData whose loaded models are watched and reloaded.
+            on_reload: Called with the change summary from IfcData.reload.
+            on_error: Called with the exception if reloading fails.
+            interval: Polling interval in seconds.
+        """
+        self.ifc_data = ifc_data
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.interval = interval
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        # Every thread gets its own event, so a start right after stop cannot
+        # clear the event of the stopped thread and keep it running
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, args=(self.__stop,), name='ModelWatcher', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop.set()
+        self.__thread = None
+
+    @staticmethod
+    def __signature(ifc_file):
+        try:
+            stat = os.stat(ifc_file)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __run(self, stop: threading.Event):
+        # File path -> signature when it was loaded, and a changed signature
+        # waiting for the file to become stable
+        watched_files = list(self.ifc_data.model_files.values())
+        loaded = {ifc_file: self.__signature(ifc_file) for ifc_file in watched_files}
+        pending = {}
+        while not stop.wait(self.interval):
+            ifc_files = list(self.ifc_data.model_files.values())
+            if ifc_files != watched_files:
+                # Models were opened or unloaded, watch the loaded ones from now on
+                watched_files = ifc_files
+                loaded = {ifc_file: self.__signature(ifc_file) for ifc_file in ifc_files}
+                pending = {}
+                continue
+
+            for ifc_file in watched_files:
+                current = self.__signature(ifc_file)
+                if current is None or current == loaded[ifc_file]:
+                    pending.pop(ifc_file, None)
+                    continue
+                if current != pending.get(ifc_file):
+                    # Changed since the last poll, wait until the file is stable
+                    pending[ifc_file] = current
+                    continue
+
+                loaded[ifc_file] = current
+                del pending[ifc_file]
+                if stop.is_set():
+                    return
+                try:
+                    # Only the changed model is extracted again
+                    changes = self.ifc_data.reload(ifc_file)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+                    continue
+                if self.on_reload:
+                    self.on_reload(changes)
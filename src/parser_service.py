@@ -0,0 +1,262 @@
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from ifc_data import IfcData, LoadCancelled
+from instrumentation import Instrumentation
+from memory_budget import budget_from_env, resident_bytes
+from takeoff_builder import TakeoffBuilder
+
+# Order of the arrays in the shared memory block
+SHARED_ARRAYS = ('element_codes', 'material_codes', 'volume', 'global_id')
+
+def _write_shared(codes: dict):
+    """
+    Copy the takeoff arrays of TakeoffBuilder.to_codes into one new shared
+    memory block. GlobalIds are stored as fixed-width ASCII.
+
+    Returns:
+        Tuple of (block name, layout of (array name, dtype, offset, length)).
+    """
+    arrays = dict(codes)
+    global_ids = arrays['global_id']
+    arrays['global_id'] = global_ids.astype(f'S{max((len(g) for g in global_ids), default=1) or 1}')
+    layout = []
+    offset = 0
+    for name in SHARED_ARRAYS:
+        array = np.ascontiguousarray(arrays[name])
+        # Keep every array aligned to 8 bytes
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, array.dtype.str, offset, len(array)))
+        offset += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, dtype, start, length in layout:
+        np.ndarray(length, dtype=dtype, buffer=block.buf, offset=start)[:] = arrays[name]
+    block.close()
+    # The receiving process unlinks the block, so this process must not
+    # clean it up as leaked when it exits
+    resource_tracker.unregister(block._name, 'shared_memory')
+    return block.name, layout
+
+def _read_shared(block_name: str, layout, tables: dict, started: float = None) -> TakeoffBuilder:
+    """Create a TakeoffBuilder from a block written by _write_shared and release the block."""
+    block = shared_memory.SharedMemory(name=block_name)
+    codes = None
+    try:
+        codes = {
+            name: np.ndarray(length, dtype=dtype, buffer=block.buf, offset=start)
+            for name, dtype, start, length in layout
+        }
+        codes['global_id'] = codes['global_id'].astype(str).astype(object)
+        builder = TakeoffBuilder.from_codes({**codes, **tables}, started=started)
+    finally:
+        # Drop the views before closing, the buffer cannot be released while exported
+        codes = None
+        try:
+            block.close()
+        except BufferError:
+            # Still exported by the traceback of an error raised above; the
+            # mapping is released with it, and the error is the one to raise
+            pass
+        finally:
+            block.unlink()
+    return builder
+
+def _unlink_shared(block_name: str):
+    """Release a block written by _write_shared without reading it."""
+    try:
+        block = shared_memory.SharedMemory(name=block_name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+def _serve(requests, responses, memory_budget=None):
+    """
+    Main loop of the parser process: one load request at a time until None
+    is received, or until the process uses more than memory_budget bytes.
+    """
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            request = requests.get(timeout=ParserService.POLL_INTERVAL * 10)
+        except queue.Empty:
+            # Do not outlive the application if it exited without stopping us
+            if not parent.is_alive():
+                return
+            continue
+        if request is None:
+            return
+        ifc_file, workers, settings, file_hash = request
+        try:
+            # With the takeoff cache and reader settings of the requesting session
+            builder, _, cached = IfcData(**settings).extract(
+                ifc_file, workers,
+                progress=lambda stage, done, total: responses.put(('progress', stage, done, total)),
+                file_hash=file_hash,
+            )
+            codes = builder.to_codes()
+            tables = {name: codes.pop(name) for name in ('element_table', 'material_table')}
+            block_name, layout = _write_shared(codes)
+            del builder, codes
+            resident = resident_bytes()
+            recycle = memory_budget is not None and resident is not None and resident > memory_budget
+            responses.put(('done', block_name, layout, tables, cached, resident, recycle))
+            if recycle:
+                # Memory of parsed models is not all returned to the system,
+                # a new process starts with the next request
+                return
+        except Exception as e:
+            # Not every exception can be pickled, send its message instead
+            responses.put(('error', type(e).__name__, str(e)))
+
+class ParserService:
+    """
+    Long-lived worker process which owns ifcopenshell.
+
+    Load requests are sent to the worker, which parses the IFC file and
+    extracts its takeoff with IfcData.extract. The takeoff comes back as one
+    shared memory block (integer codes, volumes and fixed-width GlobalIds)
+    plus the element and material string tables, so no row is pickled and
+    the parsed entity graph never enters the calling process.
+
+    Enabled for the application with IfcData.parser = ParserService().
+
+    ifcopenshell does not return all memory of a parsed model to the system
+    when the model is freed, so the worker grows with every file it parses.
+    It is therefore replaced by a new process after an extraction leaving
+    it above memory_budget bytes.
+    """
+    # Seconds between checks for cancellation while waiting for the worker
+    POLL_INTERVAL = 0.1
+    # Resident bytes above which the worker is replaced; None never replaces it
+    memory_budget = budget_from_env('KOSZTORYS_PARSER_BUDGET_MB', 1024)
+
+    def __init__(self):
+        # Resident bytes of the worker after its last extraction
+        self.resident_bytes = None
+        self.__process = None
+        self.__requests = None
+        self.__responses = None
+        # The worker handles one request at a time; reentrant because
+        # extract starts the worker while holding it
+        self.__lock = threading.RLock()
+        atexit.register(self.stop)
+
+    @property
+    def running(self) -> bool:
+        return self.__process is not None and self.__process.is_alive()
+
+    def start(self):
+        """Start the worker process, e.g. ahead of the first request."""
+        with self.__lock:
+            self.__start()
+
+    def __start(self):
+        if self.running:
+            return
+        # Spawned rather than forked, the calling process runs UI threads
+        context = multiprocessing.get_context('spawn')
+        self.__requests = context.Queue()
+        self.__responses = context.Queue()
+        self.__process = context.Process(
+            target=_serve, args=(self.__requests, self.__responses, self.memory_budget), name='ParserService'
+        )
+        # Not a daemon, so that parallel extraction (IfcData.workers > 1) can
+        # start its own worker processes; stopped when the application exits
+        self.__process.start()
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
+        self.__requests.put(None)
+        self.__process.join(timeout)
+        if self.__process.is_alive():
+            self.__process.terminate()
+        self.__process = None
+
+    def extract(self, ifc_file: str, workers: int = None, progress=None, cancelled=None,
+                settings: dict = None, file_hash: str = None):
+        """
+        Extract the takeoff of an IFC file in the parser process.
+
+        Args:
+            ifc_file: Path to the IFC file.
+            workers: Number of extraction processes, see IfcData.load.
+            progress: Optional callable progress(stage, done, total).
+            cancelled: Optional callable returning True when the load should
+                be abandoned. The worker is terminated at once, even while
+                parsing, and started again on the next request.
+            settings: Extraction settings, see IfcData.settings; defaults to
+                the class-level settings of IfcData.
+            file_hash: Content hash of the file if already known.
+
+        Returns:
+            Tuple of (TakeoffBuilder, whether the takeoff came from the cache).
+
+        Raises:
+            LoadCancelled: If the load was cancelled.
+            RuntimeError: If extraction failed or the worker exited.
+        """
+        started = time.perf_counter()
+        # Requests of other sessions are handled first, stay cancellable meanwhile
+        while not self.__lock.acquire(timeout=self.POLL_INTERVAL):
+            if cancelled is not None and cancelled():
+                raise LoadCancelled(ifc_file)
+        try:
+            self.start()
+            self.__requests.put((
+                ifc_file, workers,
+                settings or {name: getattr(IfcData, name) for name in IfcData.SETTINGS}, file_hash
+            ))
+            while True:
+                if cancelled is not None and cancelled():
+                    self.__process.terminate()
+                    self.__process.join()
+                    self.__process = None
+                    self.__discard_responses()
+                    raise LoadCancelled(ifc_file)
+                try:
+                    message = self.__responses.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    if not self.__process.is_alive():
+                        self.__process = None
+                        raise RuntimeError(f'Parser process exited while loading {ifc_file}')
+                    continue
+
+                kind = message[0]
+                if kind == 'progress':
+                    if progress is not None:
+                        progress(*message[1:])
+                elif kind == 'error':
+                    raise RuntimeError(f'{message[1]}: {message[2]}')
+                else:
+                    _, block_name, layout, tables, cached, self.resident_bytes, recycle = message
+                    if recycle:
+                        self.__process.join()
+                        self.__process = None
+                        Instrumentation.count('parser_recycled')
+                    return _read_shared(block_name, layout, tables, started=started), cached
+        finally:
+            self.__lock.release()
+
+    def __discard_responses(self):
+        """
+        Drop the messages of a terminated worker, releasing the shared
+        memory of a takeoff it finished before it was terminated.
+        """
+        while True:
+            try:
+                message = self.__responses.get_nowait()
+            except queue.Empty:
+                return
+            except Exception:
+                # Terminated while writing the message
+                return
+            if message[0] == 'done':
+                _unlink_shared(message[1])
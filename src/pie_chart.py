@@ -1,42 +1,212 @@
-import matplotlib
-import matplotlib.pyplot as plt
+import io
+import threading
 
-from flet.matplotlib_chart import MatplotlibChart
+from flet import (
+    Column,
+    Container,
+    Image,
+    ImageFit,
+    PieChart as FletPieChart,
+    PieChartSection,
+    Row,
+    Text,
+    TextStyle,
+    alignment,
+)
 
 from ifc_data import IfcData
+from instrumentation import Instrumentation
 
-matplotlib.use("svg")
+class PieChart(Container):
+    """
+    Pie chart of material, element or model costs or volumes, rendered by
+    matplotlib as SVG.
 
-class PieChart(MatplotlibChart):
-    def __init__(self, type: str = "material", type_attr: str = "cost"):
-        self.fig, self.ax = plt.subplots(figsize=(6, 8))  # Zwiększ wysokość wykresu
-        super().__init__(self.fig, transparent=True)
+    Rendered charts are cached by (type, type_attr, IfcData.data_version),
+    so showing a chart of unchanged data again, e.g. when switching back to
+    it in the dropdown, does not render it again. Data versions are unique
+    across IfcData instances, so sessions do not get each other's charts.
+    """
+    CACHE_SIZE = 16
+    # (type, type_attr, data version) -> (svg, aspect ratio), oldest first
+    __cache = {}
+    # Charts may be rendered from background threads, see ChartScheduler
+    __lock = threading.Lock()
 
-        self.__create_chart(type, type_attr)
+    def __init__(self, ifc_data: IfcData, type: str = "material", type_attr: str = "cost"):
+        super().__init__(alignment=alignment.center)
+        svg, aspect_ratio = self.__get_svg(ifc_data, type, type_attr)
+        self.content = Image(src=svg, fit=ImageFit.FILL, aspect_ratio=aspect_ratio)
+        self.ifc_data = ifc_data
         self.type = type
         self.type_attr = type_attr
 
-    def __create_chart(self, type: str = "material", type_attr: str = "cost"):
-        assert type in ["material", "element"], 'type must be either "material" or "element"'
+    @classmethod
+    def __get_svg(cls, ifc_data: IfcData, type: str, type_attr: str):
+        key = (type, type_attr, ifc_data.data_version)
+        with cls.__lock:
+            if key in cls.__cache:
+                Instrumentation.count('pie_chart_cache_hits')
+                return cls.__cache[key]
+            with Instrumentation.span('pie_chart'):
+                fig = cls.__create_figure(ifc_data, type, type_attr)
+                svg = io.StringIO()
+                fig.savefig(svg, format="svg", transparent=True)
+                width, height = fig.get_size_inches()
+                rendered = svg.getvalue(), width / height
+            cls.__cache[key] = rendered
+            while len(cls.__cache) > cls.CACHE_SIZE:
+                del cls.__cache[next(iter(cls.__cache))]
+            return rendered
+
+    @classmethod
+    def export(cls, ifc_data: IfcData, path: str, type: str = "material", type_attr: str = "cost"):
+        """
+        Save the chart as an image; the format follows the file extension
+        (e.g. png, svg, pdf).
+        """
+        cls.__create_figure(ifc_data, type, type_attr).savefig(path, transparent=False)
+
+    @staticmethod
+    def __create_figure(ifc_data: IfcData, type: str = "material", type_attr: str = "cost"):
+        assert type in ["material", "element", "model"], 'type must be "material", "element" or "model"'
         assert type_attr in ["cost", "volume"], 'type_attr must be either "cost" or "volume"'
 
-        data = IfcData.get_data(type, type_attr)
+        data = ifc_data.get_data(type, type_attr)
         labels = data.iloc[:, 0].tolist()
         values = data.iloc[:, 1].tolist()
 
         if sum(values) == 0:
             raise ValueError('Sum of values is zero, cannot create pie chart.')
 
-        wedges, texts, autotexts = self.ax.pie(values, labels=None, autopct='%1.1f%%', startangle=90)
-        self.ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+        # Imported on first use, the native backend does not need matplotlib.
+        # Figure is used without pyplot, which keeps global state and is not
+        # thread-safe; the figure is freed once it is no longer referenced
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(6, 8))  # Zwiększ wysokość wykresu
+        ax = fig.subplots()
+        wedges, texts, autotexts = ax.pie(values, labels=None, autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
         # Add legend below the pie chart
-        self.ax.legend(wedges, labels, loc="upper center", bbox_to_anchor=(0.5, 0.17))
+        ax.legend(wedges, labels, loc="upper center", bbox_to_anchor=(0.5, 0.17))
 
         # Adjust the position of the labels to avoid overlap
         for autotext in autotexts:
             autotext.set_fontsize(8)
             autotext.set_bbox(dict(facecolor='white', edgecolor='none', alpha=0.7))
+        return fig
+
+
+def bucket_other(labels: list, values: list, top_n: int, other_label: str = "Pozostałe"):
+    """
+    Keep the top_n largest categories and sum the rest into one.
+
+    A single remaining category is kept as it is, the bucket is only
+    created for two or more.
+
+    Returns:
+        Tuple of (labels, values, bucketed): labels and values sorted by
+        value, largest first, and whether the last of them is the bucket.
+    """
+    ranked = sorted(zip(labels, values), key=lambda item: item[1], reverse=True)
+    bucketed = len(ranked) > top_n + 1
+    if bucketed:
+        ranked = ranked[:top_n] + [(other_label, sum(value for _, value in ranked[top_n:]))]
+    return [label for label, _ in ranked], [value for _, value in ranked], bucketed
+
+
+class NativePieChart(Container):
+    """
+    Pie chart drawn with Flet's native chart control.
+
+    Only the TOP_N largest categories get their own wedge, the rest is
+    shown as one "Pozostałe" wedge, so the chart stays cheap to draw for
+    models with hundreds of materials. refresh() updates the wedges in
+    place after prices change.
+    """
+    TOP_N = 10
+    # matplotlib's default palette, the same colors as PieChart
+    COLORS = [
+        '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+        '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
+    ]
+    OTHER_COLOR = '#c7c7c7'
+
+    def __init__(self, ifc_data: IfcData, type: str = "material", type_attr: str = "cost"):
+        super().__init__(alignment=alignment.center)
+        self.ifc_data = ifc_data
+        self.type = type
+        self.type_attr = type_attr
+        self.labels = []
+        # Position of the "Pozostałe" wedge, None if every category has its own
+        self.other_index = None
+        self.chart = FletPieChart(sections_space=1, center_space_radius=0, expand=True)
+        self.legend = Column(spacing=2)
+        self.content = Column([self.chart, self.legend], horizontal_alignment="center")
+        with Instrumentation.span('native_pie_chart'):
+            self.__set_data(*self.__get_data())
+
+    def __get_data(self):
+        assert self.type in ["material", "element", "model"], 'type must be "material", "element" or "model"'
+        assert self.type_attr in ["cost", "volume"], 'type_attr must be either "cost" or "volume"'
+
+        data = self.ifc_data.get_data(self.type, self.type_attr)
+        labels, values, bucketed = bucket_other(data.iloc[:, 0].tolist(), data.iloc[:, 1].tolist(), self.TOP_N)
+        if sum(values) == 0:
+            raise ValueError('Sum of values is zero, cannot create pie chart.')
+        return labels, values, len(labels) - 1 if bucketed else None
+
+    def __color(self, index: int) -> str:
+        if index == self.other_index:
+            return self.OTHER_COLOR
+        return self.COLORS[index % len(self.COLORS)]
+
+    @staticmethod
+    def __title(value: float, total: float) -> str:
+        share = value / total * 100
+        # Labels of thin wedges would overlap
+        return f"{share:.1f}%" if share >= 3 else ""
+
+    def __set_data(self, labels: list, values: list, other_index: int = None):
+        total = sum(values)
+        self.labels = labels
+        self.other_index = other_index
+        self.chart.sections = [
+            PieChartSection(
+                value,
+                title=self.__title(value, total),
+                title_style=TextStyle(size=11, color='white'),
+                color=self.__color(i),
+                radius=150,
+            )
+            for i, value in enumerate(values)
+        ]
+        self.legend.controls = [
+            Row([Container(width=12, height=12, bgcolor=self.__color(i)), Text(label, size=12)])
+            for i, label in enumerate(labels)
+        ]
+
+    def refresh(self):
+        """Update the wedges to the current data of the session's IfcData."""
+        with Instrumentation.span('native_pie_chart'):
+            labels, values, other_index = self.__get_data()
+            if labels == self.labels and other_index == self.other_index:
+                # Same categories: only wedge sizes and titles change
+                total = sum(values)
+                for section, value in zip(self.chart.sections, values):
+                    section.value = value
+                    section.title = self.__title(value, total)
+                self.chart.update()
+            else:
+                self.__set_data(labels, values, other_index)
+                self.update()
+
+
+# Backends selectable for the chart shown next to the table
+CHART_BACKENDS = {
+    'native': NativePieChart,
+    'matplotlib': PieChart,
+}
 
-    
-    def will_unmount(self):
-        plt.close('all')
\ No newline at end of file
+def create_pie_chart(ifc_data: IfcData, type: str, type_attr: str, backend: str = 'native'):
+    return CHART_BACKENDS[backend](ifc_data, type, type_attr)
@@ -1,18 +1,38 @@
+from chart_scheduler import ChartScheduler
+from ifc_data import IfcData
+
 class SharedResources:
-    @classmethod
-    def set_body(cls, body):
-        cls.body = body
+    """
+    Objects shared by the components of one session: its IfcData, the body
+    showing tables and charts, the total cost text and the chart scheduler.
+
+    Every session (page) has its own instance, created by AppLayout, so
+    sessions of a web deployment do not see each other's data.
+    """
+
+    def __init__(self, ifc_data: IfcData = None):
+        self.ifc_data = ifc_data if ifc_data is not None else IfcData()
+        self.body = None
+        self.total_cost_text = None
+        self.chart_scheduler = ChartScheduler(self)
+
+    def set_body(self, body):
+        self.body = body
         
-    @classmethod
-    def get_body(cls):
-        assert cls.body is not None, 'Body not set'
-        return cls.body
+    def get_body(self):
+        assert self.body is not None, 'Body not set'
+        return self.body
+
+    def set_total_cost_text(self, total_cost_text):
+        self.total_cost_text = total_cost_text
 
-    @classmethod
-    def set_total_cost_text(cls, total_cost_text):
-        cls.total_cost_text = total_cost_text
+    def update_total_cost(self, total_cost=None):
+        if total_cost is None:
+            total_cost = self.ifc_data.get_total_cost()
+        self.total_cost_text.value = f"Suma kosztów: {total_cost:.2f}"
+        self.total_cost_text.update()
 
-    @classmethod
-    def update_total_cost(cls, total_cost):
-        cls.total_cost_text.value = f"Suma kosztów: {total_cost:.2f}"
-        cls.total_cost_text.update()
+    def close(self):
+        """Release the session's data when the session ends."""
+        self.chart_scheduler.cancel()
+        self.ifc_data.close()
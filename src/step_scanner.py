@@ -0,0 +1,381 @@
+"""
+Takeoff-only reader of IFC STEP files.
+
+ifcopenshell.open builds the complete entity graph of a model, including
+geometry, placements and representations, although the takeoff only needs
+elements, materials, property and quantity sets and their relationships.
+ScannedModel memory-maps the file and scans it with one regular expression
+which matches only the statements of those entity types (see
+KEPT_SUPERTYPES); all other statements are skipped without being parsed or
+stored. Of kept statements only the id, type and file offset are stored in
+arrays; an entity is parsed when it is accessed and freed when it is no
+longer referenced.
+
+ScannedModel and ScannedEntity implement the part of the ifcopenshell file
+and entity_instance API the takeoff extraction uses (by_type, by_id, id,
+is_a, attribute access by name and index, wrappedValue), so
+IfcData.iter_takeoff runs on them unchanged. References to entities that
+were not kept resolve to None.
+"""
+import mmap
+import re
+from array import array
+
+import numpy as np
+
+# Entities of these types and their subtypes are kept, together with all
+# types whose name starts with 'IfcMaterial'
+KEPT_SUPERTYPES = ('IfcRoot', 'IfcPhysicalQuantity', 'IfcProperty')
+# The file is scanned in windows of this size; pages of a scanned window are
+# dropped from the process so the resident memory does not grow with the file
+SCAN_WINDOW = 64 * 1024 * 1024
+
+_SCHEMA = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']+)'")
+_DATA = re.compile(rb"^\s*DATA\s*;", re.M)
+_TOKEN = re.compile(rb"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+    |\#(?P<ref>\d+)
+    |(?P<open>\()
+    |(?P<close>\))
+    |(?P<comma>,)
+    |(?P<null>[$*])
+    |\.(?P<enum>[A-Za-z0-9_]+)\.
+    |(?P<typed>[A-Za-z][A-Za-z0-9_]*)\s*\(
+    |(?P<number>[-+]?[0-9][0-9.]*(?:[eE][-+]?[0-9]+)?)
+    |"(?P<binary>[0-9A-Fa-f]*)"
+)""", re.X)
+_ESCAPE = re.compile(
+    r"\\X2\\((?:[0-9A-Fa-f]{4})+)\\X0\\"
+    r"|\\X4\\((?:[0-9A-Fa-f]{8})+)\\X0\\"
+    r"|\\X\\([0-9A-Fa-f]{2})"
+    r"|\\S\\(.)"
+    r"|\\P[A-I]?\\"
+    r"|\\\\"
+)
+
+def _unescape(match) -> str:
+    utf16, utf32, byte, shifted = match.groups()
+    if utf16:
+        return bytes.fromhex(utf16).decode('utf-16-be')
+    if utf32:
+        return bytes.fromhex(utf32).decode('utf-32-be')
+    if byte:
+        return chr(int(byte, 16))
+    if shifted:
+        return chr(ord(shifted) + 128)
+    if match.group(0) == '\\\\':
+        return '\\'
+    # Code page switch, not needed for the decoded text
+    return ''
+
+def decode_string(raw: bytes) -> str:
+    """Decode a quoted STEP string, including its quotes, to text."""
+    raw = raw[1:-1].replace(b"''", b"'")
+    try:
+        text = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        text = raw.decode('latin-1')
+    return _ESCAPE.sub(_unescape, text) if '\\' in text else text
+
+def _trie_pattern(words) -> bytes:
+    """Regular expression matching any of the words, factored by common prefixes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ''
+        pattern = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie).encode()
+
+
+class _Ref(int):
+    """Reference to another entity instance (#id)."""
+    __slots__ = ()
+
+
+class TypedValue:
+    """A typed value written inline, e.g. IFCVOLUMEMEASURE(1.5)."""
+    __slots__ = ('_model', '_type', '_value')
+
+    def __init__(self, model, type: str, value):
+        self._model = model
+        self._type = type
+        self._value = value
+
+    @property
+    def wrappedValue(self):
+        return self._model._resolve(self._value)
+
+    def is_a(self, name: str = None):
+        if name is None:
+            return self._model._declaration(self._type).name()
+        return self._type == name.upper()
+
+    def __repr__(self):
+        return f'{self.is_a()}({self._value!r})'
+
+
+class ScannedEntity:
+    """Entity instance of a ScannedModel, parsed on first attribute access."""
+    __slots__ = ('_model', '_id', '_type', '_offset', '_arguments')
+
+    def __init__(self, model, id: int, type: str, offset: int):
+        self._model = model
+        self._id = id
+        self._type = type
+        self._offset = offset
+        self._arguments = None
+
+    def id(self) -> int:
+        return self._id
+
+    def is_a(self, name: str = None):
+        if name is None:
+            return self._model._declaration(self._type).name()
+        return self._model._is_subtype(self._type, name.upper())
+
+    def __arguments(self):
+        if self._arguments is None:
+            self._arguments = self._model._parse_arguments(self._offset)
+        return self._arguments
+
+    def __getitem__(self, index: int):
+        return self._model._resolve(self.__arguments()[index])
+
+    def __getattr__(self, name: str):
+        index = self._model._attribute_index(self._type).get(name)
+        if index is None:
+            raise AttributeError(f'{self.is_a()} has no attribute {name}')
+        return self[index]
+
+    def __eq__(self, other):
+        return isinstance(other, ScannedEntity) and other._id == self._id
+
+    def __hash__(self):
+        return hash(self._id)
+
+    def __repr__(self):
+        return f'#{self._id}={self.is_a()}(...)'
+
+
+class ScannedModel:
+    """
+    Takeoff-only view of an IFC file, see the module documentation.
+
+    Usage:
+        with ScannedModel('model.ifc') as model:
+            rows = list(IfcData.iter_takeoff(model))
+    """
+
+    def __init__(self, ifc_file: str):
+        # ifcopenshell is used only for the schema definitions here
+        import ifcopenshell.ifcopenshell_wrapper as wrapper
+
+        self.__file = open(ifc_file, 'rb')
+        try:
+            self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self.__file.close()
+            raise ValueError(f'{ifc_file} is not an IFC file')
+
+        schema_match = _SCHEMA.search(self.__data, 0, 1 << 16)
+        data_match = _DATA.search(self.__data)
+        if schema_match is None or data_match is None:
+            self.close()
+            raise ValueError(f'{ifc_file} is not an IFC file')
+        self.schema = schema_match.group(1).decode('ascii')
+        self.__schema = wrapper.schema_by_name(self.schema)
+
+        self.__declarations = {}
+        self.__attribute_indices = {}
+        self.__subtype_cache = {}
+        # Kept statements sorted by id: ids, type codes into __type_names and
+        # offsets just after the opening parenthesis
+        self.__type_names = []
+        self.__ids = self.__types = self.__offsets = None
+        self.__scan(data_match.end())
+
+    def __kept_types(self):
+        kept = set()
+        for declaration in self.__schema.entities():
+            name = declaration.name()
+            supertype = declaration
+            while supertype is not None and supertype.name() not in KEPT_SUPERTYPES:
+                supertype = supertype.supertype()
+            if supertype is not None or name.startswith('IfcMaterial'):
+                kept.add(name.upper())
+        return kept
+
+    def __scan(self, start: int):
+        statement = re.compile(
+            rb'^[ \t]*#(\d+)[ \t]*=[ \t]*(' + _trie_pattern(sorted(self.__kept_types())) + rb')[ \t]*\(',
+            re.M
+        )
+        data = self.__data
+        ids, types, offsets = array('q'), array('l'), array('q')
+        type_codes = {}
+        # Drop scanned pages only where the platform supports it
+        can_drop = hasattr(data, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+        window_start = start
+        while window_start < len(data):
+            # Windows end after a newline, so no statement header is split
+            window_end = data.find(b'\n', min(window_start + SCAN_WINDOW, len(data)))
+            window_end = len(data) if window_end < 0 else window_end + 1
+            for match in statement.finditer(data, window_start, window_end):
+                type = match.group(2)
+                code = type_codes.get(type)
+                if code is None:
+                    code = type_codes[type] = len(type_codes)
+                    self.__type_names.append(type.decode('ascii'))
+                ids.append(int(match.group(1)))
+                types.append(code)
+                offsets.append(match.end())
+            if can_drop:
+                page_start = window_start // mmap.PAGESIZE * mmap.PAGESIZE
+                data.madvise(mmap.MADV_DONTNEED, page_start, window_end - page_start)
+            window_start = window_end
+
+        order = np.argsort(np.frombuffer(ids, dtype=np.int64), kind='stable')
+        self.__ids = np.frombuffer(ids, dtype=np.int64)[order]
+        self.__types = np.frombuffer(types, dtype=np.dtype(f'i{types.itemsize}'))[order]
+        self.__offsets = np.frombuffer(offsets, dtype=np.int64)[order]
+
+    def close(self):
+        if not self.__data.closed:
+            self.__data.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        """Number of kept entity instances."""
+        return len(self.__ids)
+
+    def __entity(self, position: int) -> ScannedEntity:
+        return ScannedEntity(
+            self, int(self.__ids[position]), self.__type_names[self.__types[position]],
+            int(self.__offsets[position])
+        )
+
+    def by_id(self, id: int):
+        """Return a kept entity, or None if no entity with the id was kept."""
+        position = int(np.searchsorted(self.__ids, id))
+        if position < len(self.__ids) and self.__ids[position] == id:
+            return self.__entity(position)
+        return None
+
+    def by_type(self, name: str, include_subtypes: bool = True) -> list:
+        """
+        Return the kept instances of an entity type, grouped by concrete
+        type and by id within a type like ifcopenshell. Types are visited
+        depth-first, a type before its subtypes.
+        """
+        declarations = []
+        pending = [self.__schema.declaration_by_name(name)]
+        while pending:
+            declaration = pending.pop()
+            declarations.append(declaration)
+            if include_subtypes:
+                pending.extend(reversed(declaration.subtypes()))
+        type_codes = {type_name: code for code, type_name in enumerate(self.__type_names)}
+        result = []
+        for declaration in declarations:
+            code = type_codes.get(declaration.name().upper())
+            if code is not None:
+                result.extend(self.__entity(position) for position in np.flatnonzero(self.__types == code))
+        return result
+
+    def _declaration(self, type: str):
+        declaration = self.__declarations.get(type)
+        if declaration is None:
+            declaration = self.__declarations[type] = self.__schema.declaration_by_name(type)
+        return declaration
+
+    def _attribute_index(self, type: str) -> dict:
+        indices = self.__attribute_indices.get(type)
+        if indices is None:
+            attributes = self._declaration(type).all_attributes()
+            indices = self.__attribute_indices[type] = {
+                attribute.name(): index for index, attribute in enumerate(attributes)
+            }
+        return indices
+
+    def _is_subtype(self, type: str, supertype: str) -> bool:
+        key = (type, supertype)
+        result = self.__subtype_cache.get(key)
+        if result is None:
+            declaration = self._declaration(type)
+            result = False
+            while declaration is not None:
+                if declaration.name().upper() == supertype:
+                    result = True
+                    break
+                declaration = declaration.supertype() if hasattr(declaration, 'supertype') else None
+            self.__subtype_cache[key] = result
+        return result
+
+    def _resolve(self, value):
+        if isinstance(value, _Ref):
+            return self.by_id(value)
+        if isinstance(value, list):
+            return tuple(self._resolve(item) for item in value)
+        return value
+
+    def _parse_arguments(self, offset: int) -> list:
+        """Parse the argument list of the statement whose '(' ends at offset."""
+        data = self.__data
+        match_token = _TOKEN.match
+        # Lists being parsed and the type names of typed values ('' for lists)
+        stack = [[]]
+        typed = ['']
+        position = offset
+        while True:
+            token = match_token(data, position)
+            if token is None:
+                raise ValueError(f'Malformed statement at offset {offset}')
+            position = token.end()
+            kind = token.lastgroup
+            if kind == 'comma':
+                continue
+            if kind == 'close':
+                items = stack.pop()
+                type = typed.pop()
+                if not stack:
+                    return items
+                if type:
+                    stack[-1].append(TypedValue(self, type, items[0] if len(items) == 1 else items))
+                else:
+                    stack[-1].append(items)
+            elif kind == 'open':
+                stack.append([])
+                typed.append('')
+            elif kind == 'typed':
+                stack.append([])
+                typed.append(token.group('typed').decode('ascii').upper())
+            elif kind == 'ref':
+                stack[-1].append(_Ref(token.group('ref')))
+            elif kind == 'string':
+                stack[-1].append(decode_string(token.group('string')))
+            elif kind == 'number':
+                number = token.group('number')
+                stack[-1].append(float(number) if b'.' in number or b'e' in number.lower() else int(number))
+            elif kind == 'enum':
+                enum = token.group('enum').decode('ascii').upper()
+                stack[-1].append(True if enum == 'T' else False if enum == 'F' else enum)
+            elif kind == 'null':
+                stack[-1].append(None)
+            else:
+                stack[-1].append(token.group('binary').decode('ascii'))
@@ -1,43 +1,76 @@
+import math
+
 from flet import (
     DataTable,
     DataColumn,
+    DataColumnSortEvent,
     DataRow,
     DataCell,
     Text,
     TextField,
     ListView,
     InputBorder,
+    Row,
+    IconButton,
 )
-from ifc_data import IfcData
+import numpy as np
 from shared_resources import SharedResources
-from pie_chart import PieChart
+from instrumentation import Instrumentation
 
 class Table(ListView): # it is done like this to make it scrollable
-    def __init__(self, type: str = "material"):
+    def __init__(self, resources: SharedResources, type: str = "material", model: str = None):
         super().__init__()
-        self.table = Table_prim(type)
-        self.controls = [self.table]
+        self.table = Table_prim(resources, type, model)
+        self.controls = [self.table, self.table.pager]
 
 class Table_prim(DataTable):
-    def __init__(self, type: str):
+    """
+    Cost table showing one page of rows at a time.
+    
+    Only the rows of the current page are built as controls, from column
+    arrays of the cost frame, so the time to show the table does not depend
+    on the number of rows. Sorting by any column reorders the arrays and
+    shows the first page again.
+    
+    With several models loaded the table shows all of them, or only the
+    model given by name.
+    """
+    PAGE_SIZE = 100
+    
+    def __init__(self, resources: SharedResources, type: str, model: str = None):
+        # SharedResources of the session the table is shown in
+        self.resources = resources
         self.type = type
+        self.model = model
         if self.type == "material":
+            self.keys = ['material', 'volume', 'price', 'cost']
             self.columns = [
-                DataColumn(Text("Materiał")),
-                DataColumn(Text("Objętość"), numeric=True),
-                DataColumn(Text("Cena jednostkowa"), numeric=True),
-                DataColumn(Text("Koszt"), numeric=True), 
+                DataColumn(Text("Materiał"), on_sort=self.__on_sort),
+                DataColumn(Text("Objętość"), numeric=True, on_sort=self.__on_sort),
+                DataColumn(Text("Cena jednostkowa"), numeric=True, on_sort=self.__on_sort),
+                DataColumn(Text("Koszt"), numeric=True, on_sort=self.__on_sort), 
             ]
         elif self.type == "element":
+            self.keys = ['element', 'volume', 'cost']
             self.columns = [
-                DataColumn(Text("Element")),
-                DataColumn(Text("Objętość"), numeric=True),
-                DataColumn(Text("Koszt"), numeric=True), 
+                DataColumn(Text("Element"), on_sort=self.__on_sort),
+                DataColumn(Text("Objętość"), numeric=True, on_sort=self.__on_sort),
+                DataColumn(Text("Koszt"), numeric=True, on_sort=self.__on_sort), 
             ]
         else:
             raise ValueError('Invalid type. Must be "material" or "element".')
         super().__init__(columns=self.columns)
-        self.__add_data()
+        
+        self.page_index = 0
+        self.previous_page_button = IconButton(icon='chevron_left', on_click=lambda e: self.__change_page(-1))
+        self.next_page_button = IconButton(icon='chevron_right', on_click=lambda e: self.__change_page(1))
+        self.page_text = Text()
+        self.pager = Row(
+            [self.previous_page_button, self.page_text, self.next_page_button],
+            alignment="center"
+        )
+        with Instrumentation.span(f'table_rows_{self.type}'):
+            self.__add_data()
 
     def __update_on_tap(self, e):
         if isinstance(e.control.content, Text):
@@ -46,21 +79,13 @@ class Table_prim(DataTable):
                 border=InputBorder.NONE,
                 on_change=self.__on_text_change
             )
-            self.update()
         else:
             e.control.content = Text(e.control.content.value)
-            self.update()
+        e.control.update()
 
     def __update_chart_if_needed(self):
-        body = SharedResources.get_body()
-        chart = body.get_control('right')
-        if chart is None:
-            return
-        elif isinstance(chart, PieChart):
-            type = chart.type
-            type_attr = chart.type_attr
-            
-            body.add_content(PieChart(type, type_attr), side='right')
+        # Redrawn once typing pauses, off the UI thread
+        self.resources.chart_scheduler.schedule()
 
     def __on_text_change(self, e):
         valid = self.__validate_numeric(e)
@@ -71,66 +96,110 @@ class Table_prim(DataTable):
             cost = new_price * volume
 
             # Update the IfcData material price
-            IfcData.update_material_price(material, new_price)
+            self.resources.ifc_data.update_material_price(material, new_price)
+            
+            # Keep the column arrays in sync for rows shown on other pages
+            position = self.material_rows[material]
+            self.values['price'][position] = new_price
+            self.values['cost'][position] = cost
 
-            # Update the cost cell
-            for row in self.rows:
-                if row.cells[0].content.value == material:
-                    row.cells[3].content.value = f"{cost:.2f}"
-                    break
-            self.update()
+            # Update only the cost cell of the edited row
+            cost_text = self.cost_texts.get(material)
+            if cost_text is not None:
+                cost_text.value = f"{cost:.2f}"
+                cost_text.update()
             self.__update_chart_if_needed()
             self.__update_total_cost()
 
     def __validate_numeric(self, e):
         valid = True
         try:
-            float(e.control.value)
+            # nan and inf would make every total unusable
+            if not math.isfinite(float(e.control.value)):
+                raise ValueError(e.control.value)
             e.control.error_text = None
             valid = True
         except ValueError:
             e.control.error_text = "Wprowadź liczbę"
             valid = False
-        self.update()
+        e.control.update()
         return valid
 
     def __add_data(self):
-        ifc_data = IfcData()
+        ifc_data = self.resources.ifc_data
         if self.type == "material":
-            material_costs = ifc_data.get_material_costs()
-            self.rows = [
-                DataRow(
+            costs = ifc_data.get_material_costs(self.model)
+        elif self.type == "element":
+            costs = ifc_data.get_element_costs(self.model)
+        # The cost frame is shared with other readers, the arrays are copies
+        self.values = {key: costs[key].to_numpy(copy=True) if key in costs else np.array([]) for key in self.keys}
+        self.order = np.arange(len(self.values['volume']))
+        # material -> position in the column arrays
+        self.material_rows = {
+            material: position for position, material in enumerate(self.values['material'])
+        } if self.type == "material" else {}
+        self.__show_page()
+        self.__update_total_cost()
+        
+    def __build_row(self, position: int) -> DataRow:
+        values = self.values
+        if self.type == "material":
+            material = values['material'][position]
+            volume = values['volume'][position]
+            cost_text = self.cost_texts[material] = Text(f"{values['cost'][position]:.2f}")
+            return DataRow(
                 cells=[
-                    DataCell(Text(row['material'])),
-                    DataCell(Text(f"{row['volume']:.2f}")),
+                    DataCell(Text(material)),
+                    DataCell(Text(f"{volume:.2f}")),
                     DataCell(
-                        Text(f"{row['price']:.2f}"),
+                        Text(f"{values['price'][position]:.2f}"),
                         show_edit_icon=True,
                         on_tap=self.__update_on_tap,
-                        data={'material': row['material'], 'volume': row['volume']},
+                        data={'material': material, 'volume': volume},
                     ),
-                    DataCell(Text(f"{row['cost']:.2f}")),
-                ],
-                )
-                for _, row in material_costs.iterrows()
-            ]
-        elif self.type == "element":
-            element_costs = ifc_data.get_element_costs()
-            self.rows = [
-                DataRow(
-                cells=[
-                    DataCell(Text(row['element'])),
-                    DataCell(Text(f"{row['volume']:.2f}")),
-                    DataCell(Text(f"{row['cost']:.2f}")),
+                    DataCell(cost_text),
                 ],
-                )
-                for _, row in element_costs.iterrows()
-            ]
-        self.__update_total_cost()
+            )
+        return DataRow(
+            cells=[
+                DataCell(Text(values['element'][position])),
+                DataCell(Text(f"{values['volume'][position]:.2f}")),
+                DataCell(Text(f"{values['cost'][position]:.2f}")),
+            ],
+        )
+        
+    def __show_page(self):
+        n_rows = len(self.order)
+        n_pages = max((n_rows + self.PAGE_SIZE - 1) // self.PAGE_SIZE, 1)
+        self.page_index = min(max(self.page_index, 0), n_pages - 1)
+        start = self.page_index * self.PAGE_SIZE
+        end = min(start + self.PAGE_SIZE, n_rows)
+        # material -> cost Text of the rows on the current page
+        self.cost_texts = {}
+        self.rows = [self.__build_row(position) for position in self.order[start:end]]
+        
+        self.page_text.value = f"{start + 1}-{end} z {n_rows}"
+        self.previous_page_button.disabled = self.page_index == 0
+        self.next_page_button.disabled = self.page_index == n_pages - 1
+        self.pager.visible = n_pages > 1
+        
+    def __change_page(self, step: int):
+        self.page_index += step
+        self.__show_page()
+        self.update()
+        self.pager.update()
+        
+    def __on_sort(self, e: DataColumnSortEvent):
+        values = self.values[self.keys[e.column_index]]
+        order = np.argsort(values, kind='stable')
+        self.order = order if e.ascending else order[::-1]
+        self.sort_column_index = e.column_index
+        self.sort_ascending = e.ascending
+        self.page_index = 0
+        self.__show_page()
+        self.update()
+        self.pager.update()
 
     def __update_total_cost(self):
-        if self.type == "material":
-            total_cost = sum(float(row.cells[3].content.value) for row in self.rows)
-        else:
-            total_cost = sum(float(row.cells[2].content.value) for row in self.rows)
-        SharedResources.update_total_cost(total_cost)
+        # IfcData keeps the total up to date on every price change
+        self.resources.update_total_cost()
\ No newline at end of file
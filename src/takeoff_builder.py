@@ -0,0 +1,181 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+class TakeoffBuilder:
+    """
+    Collects takeoff rows into columnar buffers and builds the DataFrame once.
+
+    Rows are written into preallocated NumPy arrays which double in size when
+    full, so adding a row is amortised O(1) and the whole extraction stays
+    linear in the number of elements. Element classes and materials are
+    dictionary-encoded while rows are added: the buffers hold int32 codes
+    into tables of distinct names.
+    """
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, capacity: int = None, started: float = None):
+        self.__capacity = max(capacity or self.INITIAL_CAPACITY, 1)
+        self.__element_codes = np.empty(self.__capacity, dtype=np.int32)
+        self.__material_codes = np.empty(self.__capacity, dtype=np.int32)
+        self.__global_ids = np.empty(self.__capacity, dtype=object)
+        self.__volumes = np.empty(self.__capacity, dtype=np.float64)
+        self.__size = 0
+        # name -> code, in order of first appearance
+        self.__element_table = {}
+        self.__material_table = {}
+        # perf_counter() value the throughput figure is measured from
+        self.__started = started if started is not None else time.perf_counter()
+        self.elapsed = 0.0
+
+    def __len__(self):
+        return self.__size
+
+    @property
+    def materials(self) -> list:
+        """Materials discovered while adding rows, in order of first appearance."""
+        return list(self.__material_table)
+
+    def __resized(self, buffer: np.ndarray) -> np.ndarray:
+        new_buffer = np.empty(self.__capacity, dtype=buffer.dtype)
+        new_buffer[:self.__size] = buffer[:self.__size]
+        return new_buffer
+
+    def __grow(self):
+        self.__capacity *= 2
+        self.__element_codes = self.__resized(self.__element_codes)
+        self.__material_codes = self.__resized(self.__material_codes)
+        self.__global_ids = self.__resized(self.__global_ids)
+        self.__volumes = self.__resized(self.__volumes)
+
+    @staticmethod
+    def __encode(table: dict, name: str) -> int:
+        code = table.get(name)
+        if code is None:
+            code = table[name] = len(table)
+        return code
+
+    def add(self, element: str, material: str, volume: float, global_id: str = None):
+        if self.__size == self.__capacity:
+            self.__grow()
+        i = self.__size
+        self.__element_codes[i] = self.__encode(self.__element_table, element)
+        self.__material_codes[i] = self.__encode(self.__material_table, material)
+        self.__volumes[i] = volume
+        self.__global_ids[i] = global_id
+        self.__size += 1
+
+    @staticmethod
+    def __categorical(codes: np.ndarray, table: dict) -> pd.Categorical:
+        # Categories are sorted so that grouping by codes yields sorted names
+        categorical = pd.Categorical.from_codes(codes, categories=pd.Index(list(table), dtype='str'))
+        return categorical.reorder_categories(pd.Index(sorted(table), dtype='str'))
+
+    def build(self) -> pd.DataFrame:
+        """
+        Materialize the collected rows as a takeoff DataFrame.
+
+        Returns:
+            DataFrame with categorical 'element' and 'material' columns, a
+            float64 'volume' column and a 'global_id' column.
+        """
+        n = self.__size
+        df = pd.DataFrame({
+            'element': self.__categorical(self.__element_codes[:n].copy(), self.__element_table),
+            'material': self.__categorical(self.__material_codes[:n].copy(), self.__material_table),
+            'volume': pd.Series(self.__volumes[:n].copy(), dtype='float'),
+            'global_id': pd.Series(self.__global_ids[:n], dtype='str'),
+        })
+        self.elapsed = time.perf_counter() - self.__started
+        return df
+
+    def to_columns(self) -> dict:
+        """
+        Return the collected rows as columns, e.g. to send them between
+        processes.
+        """
+        n = self.__size
+        element_names = np.array(list(self.__element_table), dtype=object)
+        material_names = np.array(list(self.__material_table), dtype=object)
+        return {
+            'element': element_names[self.__element_codes[:n]],
+            'material': material_names[self.__material_codes[:n]],
+            'volume': self.__volumes[:n],
+            'global_id': self.__global_ids[:n],
+        }
+
+    @classmethod
+    def from_columns(cls, columns: dict, started: float = None) -> 'TakeoffBuilder':
+        """
+        Create a builder holding the rows of the given columns.
+
+        Args:
+            columns: Dictionary in the format returned by to_columns.
+            started: perf_counter() value the extraction started at.
+        """
+        n = len(columns['volume'])
+        builder = cls(capacity=n, started=started)
+        element_codes, element_names = pd.factorize(np.asarray(columns['element'], dtype=object))
+        material_codes, material_names = pd.factorize(np.asarray(columns['material'], dtype=object))
+        builder.__element_codes[:n] = element_codes
+        builder.__material_codes[:n] = material_codes
+        builder.__element_table = {name: code for code, name in enumerate(element_names)}
+        builder.__material_table = {name: code for code, name in enumerate(material_names)}
+        builder.__volumes[:n] = columns['volume']
+        builder.__global_ids[:n] = columns['global_id']
+        builder.__size = n
+        return builder
+
+    def to_codes(self) -> dict:
+        """
+        Return the collected rows as integer codes into string tables.
+
+        Unlike to_columns no per-row objects are created, so the arrays can
+        be placed in shared memory as they are.
+        """
+        n = self.__size
+        return {
+            'element_codes': self.__element_codes[:n],
+            'material_codes': self.__material_codes[:n],
+            'volume': self.__volumes[:n],
+            'global_id': self.__global_ids[:n],
+            'element_table': list(self.__element_table),
+            'material_table': list(self.__material_table),
+        }
+
+    @classmethod
+    def from_codes(cls, codes: dict, started: float = None) -> 'TakeoffBuilder':
+        """
+        Create a builder holding the rows of the given codes.
+
+        Args:
+            codes: Dictionary in the format returned by to_codes; the arrays
+                are copied, so they may live in a buffer that is released
+                afterwards.
+            started: perf_counter() value the extraction started at.
+        """
+        n = len(codes['volume'])
+        builder = cls(capacity=n, started=started)
+        builder.__element_codes[:n] = codes['element_codes']
+        builder.__material_codes[:n] = codes['material_codes']
+        builder.__element_table = {name: code for code, name in enumerate(codes['element_table'])}
+        builder.__material_table = {name: code for code, name in enumerate(codes['material_table'])}
+        builder.__volumes[:n] = codes['volume']
+        builder.__global_ids[:n] = codes['global_id']
+        builder.__size = n
+        return builder
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.__size / self.elapsed
+
+    def get_stats(self) -> dict:
+        return {
+            'rows': self.__size,
+            'materials': len(self.__material_table),
+            'seconds': self.elapsed,
+            'rows_per_second': self.rows_per_second,
+        }
@@ -0,0 +1,173 @@
+import argparse
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from takeoff_builder import TakeoffBuilder
+
+def default_cache_dir() -> str:
+    if os.environ.get('KOSZTORYS_CACHE_DIR'):
+        return os.environ['KOSZTORYS_CACHE_DIR']
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'aplikacja_kosztorys', 'takeoff')
+
+class TakeoffCache:
+    """
+    On-disk cache of extracted takeoffs keyed by IFC content hash.
+
+    Each entry is a NumPy .npz file holding the takeoff columns, with the
+    element class and material stored as integer codes into string tables.
+    Entries are keyed by the BLAKE2 hash of the file content and the
+    extractor version, so a changed model or extraction logic never hits a
+    stale entry. When the cache grows beyond max_bytes, the least recently
+    used entries are removed.
+    """
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    SUFFIX = '.npz'
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def hash_file(ifc_file: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(ifc_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key(self, ifc_file: str, version, file_hash: str = None) -> str:
+        """Cache key of a file; pass file_hash if the content hash is already known."""
+        return f'{file_hash or self.hash_file(ifc_file)}-v{version}'
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def __entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(self.SUFFIX)
+        ]
+
+    def get(self, key: str, started: float = None):
+        """
+        Read a cached takeoff.
+
+        Args:
+            key: Cache key from TakeoffCache.key.
+            started: perf_counter() value the load started at.
+
+        Returns:
+            TakeoffBuilder with the cached rows, or None on a cache miss.
+        """
+        path = self.__path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                element_table = data['element_table']
+                material_table = data['material_table']
+                columns = {
+                    'element': element_table[data['element_codes']].astype(object),
+                    'material': material_table[data['material_codes']].astype(object),
+                    'volume': data['volume'],
+                    'global_id': data['global_id'].astype(object),
+                }
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        return TakeoffBuilder.from_columns(columns, started=started)
+
+    def put(self, key: str, builder: TakeoffBuilder):
+        """
+        Store a takeoff and evict old entries if the cache is over its limit.
+
+        Args:
+            key: Cache key from TakeoffCache.key.
+            builder: TakeoffBuilder holding the extracted rows.
+        """
+        columns = builder.to_columns()
+        element_table = list(dict.fromkeys(columns['element']))
+        material_table = list(builder.materials)
+        element_codes = {name: code for code, name in enumerate(element_table)}
+        material_codes = {name: code for code, name in enumerate(material_table)}
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    element_table=np.array(element_table, dtype=str),
+                    element_codes=np.array([element_codes[e] for e in columns['element']], dtype=np.int32),
+                    material_table=np.array(material_table, dtype=str),
+                    material_codes=np.array([material_codes[m] for m in columns['material']], dtype=np.int32),
+                    volume=np.asarray(columns['volume'], dtype=np.float64),
+                    global_id=np.array(columns['global_id'], dtype=str),
+                )
+            os.replace(tmp_path, self.__path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        entries = sorted(self.__entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.unlink(entry.path)
+
+    def invalidate(self, ifc_file: str = None) -> int:
+        """
+        Remove cached takeoffs.
+
+        Args:
+            ifc_file: Remove only the entries of this file (any extractor
+                version); if None the whole cache is cleared.
+
+        Returns:
+            Number of removed entries.
+        """
+        prefix = self.hash_file(ifc_file) + '-' if ifc_file else ''
+        removed = 0
+        for entry in self.__entries():
+            if entry.name.startswith(prefix):
+                os.unlink(entry.path)
+                removed += 1
+        return removed
+
+    def count(self) -> int:
+        return len(self.__entries())
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.__entries())
+
+if __name__ == '__main__':
+    # Imported here, geometry_volume itself imports this module
+    from geometry_volume import VolumeStore
+
+    parser = argparse.ArgumentParser(description='Manage the takeoff cache and the stored geometry volumes.')
+    parser.add_argument('command', choices=['info', 'clear'])
+    parser.add_argument('ifc_file', nargs='?', help='clear only the entries of this IFC file')
+    args = parser.parse_args()
+
+    cache = TakeoffCache()
+    volumes = VolumeStore()
+    if args.command == 'clear':
+        file_hash = cache.hash_file(args.ifc_file) if args.ifc_file else None
+        print(f'Removed {cache.invalidate(args.ifc_file)} entries from {cache.directory}')
+        print(f'Removed {volumes.invalidate(file_hash)} entries from {volumes.directory}')
+    else:
+        for store in (cache, volumes):
+            print(f'{store.directory}: {store.count()} entries, '
+                  f'{store.size() / 1024 / 1024:.1f} MB of {store.max_bytes / 1024 / 1024:.0f} MB')
@@ -0,0 +1,151 @@
+import threading
+
+from memory_budget import budget_from_env
+
+class SharedTakeoff:
+    """
+    A takeoff extracted once and shared by all IfcData instances which
+    loaded the same file content with the same extraction settings.
+
+    df and model are shared between sessions and must not be modified.
+    model is the parsed ifcopenshell model while the registry retains it
+    (see TakeoffRegistry.retain_model), model_bytes its size.
+    """
+    __slots__ = ('key', 'df', 'materials', 'model', 'model_bytes', 'stats', 'references')
+
+    def __init__(self, key: str, df, materials: list, stats: dict):
+        self.key = key
+        self.df = df
+        self.materials = materials
+        self.model = None
+        self.model_bytes = 0
+        self.stats = stats
+        self.references = 0
+
+
+class TakeoffRegistry:
+    """
+    Reference-counted registry of the takeoffs held by IfcData instances,
+    keyed by IFC content hash and extraction settings.
+
+    The first session loading a file extracts it; sessions loading the same
+    file meanwhile wait for that extraction instead of parsing the file
+    again. A takeoff is dropped once the last session holding it releases
+    it; the on-disk TakeoffCache still has it then.
+
+    Parsed models are far larger than their takeoffs and are only needed
+    for entity access, so they are retained within model_budget: the least
+    recently used models are released when the budget is exceeded.
+    """
+    # Seconds between cancellation checks while waiting for another session
+    POLL_INTERVAL = 0.1
+    # Bytes of parsed models retained by all sessions; 0 releases every
+    # model after extraction, None retains all of them
+    model_budget = budget_from_env('KOSZTORYS_MODEL_BUDGET_MB', 0)
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # key -> SharedTakeoff held by at least one session
+        self.__takeoffs = {}
+        # key -> Event set when a running extraction finished or failed
+        self.__pending = {}
+        # key -> SharedTakeoff with a retained model, least recently used first
+        self.__models = {}
+
+    def acquire(self, key: str, extract, check_cancelled=None) -> SharedTakeoff:
+        """
+        Return the takeoff for a key and add a reference to it.
+
+        Args:
+            key: File content hash and extraction settings.
+            extract: Called without arguments to extract the takeoff if no
+                session holds it; returns a SharedTakeoff.
+            check_cancelled: Optional callable raising if the load was
+                cancelled, checked while waiting for another session.
+
+        Raises:
+            Whatever extract raises; sessions waiting for a failed
+            extraction then try it themselves.
+        """
+        while True:
+            with self.__lock:
+                takeoff = self.__takeoffs.get(key)
+                if takeoff is not None:
+                    takeoff.references += 1
+                    return takeoff
+                pending = self.__pending.get(key)
+                if pending is None:
+                    pending = self.__pending[key] = threading.Event()
+                    break
+            while not pending.wait(self.POLL_INTERVAL):
+                if check_cancelled is not None:
+                    check_cancelled()
+
+        try:
+            takeoff = extract()
+            with self.__lock:
+                takeoff.references = 1
+                self.__takeoffs[key] = takeoff
+            return takeoff
+        finally:
+            with self.__lock:
+                del self.__pending[key]
+            pending.set()
+
+    def release(self, takeoff: SharedTakeoff):
+        """Remove a reference; the takeoff is dropped with the last one."""
+        with self.__lock:
+            takeoff.references -= 1
+            if takeoff.references <= 0 and self.__takeoffs.get(takeoff.key) is takeoff:
+                del self.__takeoffs[takeoff.key]
+                self.__drop_model(takeoff)
+
+    def retain_model(self, takeoff: SharedTakeoff, model, model_bytes: int) -> bool:
+        """
+        Keep the parsed model of a held takeoff if it fits model_budget,
+        releasing least recently used models of other takeoffs to make room.
+
+        Returns:
+            Whether the model is retained.
+        """
+        with self.__lock:
+            budget = self.model_budget
+            if self.__takeoffs.get(takeoff.key) is not takeoff or (budget is not None and model_bytes > budget):
+                return False
+            self.__drop_model(takeoff)
+            takeoff.model = model
+            takeoff.model_bytes = model_bytes
+            self.__models[takeoff.key] = takeoff
+            if budget is not None:
+                used = sum(retained.model_bytes for retained in self.__models.values())
+                for retained in list(self.__models.values()):
+                    if used <= budget:
+                        break
+                    if retained is not takeoff:
+                        used -= retained.model_bytes
+                        self.__drop_model(retained)
+            return True
+
+    def model(self, takeoff: SharedTakeoff):
+        """Return the retained model of a takeoff, or None, and mark it as recently used."""
+        with self.__lock:
+            if takeoff.model is not None and self.__models.get(takeoff.key) is takeoff:
+                # Moved to the end of the least recently used order
+                self.__models[takeoff.key] = self.__models.pop(takeoff.key)
+            return takeoff.model
+
+    def __drop_model(self, takeoff: SharedTakeoff):
+        if self.__models.get(takeoff.key) is takeoff:
+            del self.__models[takeoff.key]
+        takeoff.model = None
+        takeoff.model_bytes = 0
+
+    def stats(self) -> dict:
+        """Number of held takeoffs, of references to them and of retained models and their bytes."""
+        with self.__lock:
+            return {
+                'takeoffs': len(self.__takeoffs),
+                'references': sum(takeoff.references for takeoff in self.__takeoffs.values()),
+                'models': len(self.__models),
+                'model_bytes': sum(takeoff.model_bytes for takeoff in self.__models.values()),
+            }
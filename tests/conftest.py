@@ -0,0 +1,79 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from ifc_data import IfcData  # noqa: E402
+from synthetic_model import generate_model  # noqa: E402
+from takeoff_registry import TakeoffRegistry  # noqa: E402
+
+EXAMPLE_FILE = os.path.join(ROOT, 'example_file.ifc')
+
+# Two beams sharing a material profile set without a name and a volume
+# quantity, as written by some exporters
+UNNAMED_MATERIAL_FILE = """ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION((''),'2;1');
+FILE_NAME('unnamed.ifc','',(''),(''),'','','');
+FILE_SCHEMA(('IFC4'));
+ENDSEC;
+DATA;
+#1=IFCPROJECT('0YvctVUKr0kugbFTf53O9L',$,'P',$,$,$,$,$,$);
+#10=IFCBEAM('1YvctVUKr0kugbFTf53O9L',$,'B0',$,$,$,$,$,$);
+#11=IFCBEAM('2YvctVUKr0kugbFTf53O9L',$,'B1',$,$,$,$,$,$);
+#20=IFCMATERIALPROFILESET($,$,(),$);
+#21=IFCRELASSOCIATESMATERIAL('3YvctVUKr0kugbFTf53O9L',$,$,$,(#10,#11),#20);
+#30=IFCQUANTITYVOLUME('NetVolume',$,$,1.5,$);
+#31=IFCELEMENTQUANTITY('4YvctVUKr0kugbFTf53O9L',$,'Qto_BeamBaseQuantities',$,$,(#30));
+#32=IFCRELDEFINESBYPROPERTIES('5YvctVUKr0kugbFTf53O9L',$,$,$,(#10,#11),#31);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+@pytest.fixture(autouse=True)
+def isolated_ifc_data(tmp_path, monkeypatch):
+    """
+    Run every test with its own takeoff registry, with the default takeoff
+    settings, without the takeoff cache and parser process, and with serial
+    extraction. Files written to the cache directory, e.g. computed geometry
+    volumes, go to a temporary directory, also in worker processes.
+    """
+    monkeypatch.setenv('KOSZTORYS_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(IfcData, 'takeoffs', TakeoffRegistry())
+    monkeypatch.setattr(IfcData, 'cache', None)
+    monkeypatch.setattr(IfcData, 'parser', None)
+    monkeypatch.setattr(IfcData, 'takeoff_only', False)
+    monkeypatch.setattr(IfcData, 'geometry_volumes', False)
+    monkeypatch.setattr(IfcData, 'workers', 1)
+
+@pytest.fixture
+def example_file():
+    return EXAMPLE_FILE
+
+@pytest.fixture
+def unnamed_material_file(tmp_path):
+    path = tmp_path / 'unnamed.ifc'
+    path.write_text(UNNAMED_MATERIAL_FILE)
+    return str(path)
+
+@pytest.fixture
+def copy_example(tmp_path):
+    """Copy example_file.ifc to a path relative to tmp_path."""
+    def copy(relative_path: str) -> str:
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(EXAMPLE_FILE, path)
+        return str(path)
+    return copy
+
+@pytest.fixture(scope='session')
+def synthetic_file(tmp_path_factory):
+    """Synthetic model with layer set usages, type objects and untyped elements."""
+    path = str(tmp_path_factory.mktemp('synthetic') / 'synthetic.ifc')
+    generate_model(path, walls=100, slabs=50, beams=150, materials=8)
+    return path
@@ -0,0 +1,25 @@
+"""
+Costs of a loaded takeoff grouped directly from IfcData.df, independent of
+the cost totals IfcData maintains across price edits.
+"""
+import pytest
+
+from ifc_data import IfcData
+
+def recomputed_costs(ifc_data: IfcData):
+    """Material and element class costs grouped from df, without the maintained totals."""
+    df = ifc_data.df.astype({'element': 'str', 'material': 'str'})
+    cost = df['volume'] * df['material'].map(ifc_data.material_prices).fillna(0.0)
+    return (
+        cost.groupby(df['material']).sum().to_dict(),
+        cost.groupby(df['element']).sum().to_dict(),
+        float(cost.sum()),
+    )
+
+def assert_totals_match(ifc_data: IfcData):
+    materials, elements, total = recomputed_costs(ifc_data)
+    material_costs = ifc_data.get_material_costs()
+    element_costs = ifc_data.get_element_costs()
+    assert dict(zip(material_costs['material'], material_costs['cost'])) == pytest.approx(materials, rel=1e-12)
+    assert dict(zip(element_costs['element'], element_costs['cost'])) == pytest.approx(elements, rel=1e-12)
+    assert ifc_data.get_total_cost() == pytest.approx(total, rel=1e-12)
@@ -0,0 +1,75 @@
+"""
+Reference takeoff of an IFC model, computed the way IfcData did before the
+model indexes: volumes through ifcopenshell.util.element.get_psets for
+every element and materials by scanning all material associations. Slow,
+but independent of MaterialIndex and QuantityIndex.
+"""
+import ifcopenshell.util.element as util_element
+
+from model_index import MaterialIndex
+
+STRUCTURAL_TYPES = ['IfcBeam', 'IfcColumn', 'IfcSlab', 'IfcWall', 'IfcStairFlight']
+
+def reference_volume(element):
+    """Volume of an element from its property and quantity sets, or None."""
+    psets = util_element.get_psets(element)
+    for pset in psets.values():
+        if 'NetVolume' in pset:
+            return pset['NetVolume']
+    for pset in psets.values():
+        for name in ('Volume', 'GrossVolume', 'TotalVolume'):
+            if name in pset:
+                return pset[name]
+    return None
+
+def reference_material(model, element):
+    """Name of the material associated with an element or, failing that, with its type."""
+    for candidate in (element, util_element.get_type(element)):
+        if candidate is None:
+            continue
+        for associates_material in model.by_type('IfcRelAssociatesMaterial'):
+            if candidate.id() in [related.id() for related in associates_material.RelatedObjects]:
+                try:
+                    return MaterialIndex.get_material_name(associates_material.RelatingMaterial)
+                except AttributeError:
+                    continue
+    return None
+
+def reference_takeoff(model) -> list:
+    """
+    Returns:
+        (element class, material name, volume, GlobalId) tuples in the order
+        of IfcData.iter_takeoff.
+    """
+    rows = []
+    processed = set()
+    for associates_material in model.by_type('IfcRelAssociatesMaterial'):
+        try:
+            material_name = MaterialIndex.get_material_name(associates_material.RelatingMaterial)
+        except AttributeError:
+            continue
+        for element in associates_material.RelatedObjects:
+            if element.id() in processed:
+                continue
+            volume = reference_volume(element)
+            if volume is None:
+                continue
+            rows.append((element.is_a(), material_name, volume, element.GlobalId))
+            processed.add(element.id())
+
+    for element_type in STRUCTURAL_TYPES:
+        for element in model.by_type(element_type):
+            if element.id() in processed:
+                continue
+            volume = reference_volume(element)
+            if volume is None:
+                continue
+            material_name = reference_material(model, element)
+            if material_name is None:
+                if element_type in ['IfcBeam', 'IfcColumn']:
+                    material_name = 'Structural steel - S235'
+                else:
+                    material_name = f'Default material for {element_type}'
+            rows.append((element.is_a(), material_name, volume, element.GlobalId))
+            processed.add(element.id())
+    return rows
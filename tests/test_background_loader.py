@@ -0,0 +1,56 @@
+import threading
+
+from background_loader import BackgroundLoader
+from ifc_data import IfcData
+
+class Callbacks:
+    """Records the final callback of a background load."""
+
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def __getattr__(self, name):
+        if not name.startswith('on_'):
+            raise AttributeError(name)
+        def callback(*args):
+            self.calls.append((name, args))
+            self.done.set()
+        return callback
+
+    def loader(self, ifc_data: IfcData, on_progress=None) -> BackgroundLoader:
+        return BackgroundLoader(
+            ifc_data, on_progress=on_progress, on_loaded=self.on_loaded,
+            on_error=self.on_error, on_cancelled=self.on_cancelled
+        )
+
+def test_load_reports_progress(example_file):
+    ifc_data = IfcData()
+    stages = []
+    callbacks = Callbacks()
+    callbacks.loader(ifc_data, lambda stage, done, total: stages.append(stage)).start(example_file)
+    assert callbacks.done.wait(30)
+    assert callbacks.calls == [('on_loaded', (example_file,))]
+    assert 'extract' in stages
+    assert len(ifc_data.df) == 440
+
+def test_cancelled_load_keeps_previous_model(example_file, copy_example):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    callbacks = Callbacks()
+    loader = callbacks.loader(ifc_data, lambda stage, done, total: loader.cancel())
+    other = copy_example('other.ifc')
+    loader.start(other)
+    assert callbacks.done.wait(30)
+    assert callbacks.calls == [('on_cancelled', (other,))]
+    assert list(ifc_data.model_files) == ['example_file']
+    assert len(ifc_data.df) == 440
+
+def test_failed_load_calls_on_error(example_file, tmp_path):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    callbacks = Callbacks()
+    callbacks.loader(ifc_data).start(str(tmp_path / 'missing.ifc'))
+    assert callbacks.done.wait(30)
+    assert [name for name, _ in callbacks.calls] == ['on_error']
+    assert list(ifc_data.model_files) == ['example_file']
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+
+import pandas as pd
+import pytest
+
+import batch_costing
+
+_cost_file = batch_costing.cost_file
+
+# A beam without volume quantities, so the takeoff of the file is empty
+NO_VOLUME_FILE = """ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION((''),'2;1');
+FILE_NAME('no_volumes.ifc','',(''),(''),'','','');
+FILE_SCHEMA(('IFC4'));
+ENDSEC;
+DATA;
+#1=IFCPROJECT('0YvctVUKr0kugbFTf53O9L',$,'P',$,$,$,$,$,$);
+#10=IFCBEAM('1YvctVUKr0kugbFTf53O9L',$,'B0',$,$,$,$,$,$);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+def crashing_cost_file(ifc_file: str) -> dict:
+    """cost_file whose worker process dies on files named crash.ifc."""
+    if os.path.basename(ifc_file) == 'crash.ifc':
+        os._exit(1)
+    return _cost_file(ifc_file)
+
+def test_price_catalogue_rejects_invalid_prices(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text('material,price\nConcrete,100\nSteel,\n')
+    with pytest.raises(ValueError, match='Steel'):
+        batch_costing.read_price_catalogue(str(path))
+    path.write_text('material,price\nConcrete,100\nSteel,2.5\n')
+    assert batch_costing.read_price_catalogue(str(path)) == {'Concrete': 100.0, 'Steel': 2.5}
+
+def test_batch_reports_every_file(example_file, tmp_path):
+    missing = str(tmp_path / 'missing.ifc')
+    result = batch_costing.run_batch(
+        [example_file, missing], {}, str(tmp_path / 'reports'), workers=2, use_cache=False
+    )
+    summary = result['summary']
+    assert list(summary['file']) == [example_file, missing]
+    assert list(summary['status']) == ['ok', 'error']
+    assert result['failed'] == 1
+    assert len(pd.read_csv(tmp_path / 'reports' / 'example_file_materials.csv')) > 0
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='the crashing cost_file is patched into forked workers only')
+def test_dying_worker_fails_only_its_file(example_file, copy_example, tmp_path, monkeypatch):
+    crash = copy_example('crash.ifc')
+    second = copy_example('second.ifc')
+    monkeypatch.setattr(batch_costing, 'cost_file', crashing_cost_file)
+    result = batch_costing.run_batch(
+        [example_file, crash, second], {}, str(tmp_path / 'reports'), workers=2, use_cache=False
+    )
+    summary = result['summary']
+    assert list(summary['status']) == ['ok', 'error', 'ok']
+    assert summary['error'][1].startswith('BrokenProcessPool')
+    assert list(summary['rows']) == [440, 0, 440]
+
+def test_file_without_volumes_gets_empty_reports(example_file, tmp_path):
+    no_volumes = tmp_path / 'no_volumes.ifc'
+    no_volumes.write_text(NO_VOLUME_FILE)
+    reports = tmp_path / 'reports'
+    result = batch_costing.run_batch([str(no_volumes)], {}, str(reports), workers=1, use_cache=False)
+    assert list(result['summary']['status']) == ['ok']
+    assert list(result['summary']['rows']) == [0]
+    assert list(pd.read_csv(reports / 'no_volumes_materials.csv').columns) == ['material', 'volume', 'price', 'cost']
+    assert list(pd.read_csv(reports / 'no_volumes_elements.csv').columns) == ['element', 'cost', 'volume']
+    assert pd.read_csv(reports / 'combined_materials.csv').empty
+    assert (reports / 'summary.csv').exists()
+
+    result = batch_costing.run_batch(
+        [str(no_volumes), example_file], {}, str(reports), workers=1, use_cache=False
+    )
+    assert result['failed'] == 0
+    combined = pd.read_csv(reports / 'combined_materials_by_file.csv')
+    assert set(combined['file']) == {example_file}
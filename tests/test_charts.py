@@ -0,0 +1,134 @@
+import threading
+import time
+
+import flet
+import pandas as pd
+import pytest
+
+from chart_scheduler import ChartScheduler
+from ifc_data import IfcData
+from instrumentation import Instrumentation
+from pie_chart import NativePieChart, PieChart, bucket_other
+from shared_resources import SharedResources
+
+class FakeBody:
+    """Body holding only the chart, records the charts added to it."""
+
+    def __init__(self, chart):
+        self.chart = chart
+        self.added = []
+        self.changed = threading.Event()
+
+    def get_control(self, side: str):
+        return self.chart
+
+    def add_content(self, content, side='left'):
+        self.chart = content
+        self.added.append(content)
+        self.changed.set()
+
+@pytest.fixture
+def ifc_data(example_file, monkeypatch):
+    monkeypatch.setattr(flet.Control, 'update', lambda self, *args, **kwargs: None)
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    ifc_data.update_material_prices({material: 1.0 for material in ifc_data.material_prices})
+    return ifc_data
+
+@pytest.fixture
+def cache_hits(monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'enabled', True)
+    Instrumentation.reset()
+    yield lambda: Instrumentation.counters.get('pie_chart_cache_hits', 0)
+    Instrumentation.reset()
+
+def test_chart_of_unchanged_data_is_cached(ifc_data, cache_hits):
+    first = PieChart(ifc_data, 'element', 'cost')
+    second = PieChart(ifc_data, 'element', 'cost')
+    assert cache_hits() == 1
+    assert second.content.src == first.content.src
+    PieChart(ifc_data, 'element', 'volume')
+    assert cache_hits() == 1
+
+def test_price_edit_renders_again(ifc_data, cache_hits):
+    first = PieChart(ifc_data, 'material', 'cost')
+    ifc_data.update_material_price(next(iter(ifc_data.material_prices)), 50.0)
+    second = PieChart(ifc_data, 'material', 'cost')
+    assert cache_hits() == 0
+    assert second.content.src != first.content.src
+
+def test_sessions_do_not_share_charts(ifc_data, example_file, cache_hits):
+    PieChart(ifc_data, 'material', 'volume')
+    other = IfcData()
+    other.load(example_file)
+    PieChart(other, 'material', 'volume')
+    assert cache_hits() == 0
+
+def test_scheduler_coalesces_requests(ifc_data, monkeypatch):
+    monkeypatch.setattr(ChartScheduler, 'DELAY', 0.2)
+    resources = SharedResources(ifc_data)
+    body = FakeBody(PieChart(ifc_data, 'material', 'cost'))
+    resources.set_body(body)
+    for price in range(20):
+        ifc_data.update_material_price(next(iter(ifc_data.material_prices)), float(price + 2))
+        resources.chart_scheduler.schedule()
+    assert body.changed.wait(30)
+    time.sleep(0.5)
+    assert len(body.added) == 1
+    assert body.added[0].ifc_data is ifc_data
+    assert body.added[0].content.src == PieChart(ifc_data, 'material', 'cost').content.src
+
+def test_cancelled_refresh_does_not_run(ifc_data):
+    resources = SharedResources(ifc_data)
+    body = FakeBody(PieChart(ifc_data, 'material', 'cost'))
+    resources.set_body(body)
+    resources.chart_scheduler.schedule(0.05)
+    resources.chart_scheduler.cancel()
+    assert not body.changed.wait(0.3)
+
+class FakeData:
+    """IfcData stand-in returning fixed chart data."""
+
+    def __init__(self, values: dict):
+        self.values = values
+
+    def get_data(self, type: str, type_attr: str) -> pd.DataFrame:
+        return pd.DataFrame({type: list(self.values), type_attr: list(self.values.values())})
+
+def categories(n: int) -> dict:
+    return {f'M{i:02d}': float(100 - i) for i in range(n)}
+
+@pytest.mark.parametrize('n, bucketed', [(10, False), (11, False), (12, True), (30, True)])
+def test_bucket_other(n, bucketed):
+    data = categories(n)
+    labels, values, other = bucket_other(list(data), list(data.values()), 10)
+    assert other == bucketed
+    assert sum(values) == pytest.approx(sum(data.values()))
+    assert len(labels) == (11 if bucketed else n)
+    assert values[:10] == sorted(values[:10], reverse=True)
+    assert (labels[-1] == 'Pozostałe') == bucketed
+
+@pytest.mark.parametrize('n', [11, 12])
+def test_only_the_bucket_is_grey(n, monkeypatch):
+    monkeypatch.setattr(flet.Control, 'update', lambda self, *args, **kwargs: None)
+    chart = NativePieChart(FakeData(categories(n)), 'material', 'cost')
+    colors = [section.color for section in chart.chart.sections]
+    grey = [label for label, color in zip(chart.labels, colors) if color == NativePieChart.OTHER_COLOR]
+    assert grey == (['Pozostałe'] if n > 11 else [])
+
+def test_material_named_like_the_bucket_keeps_its_color(monkeypatch):
+    monkeypatch.setattr(flet.Control, 'update', lambda self, *args, **kwargs: None)
+    data = categories(10)
+    data['Pozostałe'] = 1.0
+    chart = NativePieChart(FakeData(data), 'material', 'cost')
+    assert NativePieChart.OTHER_COLOR not in [section.color for section in chart.chart.sections]
+
+def test_refresh_regroups_when_categories_change(monkeypatch):
+    monkeypatch.setattr(flet.Control, 'update', lambda self, *args, **kwargs: None)
+    data = FakeData(categories(11))
+    chart = NativePieChart(data, 'material', 'cost')
+    data.values = categories(13)
+    chart.refresh()
+    assert chart.labels[-1] == 'Pozostałe' and chart.other_index == 10
+    assert chart.chart.sections[10].color == NativePieChart.OTHER_COLOR
+    assert len(chart.legend.controls) == 11
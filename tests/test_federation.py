@@ -0,0 +1,70 @@
+import concurrent.futures
+
+import pytest
+
+import ifc_data as ifc_data_module
+from ifc_data import IfcData
+from reference_costs import assert_totals_match
+from test_lazy_imports import imported_after
+
+def test_models_are_tagged_and_costed_per_model(example_file, copy_example):
+    ifc_data = IfcData()
+    ifc_data.load_models([example_file, copy_example('struct.ifc')])
+    assert list(ifc_data.model_files) == ['example_file', 'struct']
+    assert len(ifc_data.df) == 880
+    ifc_data.update_material_prices({material: 2.0 for material in ifc_data.material_prices})
+    model_costs = ifc_data.get_model_costs()
+    assert model_costs['cost'].sum() == pytest.approx(ifc_data.get_total_cost())
+    assert_totals_match(ifc_data)
+    ifc_data.unload_model('struct')
+    assert list(ifc_data.model_files) == ['example_file']
+    assert_totals_match(ifc_data)
+
+def test_reloaded_file_keeps_its_model_name(copy_example):
+    first = copy_example('a/m.ifc')
+    second = copy_example('b/m.ifc')
+    ifc_data = IfcData()
+    ifc_data.load_models([first, second])
+    assert ifc_data.model_files == {'m': first, 'm (2)': second}
+    changes = ifc_data.reload(second)
+    assert ifc_data.model_files == {'m': first, 'm (2)': second}
+    assert changes['unchanged'] == 880 and changes['cost_delta'] == 0.0
+    ifc_data.reload()
+    assert ifc_data.model_files == {'m': first, 'm (2)': second}
+
+def test_model_costs_add_up(example_file, copy_example):
+    ifc_data = IfcData()
+    ifc_data.load_models([example_file, copy_example('struct.ifc')])
+    ifc_data.update_material_prices({material: 3.0 for material in ifc_data.material_prices})
+    for model in ifc_data.model_files:
+        material_costs = ifc_data.get_material_costs(model)
+        element_costs = ifc_data.get_element_costs(model)
+        assert material_costs['cost'].sum() == pytest.approx(element_costs['cost'].sum())
+        assert material_costs['cost'].sum() == pytest.approx(ifc_data.get_total_cost() / 2)
+    with pytest.raises(KeyError):
+        ifc_data.get_material_costs('missing')
+
+def test_adding_a_model_keeps_the_others(example_file, copy_example):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    ifc_data.load_models([copy_example('struct.ifc')])
+    assert list(ifc_data.model_files) == ['example_file', 'struct']
+    ifc_data.load_models([example_file], replace=True)
+    assert list(ifc_data.model_files) == ['example_file']
+
+def test_models_are_extracted_in_spawned_workers(example_file, copy_example, monkeypatch):
+    contexts = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            contexts.append(mp_context and mp_context.get_start_method())
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(ifc_data_module, 'ProcessPoolExecutor', RecordingPool)
+    IfcData().load_models([example_file, copy_example('struct.ifc')])
+    assert contexts == ['spawn']
+
+def test_loading_models_does_not_parse_in_the_calling_process(example_file, copy_example):
+    struct = copy_example('struct.ifc')
+    statements = f'from ifc_data import IfcData\nIfcData().load_models([{example_file!r}, {struct!r}])'
+    assert 'ifcopenshell' not in imported_after(statements)
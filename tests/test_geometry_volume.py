@@ -0,0 +1,71 @@
+import os
+import threading
+
+import ifcopenshell
+
+from geometry_volume import VolumeStore, geometry_key
+from ifc_data import IfcData
+
+def test_geometry_key_includes_openings(example_file):
+    model = ifcopenshell.open(example_file)
+    walls = [element for element in model.by_type('IfcElement') if element.HasOpenings]
+    assert walls
+    for wall in walls:
+        openings = tuple(sorted(rel.RelatedOpeningElement.id() for rel in wall.HasOpenings))
+        assert geometry_key(wall)[-1] == openings
+
+def test_geometry_key_of_elements_without_body(example_file):
+    model = ifcopenshell.open(example_file)
+    assert geometry_key(model.by_type('IfcTypeObject')[0]) is None
+
+def test_volume_store_round_trip(tmp_path):
+    store = VolumeStore(str(tmp_path))
+    assert store.get('hash') == {}
+    store.put('hash', {'a': 1.0})
+    store.put('hash', {'b': 2.0, 'a': 3.0})
+    assert store.get('hash') == {'a': 3.0, 'b': 2.0}
+    assert store.get('other') == {}
+
+def test_concurrent_puts_keep_all_volumes(tmp_path):
+    store = VolumeStore(str(tmp_path))
+
+    def put(worker):
+        for n in range(20):
+            store.put('hash', {f'{worker}-{n}': float(n)})
+
+    threads = [threading.Thread(target=put, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.get('hash')) == 80
+
+def test_volume_store_evicts_least_recently_used(tmp_path):
+    store = VolumeStore(str(tmp_path))
+    store.put('old', {'a': 1.0})
+    store.put('new', {'b': 2.0})
+    for name in os.listdir(tmp_path):
+        if name.startswith('old'):
+            os.utime(tmp_path / name, (0, 0))
+    store.max_bytes = store.size() - 1
+    store.evict()
+    assert store.get('old') == {}
+    assert store.get('new') == {'b': 2.0}
+    assert store.count() == 1
+
+def test_volume_store_invalidate(tmp_path):
+    store = VolumeStore(str(tmp_path))
+    store.put('first', {'a': 1.0})
+    store.put('second', {'b': 2.0})
+    assert store.invalidate('first') == 1
+    assert store.get('first') == {} and store.get('second') == {'b': 2.0}
+    assert store.invalidate() == 1
+    assert store.count() == 0
+
+def test_invalidate_cache_removes_stored_volumes(example_file):
+    ifc_data = IfcData(geometry_volumes=True, geometry_threads=1)
+    ifc_data.load(example_file)
+    store = VolumeStore()
+    assert store.count() == 1
+    assert ifc_data.invalidate_cache(example_file) == 1
+    assert store.count() == 0
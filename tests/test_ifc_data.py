@@ -0,0 +1,135 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from ifc_data import IfcData
+from model_index import UNNAMED_MATERIAL
+from reference_costs import assert_totals_match
+
+def test_load_example(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    assert len(ifc_data.df) == 440
+    assert list(ifc_data.model_files) == ['example_file']
+    assert set(ifc_data.df['material'].cat.categories) <= set(ifc_data.material_prices)
+
+def test_costs_are_memoized_until_a_change(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    material_costs = ifc_data.get_material_costs()
+    element_costs = ifc_data.get_element_costs()
+    version = ifc_data.data_version
+    assert ifc_data.get_material_costs() is material_costs
+    assert ifc_data.get_element_costs() is element_costs
+
+    material = next(iter(ifc_data.material_prices))
+    ifc_data.update_material_price(material, 12.5)
+    assert ifc_data.data_version != version
+    updated = ifc_data.get_material_costs()
+    assert updated is not material_costs
+    assert updated.loc[updated['material'] == material, 'price'].item() == 12.5
+    assert ifc_data.get_element_costs() is not element_costs
+
+def test_reload_invalidates_memoized_costs(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    material_costs = ifc_data.get_material_costs()
+    version = ifc_data.data_version
+    ifc_data.load(example_file)
+    assert ifc_data.data_version != version
+    assert ifc_data.get_material_costs() is not material_costs
+
+def test_price_edits_match_full_recompute(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    materials = list(ifc_data.material_prices)
+    rng = random.Random(0)
+    for _ in range(200):
+        ifc_data.update_material_price(rng.choice(materials), rng.uniform(0, 1000))
+    ifc_data.update_material_prices({material: rng.uniform(0, 1000) for material in materials})
+    assert_totals_match(ifc_data)
+
+def test_non_finite_price_is_rejected(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    material = next(iter(ifc_data.material_prices))
+    ifc_data.update_material_price(material, 5.0)
+    total = ifc_data.get_total_cost()
+    for price in (math.nan, math.inf):
+        with pytest.raises(ValueError):
+            ifc_data.update_material_prices({material: 7.0, 'Other': price})
+    assert ifc_data.material_prices[material] == 5.0
+    assert ifc_data.get_total_cost() == total
+    ifc_data.update_material_price(material, 6.0)
+    assert math.isfinite(ifc_data.get_total_cost())
+    assert_totals_match(ifc_data)
+
+def test_cleared_prices_cost_nothing(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    ifc_data.update_material_prices({material: 3.0 for material in ifc_data.material_prices})
+    ifc_data.clear_material_prices()
+    assert ifc_data.get_total_cost() == 0.0
+    assert not ifc_data.get_material_costs()['cost'].isna().any()
+    assert_totals_match(ifc_data)
+
+def test_price_edits_back_to_zero_cost_nothing(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    materials = list(ifc_data.material_prices)
+    rng = random.Random(2)
+    for material in materials:
+        ifc_data.update_material_price(material, rng.uniform(0, 1e6))
+    for material in materials:
+        ifc_data.update_material_price(material, 0.0)
+    assert ifc_data.get_total_cost() == pytest.approx(0.0, abs=1e-6)
+    np.testing.assert_allclose(ifc_data.get_element_costs()['cost'], 0.0, atol=1e-6)
+
+@pytest.mark.parametrize('takeoff_only', [False, True])
+def test_material_without_name_gets_placeholder(unnamed_material_file, takeoff_only):
+    ifc_data = IfcData(takeoff_only=takeoff_only)
+    ifc_data.load(unnamed_material_file)
+    assert list(ifc_data.df['material']) == [UNNAMED_MATERIAL, UNNAMED_MATERIAL]
+    assert ifc_data.df['volume'].sum() == pytest.approx(3.0)
+
+def test_element_costs_use_material_prices(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    ifc_data.update_material_prices({material: 1.0 for material in ifc_data.material_prices})
+    element_costs = ifc_data.get_element_costs()
+    np.testing.assert_allclose(element_costs['cost'], element_costs['volume'])
+
+def test_price_book_keeps_discovery_order(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    prices = ifc_data.get_material_prices()
+    assert list(prices.columns) == ['material', 'price']
+    assert list(prices['material']) == list(ifc_data.material_prices)
+    assert list(prices['material']) == list(dict.fromkeys(ifc_data.df['material'].astype(str)))
+    assert (prices['price'] == 0.0).all()
+
+def test_catalogue_prices_apply_to_later_loads(example_file):
+    first = IfcData()
+    first.load(example_file)
+    material = next(iter(first.material_prices))
+
+    ifc_data = IfcData()
+    ifc_data.update_material_prices({material: 2.0, 'Catalogue only': 4.0})
+    ifc_data.load(example_file)
+    assert ifc_data.material_prices[material] == 2.0
+    assert ifc_data.material_prices['Catalogue only'] == 4.0
+    assert ifc_data.get_total_cost() > 0.0
+    assert_totals_match(ifc_data)
+
+def test_memory_usage_reports_categorical_takeoff(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    usage = ifc_data.memory_usage()
+    assert usage['rows'] == 440
+    assert usage['total'] == sum(usage[column] for column in ifc_data.df.columns) + usage['index']
+    as_strings = ifc_data.df.astype({'element': object, 'material': object})
+    strings_usage = as_strings.memory_usage(deep=True)
+    for column in ('element', 'material'):
+        assert usage[column] < strings_usage[column]
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from ifc_data import IfcData
+from instrumentation import Instrumentation
+
+@pytest.fixture
+def instrumentation(monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'enabled', True)
+    Instrumentation.reset()
+    yield Instrumentation
+    Instrumentation.reset()
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'enabled', False)
+    Instrumentation.reset()
+    with Instrumentation.span('outer'):
+        Instrumentation.count('rows')
+        Instrumentation.record('inner', 1.0)
+    assert Instrumentation.spans == {} and Instrumentation.counters == {}
+
+def test_nested_spans_and_counters(instrumentation):
+    for _ in range(2):
+        with instrumentation.span('load'):
+            with instrumentation.span('parse'):
+                pass
+            instrumentation.record('extract', 0.5)
+    instrumentation.count('rows', 3)
+    instrumentation.count('rows')
+    spans = instrumentation.to_dict()['spans']
+    assert set(spans) == {'load', 'load/parse', 'load/extract'}
+    assert spans['load']['calls'] == 2
+    assert spans['load/extract']['total_seconds'] == 1.0
+    assert instrumentation.counters == {'rows': 4}
+
+def test_load_is_instrumented(instrumentation, example_file, tmp_path):
+    IfcData().load(example_file)
+    path = tmp_path / 'profile.json'
+    instrumentation.export_json(str(path))
+    profile = json.loads(path.read_text())
+    assert profile['enabled']
+    assert any(name.startswith('load') for name in profile['spans'])
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bench_startup import LAZY_MODULES, SRC, STARTUP_MODULE
+
+def imported_after(statements: str) -> set:
+    """Top-level packages imported by a fresh interpreter running statements."""
+    child = subprocess.run(
+        [sys.executable, '-c', f'{statements}\nimport sys\nprint(" ".join(sys.modules))'],
+        cwd=SRC, env=dict(os.environ, PYTHONPATH=SRC), capture_output=True, text=True, check=True,
+    )
+    return {name.split('.')[0] for name in child.stdout.split()}
+
+def test_startup_does_not_import_lazy_modules():
+    assert not imported_after(f'import {STARTUP_MODULE}') & set(LAZY_MODULES)
+
+@pytest.mark.parametrize('statements, module', [
+    ('from ifc_data import IfcData\nIfcData().load("../example_file.ifc")', 'ifcopenshell'),
+    ('from ifc_data import IfcData\nfrom pie_chart import PieChart\n'
+     'd = IfcData()\nd.load("../example_file.ifc")\nPieChart(d, "material", "volume")', 'matplotlib'),
+])
+def test_lazy_modules_are_imported_on_use(statements, module):
+    assert module in imported_after(statements)
@@ -0,0 +1,75 @@
+import pytest
+
+from ifc_data import IfcData
+from memory_budget import budget_from_env
+from takeoff_registry import SharedTakeoff, TakeoffRegistry
+
+def shared(key='key'):
+    return SharedTakeoff(key, None, [], {})
+
+def test_retained_models_stay_within_budget(monkeypatch):
+    monkeypatch.setattr(TakeoffRegistry, 'model_budget', 100)
+    registry = TakeoffRegistry()
+    first = registry.acquire('first', lambda: shared('first'))
+    second = registry.acquire('second', lambda: shared('second'))
+    assert registry.retain_model(first, 'first model', 60)
+    assert registry.retain_model(second, 'second model', 60)
+    # The least recently used model is released to make room
+    assert registry.model(first) is None
+    assert registry.model(second) == 'second model'
+    assert not registry.retain_model(first, 'first model', 200)
+    registry.release(second)
+    assert registry.stats()['models'] == 0
+
+def test_model_is_released_after_extraction(example_file, monkeypatch):
+    monkeypatch.setattr(TakeoffRegistry, 'model_budget', 0)
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    assert ifc_data.model is None
+    assert IfcData.takeoffs.stats()['models'] == 0
+    # Parsed again from the file when entity access is needed
+    model = ifc_data.get_model()
+    assert len(model.by_type('IfcElement')) > 0
+    assert {element.GlobalId for element in model.by_type('IfcElement')} >= set(ifc_data.df['global_id'])
+
+def test_model_within_budget_is_retained(example_file, monkeypatch):
+    monkeypatch.setattr(TakeoffRegistry, 'model_budget', None)
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    assert ifc_data.model is not None
+    assert ifc_data.get_model() is ifc_data.model
+    ifc_data.close()
+    assert IfcData.takeoffs.stats()['models'] == 0
+
+def test_get_model_of_changed_file(copy_example):
+    ifc_file = copy_example('m.ifc')
+    ifc_data = IfcData()
+    ifc_data.load(ifc_file)
+    with open(ifc_file, 'a') as f:
+        f.write('\n')
+    with pytest.raises(ValueError):
+        ifc_data.get_model()
+
+def test_get_model_requires_name_of_several_models(example_file, copy_example):
+    ifc_data = IfcData()
+    ifc_data.load_models([example_file, copy_example('struct.ifc')])
+    with pytest.raises(ValueError):
+        ifc_data.get_model()
+    with pytest.raises(KeyError):
+        ifc_data.get_model('missing')
+    assert ifc_data.get_model('struct').schema == ifc_data.get_model('example_file').schema
+
+@pytest.mark.parametrize('value, budget', [
+    (None, 64 * 1024 * 1024),
+    ('', 64 * 1024 * 1024),
+    ('none', None),
+    ('0', 0),
+    ('1.5', 3 * 512 * 1024),
+    ('many', 64 * 1024 * 1024),
+])
+def test_budget_from_env(monkeypatch, value, budget):
+    if value is None:
+        monkeypatch.delenv('TEST_BUDGET_MB', raising=False)
+    else:
+        monkeypatch.setenv('TEST_BUDGET_MB', value)
+    assert budget_from_env('TEST_BUDGET_MB', 64) == budget
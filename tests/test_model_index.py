@@ -0,0 +1,64 @@
+import ifcopenshell
+import pytest
+
+from ifc_data import IfcData
+from model_index import MaterialIndex, QuantityIndex, index_types
+from reference_takeoff import reference_material, reference_takeoff, reference_volume
+
+def takeoff_rows(model) -> list:
+    return [
+        (element.is_a(), material_name, volume, element.GlobalId)
+        for element, material_name, volume in IfcData.iter_takeoff(model)
+    ]
+
+@pytest.fixture(params=['example_file', 'synthetic_file'])
+def model(request):
+    return ifcopenshell.open(request.getfixturevalue(request.param))
+
+def test_material_index_matches_scan(model):
+    index = MaterialIndex(model)
+    elements = model.by_type('IfcElement') + model.by_type('IfcTypeObject')
+    assert elements
+    for element in elements:
+        assert index.get(element.id()) == reference_material(model, element), element
+
+def test_direct_items_in_association_order(model):
+    expected = []
+    for associates_material in model.by_type('IfcRelAssociatesMaterial'):
+        for element in associates_material.RelatedObjects:
+            if element.id() not in [seen.id() for seen, _ in expected]:
+                expected.append((element, MaterialIndex.get_material_name(associates_material.RelatingMaterial)))
+    assert list(MaterialIndex(model).direct_items()) == expected
+
+def test_typed_elements_get_material_of_their_type(synthetic_file):
+    model = ifcopenshell.open(synthetic_file)
+    types = index_types(model)
+    index = MaterialIndex(model, types)
+    direct = {element.id() for element, _ in index.direct_items()}
+    inherited = [element_id for element_id in types if element_id not in direct]
+    assert inherited
+    for element_id in inherited:
+        assert index.get(element_id) == index.get(types[element_id])
+
+def test_takeoff_matches_reference(model):
+    assert takeoff_rows(model) == reference_takeoff(model)
+
+def test_quantity_index_matches_get_psets(model):
+    index = QuantityIndex(model)
+    elements = model.by_type('IfcProduct') + model.by_type('IfcTypeObject')
+    volumes = 0
+    for element in elements:
+        volume = reference_volume(element)
+        assert index.get(element.id()) == volume, element
+        volumes += volume is not None
+    assert volumes > 0
+
+def test_quantity_index_with_element_filter(model):
+    walls = {element.id() for element in model.by_type('IfcWall')}
+    index = QuantityIndex(model, element_filter=lambda element: element.id() in walls)
+    full_index = QuantityIndex(model)
+    for element in model.by_type('IfcElement'):
+        if element.id() in walls:
+            assert index.get(element.id()) == full_index.get(element.id())
+        else:
+            assert index.get(element.id()) is None
@@ -0,0 +1,73 @@
+import random
+import threading
+
+import pytest
+
+from ifc_data import IfcData
+from reference_costs import assert_totals_match
+
+def test_reload_of_unchanged_file(copy_example):
+    ifc_file = copy_example('m.ifc')
+    ifc_data = IfcData()
+    ifc_data.load(ifc_file)
+    changes = ifc_data.reload(ifc_file)
+    assert changes == {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 440, 'cost_delta': 0.0}
+
+def test_reload_reports_changed_volume(copy_example):
+    ifc_file = copy_example('m.ifc')
+    ifc_data = IfcData()
+    ifc_data.load(ifc_file)
+    ifc_data.update_material_prices({material: 10.0 for material in ifc_data.material_prices})
+    with open(ifc_file) as f:
+        content = f.read()
+    old = "IFCQUANTITYVOLUME('NetVolume',$,$,0.11687969466897881,$)"
+    with open(ifc_file, 'w') as f:
+        f.write(content.replace(old, "IFCQUANTITYVOLUME('NetVolume',$,$,1.11687969466897881,$)", 1))
+    changes = ifc_data.reload(ifc_file)
+    assert changes['changed'] == 1
+    assert changes['added'] == changes['removed'] == 0
+    assert changes['cost_delta'] == pytest.approx(10.0)
+    assert_totals_match(ifc_data)
+
+def test_concurrent_reloads_loads_and_price_edits(example_file, copy_example):
+    structural = copy_example('struct.ifc')
+    ifc_data = IfcData()
+    ifc_data.load_models([example_file, structural])
+    materials = list(ifc_data.material_prices)
+    rng = random.Random(1)
+
+    def edit_prices():
+        for _ in range(300):
+            ifc_data.update_material_price(rng.choice(materials), rng.uniform(0, 100))
+
+    threads = [
+        threading.Thread(target=edit_prices),
+        threading.Thread(target=lambda: [ifc_data.reload(structural) for _ in range(3)]),
+        threading.Thread(target=lambda: [ifc_data.load_models([example_file]) for _ in range(3)]),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert list(ifc_data.model_files) == ['example_file', 'struct']
+    assert_totals_match(ifc_data)
+    ifc_data.close()
+    assert IfcData.takeoffs.stats()['takeoffs'] == 0
+
+def test_reload_does_not_bring_back_unloaded_model(example_file, copy_example, monkeypatch):
+    structural = copy_example('struct.ifc')
+    ifc_data = IfcData()
+    ifc_data.load_models([example_file, structural])
+    acquire = IfcData._IfcData__acquire_models
+
+    def acquire_while_unloading(self, *args, **kwargs):
+        loaded = acquire(self, *args, **kwargs)
+        # The user unloads the model while its revision is being extracted
+        self.unload_model('struct')
+        return loaded
+
+    monkeypatch.setattr(IfcData, '_IfcData__acquire_models', acquire_while_unloading)
+    ifc_data.reload(structural)
+    assert list(ifc_data.model_files) == ['example_file']
+    ifc_data.close()
+    assert IfcData.takeoffs.stats()['takeoffs'] == 0
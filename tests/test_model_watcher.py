@@ -0,0 +1,43 @@
+import threading
+import time
+
+from ifc_data import IfcData
+from model_watcher import ModelWatcher
+
+def watcher_threads() -> int:
+    return sum(thread.name == 'ModelWatcher' and thread.is_alive() for thread in threading.enumerate())
+
+def test_restarting_leaves_one_thread():
+    watcher = ModelWatcher(IfcData(), interval=0.05)
+    for _ in range(20):
+        watcher.start()
+        watcher.stop()
+    watcher.start()
+    time.sleep(0.3)
+    assert watcher_threads() == 1
+    watcher.stop()
+    time.sleep(0.3)
+    assert watcher_threads() == 0
+
+def test_changed_file_is_reloaded(copy_example):
+    ifc_file = copy_example('m.ifc')
+    ifc_data = IfcData()
+    ifc_data.load(ifc_file)
+    reloaded = threading.Event()
+    changes = []
+
+    def on_reload(summary):
+        changes.append(summary)
+        reloaded.set()
+
+    watcher = ModelWatcher(ifc_data, on_reload=on_reload, interval=0.05)
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        with open(ifc_file, 'a') as f:
+            f.write('\n')
+        assert reloaded.wait(30)
+    finally:
+        watcher.stop()
+    assert changes[0]['unchanged'] == 440
+    assert list(ifc_data.model_files) == ['m']
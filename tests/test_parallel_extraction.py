@@ -0,0 +1,60 @@
+import ifcopenshell
+import numpy as np
+import pandas as pd
+import pytest
+
+from ifc_data import IfcData
+from parallel_extraction import extract_part, merge_parts, partition_of
+
+def load_df(ifc_file: str, workers: int = 1, **settings) -> pd.DataFrame:
+    ifc_data = IfcData(**settings)
+    try:
+        ifc_data.load(ifc_file, workers=workers)
+        return ifc_data.df.copy()
+    finally:
+        ifc_data.close()
+
+@pytest.mark.parametrize('settings', [
+    {},
+    {'takeoff_only': True},
+    {'geometry_volumes': True, 'geometry_threads': 1},
+])
+def test_parallel_takeoff_equals_serial(example_file, settings):
+    serial = load_df(example_file, **settings)
+    assert len(serial) > 0
+    pd.testing.assert_frame_equal(load_df(example_file, workers=3, **settings), serial)
+
+def test_parallel_takeoff_of_synthetic_model_equals_serial(synthetic_file):
+    pd.testing.assert_frame_equal(load_df(synthetic_file, workers=2), load_df(synthetic_file))
+
+def test_parts_cover_every_row_once(example_file):
+    parts = [extract_part(example_file, part, 3) for part in range(3)]
+    positions = np.concatenate([positions for positions, _ in parts])
+    assert len(positions) == 440
+    assert len(np.unique(positions)) == len(positions)
+    columns = merge_parts(parts).to_columns()
+    serial = [
+        (element.is_a(), material_name, volume)
+        for element, material_name, volume in IfcData.iter_takeoff(ifcopenshell.open(example_file))
+    ]
+    assert list(zip(columns['element'], columns['material'], columns['volume'])) == serial
+
+def test_ordered_takeoff_partitions_merge_in_serial_order(example_file):
+    model = ifcopenshell.open(example_file)
+    serial = [(element.id(), material, volume) for element, material, volume in IfcData.iter_takeoff(model)]
+    rows = []
+    for part in range(3):
+        rows.extend(IfcData.iter_ordered_takeoff(model, element_filter=lambda element: element.id() % 3 == part))
+    rows.sort(key=lambda row: row[0])
+    assert [(element.id(), material, volume) for _, element, material, volume in rows] == serial
+
+def test_partition_is_stable():
+    global_id = '2O2Fr$t4X7Zf8NOew3FLOH'
+    assert partition_of(global_id, 4) == partition_of(global_id, 4)
+    assert all(0 <= partition_of(global_id, 3) < 3 for global_id in ('0', 'a', global_id))
+
+@pytest.mark.parametrize('parts', [2, 4])
+def test_parts_are_balanced(synthetic_file, parts):
+    sizes = [len(extract_part(synthetic_file, part, parts)[0]) for part in range(parts)]
+    assert sum(sizes) == 300
+    assert min(sizes) >= 300 / parts / 2
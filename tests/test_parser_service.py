@@ -0,0 +1,68 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from ifc_data import IfcData, LoadCancelled
+from parser_service import ParserService, _read_shared, _write_shared
+from takeoff_builder import TakeoffBuilder
+
+def load_df(ifc_file: str, workers: int = 1, **settings) -> pd.DataFrame:
+    ifc_data = IfcData(**settings)
+    try:
+        ifc_data.load(ifc_file, workers=workers)
+        return ifc_data.df.copy()
+    finally:
+        ifc_data.close()
+
+@pytest.fixture
+def parser():
+    service = ParserService()
+    yield service
+    service.stop()
+
+def test_parser_service_takeoff_equals_serial(example_file, parser, monkeypatch):
+    serial = load_df(example_file)
+    monkeypatch.setattr(IfcData, 'parser', parser)
+    pd.testing.assert_frame_equal(load_df(example_file), serial)
+    pd.testing.assert_frame_equal(load_df(example_file, workers=2), serial)
+
+def test_shared_block_is_released_on_error():
+    builder = TakeoffBuilder()
+    builder.add('IfcWall', 'Concrete', 1.0, '0YvctVUKr0kugbFTf53O9L')
+    codes = builder.to_codes()
+    tables = {name: codes.pop(name) for name in ('element_table', 'material_table')}
+    block_name, layout = _write_shared(codes)
+    # Missing string tables
+    with pytest.raises(KeyError):
+        _read_shared(block_name, layout, {})
+    assert not os.path.exists(f'/dev/shm/{block_name}')
+
+    block_name, layout = _write_shared(codes)
+    assert _read_shared(block_name, layout, tables).to_columns()['material'].tolist() == ['Concrete']
+    assert not os.path.exists(f'/dev/shm/{block_name}')
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='shared memory blocks are not listed in /dev/shm')
+def test_cancelled_load_leaves_no_shared_block(example_file, parser):
+    parser.start()
+    before = set(os.listdir('/dev/shm'))
+
+    def cancelled():
+        # Cancelled only once the worker wrote the takeoff to shared memory
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if any(name.startswith('psm_') for name in set(os.listdir('/dev/shm')) - before):
+                break
+            time.sleep(0.05)
+        # Time to send the message too
+        time.sleep(0.5)
+        return True
+
+    with pytest.raises(LoadCancelled):
+        parser.extract(example_file, cancelled=cancelled)
+    leaked = {name for name in set(os.listdir('/dev/shm')) - before if name.startswith('psm_')}
+    assert not leaked
+    # The worker is started again for the next request
+    builder, _ = parser.extract(example_file)
+    assert len(builder.to_columns()['volume']) == 440
@@ -0,0 +1,53 @@
+import ifcopenshell
+import pytest
+
+from ifc_data import IfcData
+from step_scanner import ScannedModel, decode_string
+
+@pytest.fixture(params=['example', 'synthetic'])
+def ifc_file(request, example_file, synthetic_file):
+    return example_file if request.param == 'example' else synthetic_file
+
+def rows_of(model) -> list:
+    return [
+        (element.id(), element.is_a(), element.GlobalId, material, volume)
+        for element, material, volume in IfcData.iter_takeoff(model)
+    ]
+
+def test_scanned_takeoff_equals_full_parse(ifc_file):
+    with ScannedModel(ifc_file) as scanned:
+        assert rows_of(scanned) == rows_of(ifcopenshell.open(ifc_file))
+
+def test_takeoff_only_load_equals_full_load(ifc_file):
+    full = IfcData()
+    full.load(ifc_file)
+    takeoff_only = IfcData(takeoff_only=True)
+    takeoff_only.load(ifc_file)
+    assert takeoff_only.df.astype(str).equals(full.df.astype(str))
+
+def test_by_type_matches_ifcopenshell(example_file):
+    model = ifcopenshell.open(example_file)
+    with ScannedModel(example_file) as scanned:
+        for name in ('IfcWall', 'IfcElement', 'IfcProduct', 'IfcRoot', 'IfcRelationship', 'IfcProperty',
+                     'IfcPhysicalQuantity', 'IfcRelAssociatesMaterial', 'IfcMaterial'):
+            assert [e.id() for e in scanned.by_type(name)] == [e.id() for e in model.by_type(name)]
+        # Geometry is not kept
+        assert scanned.by_type('IfcCartesianPoint') == []
+        placement = model.by_type('IfcLocalPlacement')[0]
+        assert scanned.by_id(placement.id()) is None
+
+@pytest.mark.parametrize('raw, text', [
+    (b"'Beton C30/37'", 'Beton C30/37'),
+    (b"'It''s'", "It's"),
+    (b"'Stal \\X2\\015B\\X0\\'", 'Stal ś'),
+    (b"'\\S\\D'", 'Ä'),
+])
+def test_decode_string(raw, text):
+    assert decode_string(raw) == text
+
+@pytest.mark.parametrize('content', ['', 'not an IFC file\n'])
+def test_rejects_other_files(tmp_path, content):
+    path = tmp_path / 'other.ifc'
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        ScannedModel(str(path))
@@ -0,0 +1,37 @@
+from ifc_data import IfcData
+from synthetic_model import generate_model
+
+def load_rows(path: str) -> list:
+    ifc_data = IfcData()
+    ifc_data.load(path)
+    df = ifc_data.df
+    return list(zip(df['element'].astype(str), df['material'].astype(str), df['volume']))
+
+def test_counts(tmp_path):
+    path = str(tmp_path / 'model.ifc')
+    stats = generate_model(path, walls=20, slabs=10, beams=30, materials=5)
+    assert stats['elements'] == 60
+    rows = load_rows(path)
+    assert len(rows) == 60
+    assert {element for element, _, _ in rows} == {'IfcWall', 'IfcSlab', 'IfcBeam'}
+    # Walls are named after their layer set, other elements after the material
+    assert {material for element, material, _ in rows if element == 'IfcWall'} <= {
+        f'Material {i:04d} - 200 mm' for i in range(5)
+    }
+
+def test_same_seed_gives_same_takeoff(tmp_path):
+    first, second = str(tmp_path / 'first.ifc'), str(tmp_path / 'second.ifc')
+    generate_model(first, walls=20, slabs=10, beams=30, materials=5, seed=3)
+    generate_model(second, walls=20, slabs=10, beams=30, materials=5, seed=3)
+    assert load_rows(first) == load_rows(second)
+
+def test_property_set_volumes_match_quantity_sets(tmp_path):
+    quantities, properties = str(tmp_path / 'quantities.ifc'), str(tmp_path / 'properties.ifc')
+    generate_model(quantities, walls=10, slabs=5, beams=10, materials=3)
+    generate_model(properties, walls=10, slabs=5, beams=10, materials=3, quantity_sets=False)
+    assert load_rows(quantities) == load_rows(properties)
+
+def test_untyped_beams_get_default_material(tmp_path):
+    path = str(tmp_path / 'model.ifc')
+    generate_model(path, walls=0, slabs=0, beams=20, materials=3, typed_fraction=0.0, untyped_fraction=1.0)
+    assert {material for _, material, _ in load_rows(path)} == {'Structural steel - S235'}
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import flet
+import numpy as np
+import pytest
+
+from ifc_data import IfcData
+from shared_resources import SharedResources
+from table import Table_prim
+
+@pytest.fixture
+def resources(example_file, monkeypatch):
+    # The controls are not added to a page
+    monkeypatch.setattr(flet.Control, 'update', lambda self, *args, **kwargs: None)
+    resources = SharedResources(IfcData())
+    resources.ifc_data.load(example_file)
+    resources.set_total_cost_text(flet.Text())
+    resources.scheduled = 0
+    def schedule():
+        resources.scheduled += 1
+    monkeypatch.setattr(resources.chart_scheduler, 'schedule', schedule)
+    yield resources
+    resources.close()
+
+def shown(table: Table_prim, column: int = 0) -> list:
+    return [row.cells[column].content.value for row in table.rows]
+
+def edit_price(table: Table_prim, material: str, value: str):
+    row = table.material_rows[material]
+    cell = SimpleNamespace(data={'material': material, 'volume': table.values['volume'][row]})
+    control = SimpleNamespace(value=value, parent=cell, error_text=None, update=lambda: None)
+    table._Table_prim__on_text_change(SimpleNamespace(control=control))
+    return control
+
+def test_pages_show_every_row_once(resources, monkeypatch):
+    monkeypatch.setattr(Table_prim, 'PAGE_SIZE', 3)
+    table = Table_prim(resources, 'material')
+    materials = list(table.values['material'])
+    assert len(materials) > 3
+    assert table.pager.visible and table.previous_page_button.disabled
+    seen = []
+    while True:
+        seen.extend(shown(table))
+        assert len(table.rows) <= 3
+        if table.next_page_button.disabled:
+            break
+        table._Table_prim__change_page(1)
+    assert seen == materials
+    assert table.page_text.value.endswith(f'z {len(materials)}')
+
+def test_sorting_starts_on_first_page(resources, monkeypatch):
+    monkeypatch.setattr(Table_prim, 'PAGE_SIZE', 3)
+    table = Table_prim(resources, 'element')
+    table._Table_prim__change_page(1)
+    table._Table_prim__on_sort(SimpleNamespace(column_index=1, ascending=False))
+    assert table.page_index == 0
+    volumes = np.sort(table.values['volume'])[::-1][:3]
+    assert shown(table, 1) == [f'{volume:.2f}' for volume in volumes]
+
+def test_small_table_has_no_pager(resources):
+    table = Table_prim(resources, 'element')
+    assert not table.pager.visible
+    assert shown(table) == list(table.values['element'])
+
+def test_price_edit_updates_row_and_total(resources):
+    table = Table_prim(resources, 'material')
+    material = table.values['material'][0]
+    volume = table.values['volume'][0]
+    edit_price(table, material, '12.5')
+    assert resources.ifc_data.material_prices[material] == 12.5
+    assert table.values['price'][0] == 12.5
+    assert table.cost_texts[material].value == f'{12.5 * volume:.2f}'
+    assert resources.total_cost_text.value == f'Suma kosztów: {resources.ifc_data.get_total_cost():.2f}'
+    assert resources.scheduled == 1
+
+def test_price_edit_on_another_page(resources, monkeypatch):
+    monkeypatch.setattr(Table_prim, 'PAGE_SIZE', 3)
+    table = Table_prim(resources, 'material')
+    material = table.values['material'][-1]
+    assert material not in table.cost_texts
+    edit_price(table, material, '3')
+    assert table.values['cost'][-1] == 3 * table.values['volume'][-1]
+    while not table.next_page_button.disabled:
+        table._Table_prim__change_page(1)
+    assert table.cost_texts[material].value == f"{table.values['cost'][-1]:.2f}"
+
+@pytest.mark.parametrize('value', ['abc', 'nan', 'inf'])
+def test_invalid_price_is_rejected(resources, value):
+    table = Table_prim(resources, 'material')
+    material = table.values['material'][0]
+    control = edit_price(table, material, value)
+    assert control.error_text == 'Wprowadź liczbę'
+    assert resources.ifc_data.material_prices[material] == 0.0
+    assert resources.scheduled == 0
@@ -0,0 +1,64 @@
+import ifcopenshell
+import pandas as pd
+import pytest
+
+from ifc_data import IfcData
+from reference_takeoff import reference_takeoff
+from takeoff_builder import TakeoffBuilder
+
+ROWS = [
+    ('IfcWall', 'Concrete', 1.5, 'guid-0'),
+    ('IfcBeam', 'Steel', 0.25, 'guid-1'),
+    ('IfcWall', 'Brick', 2.0, 'guid-2'),
+    ('IfcSlab', 'Concrete', 3.0, 'guid-3'),
+    ('IfcBeam', 'Steel', 0.5, 'guid-4'),
+]
+
+def builder_of(rows, capacity=None) -> TakeoffBuilder:
+    builder = TakeoffBuilder(capacity=capacity)
+    for row in rows:
+        builder.add(*row)
+    return builder
+
+@pytest.mark.parametrize('capacity', [1, 2, None])
+def test_build_keeps_rows_in_order(capacity):
+    df = builder_of(ROWS, capacity).build()
+    assert list(df.columns) == ['element', 'material', 'volume', 'global_id']
+    assert list(zip(df['element'].astype(str), df['material'].astype(str), df['volume'], df['global_id'])) == ROWS
+    assert df['volume'].dtype == 'float64'
+
+def test_materials_in_order_of_appearance():
+    builder = builder_of(ROWS)
+    assert builder.materials == ['Concrete', 'Steel', 'Brick']
+    assert builder.get_stats()['rows'] == len(ROWS)
+    assert len(builder) == len(ROWS)
+
+def test_empty_build():
+    df = TakeoffBuilder().build()
+    assert list(df.columns) == ['element', 'material', 'volume', 'global_id']
+    assert df.empty
+
+def test_columns_round_trip():
+    builder = builder_of(ROWS)
+    pd.testing.assert_frame_equal(TakeoffBuilder.from_columns(builder.to_columns()).build(), builder.build())
+
+def test_codes_round_trip():
+    builder = builder_of(ROWS)
+    rebuilt = TakeoffBuilder.from_codes(builder.to_codes())
+    pd.testing.assert_frame_equal(rebuilt.build(), builder.build())
+    assert rebuilt.materials == builder.materials
+
+def test_loaded_takeoff_matches_reference(example_file):
+    ifc_data = IfcData()
+    ifc_data.load(example_file)
+    df = ifc_data.df
+    rows = list(zip(df['element'].astype(str), df['material'].astype(str), df['volume'], df['global_id']))
+    assert len(rows) == 440
+    assert rows == reference_takeoff(ifcopenshell.open(example_file))
+
+def test_build_returns_categoricals():
+    df = builder_of(ROWS).build()
+    for column in ('element', 'material'):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+        assert list(df[column].cat.categories) == sorted(df[column].cat.categories)
+    assert df['volume'].to_numpy().flags['C_CONTIGUOUS']
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+
+from ifc_data import IfcData
+from takeoff_builder import TakeoffBuilder
+from takeoff_cache import TakeoffCache
+
+def test_cached_takeoff_equals_extracted(example_file, tmp_path):
+    cache = TakeoffCache(str(tmp_path / 'takeoffs'))
+    extracted = IfcData(cache=cache)
+    extracted.load(example_file)
+    assert not extracted.load_stats['cached']
+    assert cache.count() == 1
+    df = extracted.df.copy()
+    extracted.close()
+
+    cached = IfcData(cache=cache)
+    cached.load(example_file)
+    assert cached.load_stats['cached']
+    pd.testing.assert_frame_equal(cached.df, df)
+    assert list(cached.material_prices) == list(extracted.material_prices)
+
+def test_invalidated_takeoff_is_extracted_again(example_file, tmp_path):
+    cache = TakeoffCache(str(tmp_path / 'takeoffs'))
+    ifc_data = IfcData(cache=cache)
+    ifc_data.load(example_file)
+    ifc_data.close()
+    assert ifc_data.invalidate_cache(example_file) == 1
+    ifc_data.load(example_file)
+    assert not ifc_data.load_stats['cached']
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = TakeoffCache(str(tmp_path / 'takeoffs'))
+    builder = TakeoffBuilder()
+    builder.add('IfcWall', 'Concrete', 1.0, 'guid-0')
+    cache.put('old', builder)
+    cache.put('new', builder)
+    os.utime(os.path.join(cache.directory, 'old.npz'), (0, 0))
+    cache.max_bytes = cache.size() - 1
+    cache.evict()
+    assert cache.get('old') is None
+    assert cache.get('new') is not None
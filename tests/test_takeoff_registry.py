@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from ifc_data import IfcData, LoadCancelled
+from takeoff_registry import SharedTakeoff, TakeoffRegistry
+
+def shared(key='key'):
+    return SharedTakeoff(key, None, [], {})
+
+def test_acquire_shares_takeoff_and_counts_references():
+    registry = TakeoffRegistry()
+    extracted = []
+
+    def extract():
+        extracted.append(1)
+        return shared()
+
+    first = registry.acquire('key', extract)
+    second = registry.acquire('key', extract)
+    assert first is second
+    assert len(extracted) == 1
+    assert registry.stats()['references'] == 2
+
+def test_waiting_session_uses_running_extraction():
+    registry = TakeoffRegistry()
+    started = threading.Event()
+    finish = threading.Event()
+    extracted = []
+    results = []
+
+    def slow_extract():
+        extracted.append(1)
+        started.set()
+        finish.wait(5)
+        return shared()
+
+    first = threading.Thread(target=lambda: results.append(registry.acquire('key', slow_extract)))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=lambda: results.append(registry.acquire('key', slow_extract)))
+    second.start()
+    # Let the second session start waiting
+    time.sleep(0.3)
+    finish.set()
+    first.join(5)
+    second.join(5)
+    assert len(extracted) == 1
+    assert results[0] is results[1]
+    assert results[0].references == 2
+
+def test_waiting_session_extracts_after_failure():
+    registry = TakeoffRegistry()
+    started = threading.Event()
+    finish = threading.Event()
+    errors = []
+
+    def failing_extract():
+        started.set()
+        finish.wait(5)
+        raise RuntimeError('broken file')
+
+    def acquire_failing():
+        try:
+            registry.acquire('key', failing_extract)
+        except RuntimeError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=acquire_failing)
+    first.start()
+    assert started.wait(5)
+    results = []
+    second = threading.Thread(target=lambda: results.append(registry.acquire('key', shared)))
+    second.start()
+    finish.set()
+    first.join(5)
+    second.join(5)
+    assert len(errors) == 1
+    assert len(results) == 1 and results[0].references == 1
+
+def test_waiting_session_can_be_cancelled(monkeypatch):
+    monkeypatch.setattr(TakeoffRegistry, 'POLL_INTERVAL', 0.01)
+    registry = TakeoffRegistry()
+    started = threading.Event()
+    finish = threading.Event()
+
+    def slow_extract():
+        started.set()
+        finish.wait(5)
+        return shared()
+
+    first = threading.Thread(target=lambda: registry.acquire('key', slow_extract))
+    first.start()
+    assert started.wait(5)
+
+    def check_cancelled():
+        raise LoadCancelled('file.ifc')
+
+    with pytest.raises(LoadCancelled):
+        registry.acquire('key', slow_extract, check_cancelled)
+    finish.set()
+    first.join(5)
+    assert registry.stats()['references'] == 1
+
+def test_release_drops_takeoff_with_last_reference():
+    registry = TakeoffRegistry()
+    takeoff = registry.acquire('key', shared)
+    registry.acquire('key', shared)
+    registry.release(takeoff)
+    assert registry.stats()['takeoffs'] == 1
+    registry.release(takeoff)
+    assert registry.stats() == {'takeoffs': 0, 'references': 0, 'models': 0, 'model_bytes': 0}
+    assert registry.acquire('key', lambda: shared()) is not takeoff
+
+def test_sessions_share_takeoff_of_same_file(example_file):
+    first = IfcData()
+    second = IfcData()
+    first.load(example_file)
+    second.load(example_file)
+    assert IfcData.takeoffs.stats()['takeoffs'] == 1
+    assert IfcData.takeoffs.stats()['references'] == 2
+    # Prices are per session
+    material = next(iter(first.material_prices))
+    first.update_material_price(material, 10.0)
+    assert second.material_prices[material] == 0.0
+    assert second.get_total_cost() == 0.0
+    first.close()
+    second.close()
+    assert IfcData.takeoffs.stats()['takeoffs'] == 0
+
+def test_sessions_with_other_takeoff_settings_do_not_share(example_file):
+    plain = IfcData()
+    geometry = IfcData(geometry_volumes=True, geometry_threads=1)
+    # The takeoff-only reader gives the same takeoff as a full parse
+    takeoff_only = IfcData(takeoff_only=True)
+    for ifc_data in (plain, geometry, takeoff_only):
+        ifc_data.load(example_file)
+    assert IfcData.takeoffs.stats()['takeoffs'] == 2
+    assert len(geometry.df) > len(plain.df) == len(takeoff_only.df)
+    for ifc_data in (plain, geometry, takeoff_only):
+        ifc_data.close()
+    assert IfcData.takeoffs.stats()['takeoffs'] == 0